@@ -0,0 +1,90 @@
+"""
+Incrementally maintained sales aggregates.
+
+``SalesAggregates`` keeps the numbers behind ``/api/sales-analytics`` up to
+date as deals are created, updated and deleted, so reading them is constant
+time regardless of the dataset size. Every mutation adjusts the running
+totals in O(1); regions are tracked as reference counts of the reps that
+operate in them.
+"""
+from collections import Counter
+from typing import Any, Dict, List
+
+from deal_store import DEAL_STATUSES, DealStore
+
+
+class SalesAggregates:
+    """Running totals for deal count, status breakdown, value and regions."""
+
+    def __init__(self):
+        self.deal_count = 0
+        self.total_value = 0
+        self.status_counts: Dict[str, int] = {status: 0 for status in DEAL_STATUSES}
+        self.region_refcounts: Counter = Counter()
+
+    @classmethod
+    def from_store(cls, store: DealStore) -> "SalesAggregates":
+        """Seed the running totals with a full (vectorized) recompute."""
+        aggregates = cls()
+        aggregates.deal_count = store.deal_count
+        aggregates.total_value = store.total_value()
+        aggregates.status_counts.update(store.status_counts())
+        for rep in store.reps:
+            aggregates.add_rep(rep['region'])
+        return aggregates
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+    def add_rep(self, region: str):
+        self.region_refcounts[region] += 1
+
+    def remove_rep(self, region: str):
+        self.region_refcounts[region] -= 1
+        if self.region_refcounts[region] <= 0:
+            del self.region_refcounts[region]
+
+    def add_deal(self, value, status: str):
+        self.deal_count += 1
+        self.total_value += value
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def remove_deal(self, value, status: str):
+        self.deal_count -= 1
+        self.total_value -= value
+        self.status_counts[status] -= 1
+
+    def update_deal(self, old_value, old_status: str, new_value, new_status: str):
+        self.remove_deal(old_value, old_status)
+        self.add_deal(new_value, new_status)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def analytics(self) -> Dict[str, Any]:
+        """Payload for the ``SalesAnalytics`` response model."""
+        return {
+            "totalDealCount": self.deal_count,
+            "dealStatusSummary": dict(self.status_counts),
+            "totalDealValue": self.total_value,
+            "averageDealValue": self.total_value / self.deal_count if self.deal_count else 0,
+            "regionDistribution": list(self.region_refcounts),
+        }
+
+    def diff(self, other: "SalesAggregates") -> List[str]:
+        """Describe every field where ``self`` and ``other`` disagree."""
+        mismatches = []
+        if self.deal_count != other.deal_count:
+            mismatches.append(f"totalDealCount: {self.deal_count} != {other.deal_count}")
+        if abs(self.total_value - other.total_value) > 1e-6 * max(1, abs(other.total_value)):
+            mismatches.append(f"totalDealValue: {self.total_value} != {other.total_value}")
+        for status in set(self.status_counts) | set(other.status_counts):
+            mine = self.status_counts.get(status, 0)
+            theirs = other.status_counts.get(status, 0)
+            if mine != theirs:
+                mismatches.append(f"dealStatusSummary[{status}]: {mine} != {theirs}")
+        if +self.region_refcounts != +other.region_refcounts:
+            mismatches.append(
+                f"regionDistribution: {dict(self.region_refcounts)} != {dict(other.region_refcounts)}"
+            )
+        return mismatches
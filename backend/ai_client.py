@@ -0,0 +1,222 @@
+"""
+Non-blocking access to the Gemini model.
+
+``GeminiClient`` wraps a ``GenerativeModel`` so that AI calls never block the
+event loop:
+
+- the SDK's async API (``generate_content_async``) is used when available
+  (and ``use_async_api`` is set), otherwise the blocking call is offloaded to
+  a bounded thread pool
+- a semaphore caps the number of concurrent upstream calls
+- every upstream call is bounded by a timeout. A timed out call still running
+  in the thread pool keeps its semaphore slot until it returns, since the
+  thread cannot be stopped, so timeouts never let more calls run than allowed
+- identical prompts that are in flight at the same time share a single
+  upstream call (request coalescing)
+
+``stream`` yields the answer chunk by chunk through the SDK's streaming
+generation (``stream=True``) under the same concurrency cap and timeout.
+Closing the stream early, e.g. when the HTTP client went away, cancels the
+upstream call.
+
+The model is created by ``model_factory`` on first use, which is where the
+application imports the (heavy) Gemini SDK. Requests create it in a worker
+thread so the import never stalls the event loop; ``load_model`` lets a
+startup warmup do it ahead of the first question.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+# Marks the end of a stream relayed from the executor thread
+_END = object()
+
+
+class GeminiClient:
+    """Bounded, coalescing async front for a Gemini ``GenerativeModel``."""
+
+    def __init__(self, model_factory: Callable[[], Any], generation_config: Optional[Dict[str, Any]] = None,
+                 max_concurrency: int = 4, timeout: float = 30.0, use_async_api: bool = True):
+        self.model_factory = model_factory
+        # The SDK only implements the async API over gRPC, not over REST
+        self.use_async_api = use_async_api
+        self.generation_config = generation_config or {}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.streamed_calls = 0
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self.model_factory()
+        return self._model
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    def load_model(self):
+        """Create the model now (blocking), e.g. from a warmup thread."""
+        return self.model
+
+    async def _get_model(self):
+        if self._model is None:
+            await asyncio.to_thread(self.load_model)
+        return self._model
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="gemini"
+            )
+        return self._executor
+
+    def _release_after(self, call: Optional[asyncio.Future]):
+        """Free the semaphore slot now, or once the executor ``call`` returns."""
+        if call is None or call.done():
+            self._get_semaphore().release()
+        else:
+            call.add_done_callback(lambda _: self._get_semaphore().release())
+
+    async def _call_upstream(self, prompt: str) -> str:
+        await self._get_semaphore().acquire()
+        thread_call = None
+        try:
+            self.upstream_calls += 1
+            model = await self._get_model()
+            if self.use_async_api and hasattr(model, "generate_content_async"):
+                call = model.generate_content_async(prompt, generation_config=self.generation_config)
+            else:
+                thread_call = asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(),
+                    lambda: model.generate_content(prompt, generation_config=self.generation_config),
+                )
+                # Shielded: a timeout must not mark the call done while its thread still runs
+                call = asyncio.shield(thread_call)
+            response = await asyncio.wait_for(call, timeout=self.timeout)
+            return response.text.strip()
+        finally:
+            self._release_after(thread_call)
+
+    async def generate(self, prompt: str) -> str:
+        """
+        Generate an answer for ``prompt``.
+
+        Raises ``asyncio.TimeoutError`` if the upstream call exceeds the
+        timeout; upstream errors propagate to every coalesced caller.
+        """
+        task = self._in_flight.get(prompt)
+        if task is None:
+            task = asyncio.ensure_future(self._call_upstream(prompt))
+            self._in_flight[prompt] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(prompt, None))
+        else:
+            self.coalesced_calls += 1
+        # Shield so one caller disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yield the answer for ``prompt`` in chunks as the model generates them.
+
+        Streams are not coalesced. The whole stream must finish within the
+        timeout, otherwise ``asyncio.TimeoutError`` is raised. Closing the
+        generator early (or cancelling the task consuming it) stops the
+        upstream call.
+        """
+        await self._get_semaphore().acquire()
+        producer, stopped = None, threading.Event()
+        try:
+            self.upstream_calls += 1
+            self.streamed_calls += 1
+            model = await self._get_model()
+            deadline = asyncio.get_running_loop().time() + self.timeout
+            if self.use_async_api and hasattr(model, "generate_content_async"):
+                chunks = self._stream_async(model, prompt)
+            else:
+                chunks, producer = self._stream_in_thread(model, prompt, stopped)
+            try:
+                while True:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    try:
+                        text = await asyncio.wait_for(chunks.__anext__(), timeout=max(remaining, 0))
+                    except StopAsyncIteration:
+                        return
+                    if text:
+                        yield text
+            finally:
+                await chunks.aclose()
+        finally:
+            # The thread notices at its next chunk and stops reading the stream
+            stopped.set()
+            self._release_after(producer)
+
+    async def _stream_async(self, model, prompt: str) -> AsyncIterator[str]:
+        response = await model.generate_content_async(
+            prompt, generation_config=self.generation_config, stream=True)
+        chunks = response.__aiter__()
+        try:
+            async for chunk in chunks:
+                yield chunk.text
+        finally:
+            # Release the upstream connection right away, not when collected
+            close = getattr(chunks, "aclose", None)
+            if close is not None:
+                await close()
+
+    def _stream_in_thread(self, model, prompt: str,
+                          stopped: threading.Event) -> Tuple[AsyncIterator[str], asyncio.Future]:
+        """
+        Start relaying the blocking SDK stream from the executor through a
+        queue; returns the chunks and the executor call, which ends soon
+        after ``stopped`` is set.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def produce():
+            try:
+                for chunk in model.generate_content(prompt, generation_config=self.generation_config, stream=True):
+                    if stopped.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+                loop.call_soon_threadsafe(queue.put_nowait, _END)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+
+        async def relay() -> AsyncIterator[str]:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        return relay(), loop.run_in_executor(self._get_executor(), produce)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "upstreamCalls": self.upstream_calls,
+            "coalescedCalls": self.coalesced_calls,
+            "streamedCalls": self.streamed_calls,
+            "inFlight": len(self._in_flight),
+            "maxConcurrency": self.max_concurrency,
+            "timeoutSeconds": self.timeout,
+        }
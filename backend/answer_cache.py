@@ -0,0 +1,191 @@
+"""
+Answer cache for ``/api/ai``.
+
+Dashboard users ask the same few questions over and over, and each one costs
+a full Gemini round-trip. ``AnswerCache`` keeps previous answers in memory:
+
+- exact tier: questions are normalized (case, punctuation, whitespace) and
+  looked up directly
+- optional similarity tier: questions are embedded into hashed bag-of-words
+  vectors and the closest cached question is reused when its cosine
+  similarity reaches the configured threshold
+
+Entries expire after a TTL, are evicted least-recently-used first when either
+the entry or the memory cap is reached, and are tied to the dataset version so
+that any data change invalidates every cached answer. Data versions only
+grow: a request still on an older version (one that started before a write
+or reload) neither reads nor stores answers, and never winds the cache back.
+"""
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s-]")
+_WHITESPACE = re.compile(r"\s+")
+
+EMBEDDING_DIMENSIONS = 512
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", question.lower())).strip()
+
+
+def hashed_embedding(text: str) -> np.ndarray:
+    """
+    Local, dependency-free embedding: hashed counts of words and word bigrams,
+    L2-normalized so a dot product is the cosine similarity.
+    """
+    words = text.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+    for feature in features:
+        vector[zlib.crc32(feature.encode("utf-8")) % EMBEDDING_DIMENSIONS] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _Entry:
+    __slots__ = ("answer", "created", "embedding", "size", "cost")
+
+    def __init__(self, answer, created, embedding, size, cost):
+        self.answer = answer
+        self.created = created
+        self.embedding = embedding
+        self.size = size
+        self.cost = cost
+
+
+class AnswerCache:
+    """TTL + LRU cache of AI answers with an optional similarity tier."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 4 * 1024 * 1024,
+                 ttl: float = 3600.0, similarity_threshold: Optional[float] = None,
+                 embed: Callable[[str], np.ndarray] = hashed_embedding, enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self.enabled = enabled
+        self.version = None
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "exactHits": 0,
+            "similarHits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+        self._saved_seconds = 0.0
+
+    def _check_version(self, version) -> bool:
+        """Move to ``version`` if it is newer; False when it is older than the cache."""
+        if self.version is not None and version < self.version:
+            return False
+        if version != self.version:
+            if self._entries:
+                self._counters["invalidations"] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self.version = version
+        return True
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl is not None and now - entry.created > self.ttl
+
+    def get(self, question: str, version) -> Optional[str]:
+        """Return a cached answer for ``question`` at data ``version``, if any."""
+        if not self.enabled:
+            return None
+        key = normalize_question(question)
+        now = time.monotonic()
+        with self._lock:
+            if not self._check_version(version):
+                self._counters["misses"] += 1
+                return None
+
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._drop(key)
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["exactHits"] += 1
+                self._saved_seconds += entry.cost
+                return entry.answer
+
+            if self.similarity_threshold is not None and self._entries:
+                match = self._most_similar(self.embed(key), now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    entry = self._entries[match]
+                    self._counters["similarHits"] += 1
+                    self._saved_seconds += entry.cost
+                    return entry.answer
+
+            self._counters["misses"] += 1
+            return None
+
+    def _most_similar(self, embedding: np.ndarray, now: float) -> Optional[str]:
+        keys = [key for key, entry in self._entries.items() if not self._expired(entry, now)]
+        if not keys:
+            return None
+        matrix = np.stack([self._entries[key].embedding for key in keys])
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity_threshold else None
+
+    def put(self, question: str, version, answer: str, cost: float = 0.0):
+        """
+        Store ``answer`` for ``question``; ``cost`` is the upstream latency in
+        seconds that a future hit saves.
+        """
+        if not self.enabled:
+            return
+        key = normalize_question(question)
+        embedding = self.embed(key) if self.similarity_threshold is not None else None
+        size = len(key) + len(answer) + (embedding.nbytes if embedding is not None else 0)
+        with self._lock:
+            if not self._check_version(version):
+                # Answered from data that has changed since; do not keep it
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(answer, time.monotonic(), embedding, size, cost)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._counters["exactHits"] + self._counters["similarHits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                **self._counters,
+                "hitRate": hits / lookups if lookups else 0.0,
+                "upstreamCallsSaved": hits,
+                "latencySavedSeconds": round(self._saved_seconds, 3),
+            }
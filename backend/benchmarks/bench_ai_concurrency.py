@@ -0,0 +1,105 @@
+"""
+Latency of the data endpoints while AI calls are in flight.
+
+A fake Gemini model with injected latency replaces the real one. The probe
+endpoints are measured alone, next to AI calls made the old way (blocking
+``generate_content`` inside the async handler) and next to AI calls made
+through ``GeminiClient``. Run from the backend directory:
+
+    python benchmarks/bench_ai_concurrency.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from ai_client import GeminiClient  # noqa: E402
+from fake_gemini import FakeGenerativeModel  # noqa: E402
+
+AI_LATENCY = 0.1
+AI_CONCURRENCY = 4
+PROBE_PATHS = ("/api/sales-analytics", "/api/data?limit=2")
+PROBES = 20
+
+
+class BlockingClient:
+    """Reproduces the previous behaviour: a synchronous SDK call on the event loop."""
+
+    timeout = 30
+    generation_config = {}
+
+    def __init__(self, model):
+        self.model = model
+
+    async def generate(self, prompt):
+        return self.model.generate_content(prompt).text.strip()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(ai_client):
+    main.GEMINI_API_KEY = "fake-key"
+    main.AI_CLIENT = ai_client
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        stop = asyncio.Event()
+
+        async def ai_load(worker):
+            n = 0
+            while not stop.is_set():
+                await client.post("/api/ai", json={"question": f"question {worker}-{n}"})
+                n += 1
+                # In-process transport never yields on its own; a real socket would
+                await asyncio.sleep(0)
+
+        loaders = [asyncio.ensure_future(ai_load(i)) for i in range(AI_CONCURRENCY)] if ai_client else []
+        await asyncio.sleep(0.05)
+        latencies = []
+        for i in range(PROBES):
+            start = time.perf_counter()
+            response = await client.get(PROBE_PATHS[i % len(PROBE_PATHS)])
+            assert response.status_code == 200
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.005)
+        stop.set()
+        await asyncio.gather(*loaders)
+    return latencies
+
+
+async def coalescing_demo():
+    model = FakeGenerativeModel(latency=AI_LATENCY)
+    ai_client = GeminiClient(model_factory=lambda: model)
+    answers = await asyncio.gather(*(ai_client.generate("same prompt") for _ in range(20)))
+    return len(answers), model.calls
+
+
+def main_():
+    # The simulated clients all share one address; rate limits would reject most of them
+    main.RATE_LIMITER.enabled = False
+    print(f"fake Gemini latency {AI_LATENCY * 1000:.0f} ms, {AI_CONCURRENCY} concurrent AI callers")
+    print(f"{'scenario':<28} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    scenarios = (
+        ("no AI load", None),
+        ("blocking generate_content", BlockingClient(FakeGenerativeModel(latency=AI_LATENCY))),
+        ("GeminiClient (async)", GeminiClient(
+            model_factory=lambda: FakeGenerativeModel(latency=AI_LATENCY), max_concurrency=4)),
+    )
+    for name, ai_client in scenarios:
+        latencies = asyncio.run(measure(ai_client))
+        print(f"{name:<28} {statistics.median(latencies):>8.2f} {percentile(latencies, 99):>8.2f}"
+              f" {max(latencies):>8.2f}")
+    requests, upstream = asyncio.run(coalescing_demo())
+    print(f"coalescing: {requests} identical concurrent questions -> {upstream} upstream call(s)")
+
+
+if __name__ == "__main__":
+    main_()
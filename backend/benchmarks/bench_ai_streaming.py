@@ -0,0 +1,145 @@
+"""
+Time to first byte of ``/api/ai`` vs ``/api/ai/stream``, and upstream
+cancellation when a streaming client disconnects.
+
+A fake Gemini model streams its answer word by word with injected latency.
+The app is driven directly over ASGI so every body chunk is timestamped as
+the server sends it. Both the SDK's async streaming API and the blocking
+one (relayed from the executor) are exercised. Run from the backend directory:
+
+    python benchmarks/bench_ai_streaming.py
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from ai_client import GeminiClient  # noqa: E402
+from fake_gemini import FakeGenerativeModel  # noqa: E402
+
+FIRST_TOKEN_LATENCY = 0.3
+CHUNK_INTERVAL = 0.05
+REQUESTS = 5
+ANSWER = "Europe leads on closed value while North America has the most open deals in progress right now."
+
+
+class BlockingOnlyModel:
+    """Exposes only the blocking SDK call, forcing the executor relay."""
+
+    def __init__(self, model):
+        self._model = model
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        return self._model.generate_content(prompt, generation_config=generation_config, stream=stream)
+
+    @property
+    def cancelled_streams(self):
+        return self._model.cancelled_streams
+
+    @property
+    def chunks_sent(self):
+        return self._model.chunks_sent
+
+
+async def post(path, question, disconnect_after=None):
+    """POST ``question``; returns body chunk timestamps and the decoded body."""
+    body = json.dumps({"question": question}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 8000),
+    }
+    chunks, times = [], []
+    requested = False
+    gone = asyncio.Event()
+    start = time.perf_counter()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            if message.get("body"):
+                chunks.append(message["body"])
+                times.append(time.perf_counter() - start)
+                if disconnect_after is not None and len(chunks) >= disconnect_after:
+                    gone.set()
+            if not message.get("more_body"):
+                gone.set()
+
+    await main.app(scope, receive, send)
+    return times, b"".join(chunks).decode()
+
+
+def events(body):
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+async def run(label, model):
+    main.AI_CLIENT = GeminiClient(model_factory=lambda: model, timeout=10)
+    ttfb = {"/api/ai": [], "/api/ai/stream": []}
+    total = {"/api/ai": [], "/api/ai/stream": []}
+    for i in range(REQUESTS):
+        for path in ttfb:
+            times, body = await post(path, f"Give me a narrative summary of the team ({label} {path} {i})")
+            ttfb[path].append(times[0])
+            total[path].append(times[-1])
+            if path == "/api/ai/stream":
+                parsed = events(body)
+                assert parsed[-1][0] == "done", parsed[-1]
+                streamed = "".join(payload["text"] for event, payload in parsed if event == "token")
+                assert streamed.strip() == parsed[-1][1]["answer"] == ANSWER
+            else:
+                assert json.loads(body)["answer"] == ANSWER
+
+    for path in ttfb:
+        print(f"{label:<8} {path:<16} {statistics.median(ttfb[path]) * 1000:>12.0f}"
+              f" {statistics.median(total[path]) * 1000:>10.0f}")
+
+    # Disconnect after the first token: the upstream stream must stop early
+    cancelled, sent = model.cancelled_streams, model.chunks_sent
+    await post("/api/ai/stream", f"Disconnecting question ({label})", disconnect_after=1)
+    await asyncio.sleep(FIRST_TOKEN_LATENCY + 3 * CHUNK_INTERVAL)
+    words = len(ANSWER.split(" "))
+    print(f"{label:<8} disconnect after 1st token: upstream cancelled={model.cancelled_streams - cancelled}, "
+          f"chunks generated {model.chunks_sent - sent}/{words}, in flight {main.AI_CLIENT.stats()['inFlight']}")
+    assert model.cancelled_streams - cancelled == 1 and model.chunks_sent - sent < words
+
+
+def main_():
+    # The simulated clients all share one address; rate limits would reject most of them
+    main.RATE_LIMITER.enabled = False
+    main.GEMINI_API_KEY = "fake-key"
+    main.ANSWER_CACHE.enabled = False
+    print(f"fake model: first token after {FIRST_TOKEN_LATENCY * 1000:.0f} ms, "
+          f"then one word every {CHUNK_INTERVAL * 1000:.0f} ms")
+    print(f"{'model':<8} {'path':<16} {'TTFB ms p50':>12} {'total ms':>10}")
+    for label, model in (
+        ("async", FakeGenerativeModel(latency=FIRST_TOKEN_LATENCY, answer=ANSWER, chunk_interval=CHUNK_INTERVAL)),
+        ("blocking", BlockingOnlyModel(
+            FakeGenerativeModel(latency=FIRST_TOKEN_LATENCY, answer=ANSWER, chunk_interval=CHUNK_INTERVAL))),
+    ):
+        asyncio.run(run(label, model))
+
+    count = main.AI_TIME_TO_FIRST_TOKEN.count()
+    print(f"ai_time_to_first_token_seconds: {count} observations (one per upstream stream)")
+    assert count == 2 * (REQUESTS + 1)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,82 @@
+"""
+Peak memory and time-to-first-byte of ``/api/data``: full JSON vs NDJSON streaming.
+
+The app is driven directly over ASGI with a ``send`` callable that only counts
+body bytes, so the measurement reflects server-side buffering rather than the
+client's. Run from the backend directory:
+
+    python benchmarks/bench_data_streaming.py
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from snapshot import DataSnapshot  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+REP_COUNTS = (500, 2_000, 8_000)
+
+
+async def fetch(query_string):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/data", "raw_path": b"/api/data",
+        "root_path": "", "query_string": query_string.encode(), "headers": [],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 8000),
+    }
+    stats = {"bytes": 0, "first_byte": None}
+    start = time.perf_counter()
+
+    requested = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect; only send one at the end
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            if stats["first_byte"] is None:
+                stats["first_byte"] = time.perf_counter() - start
+            stats["bytes"] += len(message["body"])
+
+    await main.app(scope, receive, send)
+    done.set()
+    stats["total"] = time.perf_counter() - start
+    return stats
+
+
+def measure(query_string):
+    # Time without tracing, then repeat under tracemalloc for the memory peak
+    stats = asyncio.run(fetch(query_string))
+    tracemalloc.start()
+    asyncio.run(fetch(query_string))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return stats, peak
+
+
+def main_():
+    print(f"{'reps':>8} {'mode':>7} {'MB sent':>8} {'peak MB':>8} {'TTFB ms':>8} {'total ms':>9}")
+    for reps in REP_COUNTS:
+        data = generate_dataset(reps * 50)
+        main.SNAPSHOT = DataSnapshot(JsonStorage.from_data(data))
+        for mode, query in (("json", ""), ("ndjson", "format=ndjson")):
+            stats, peak = measure(query)
+            print(f"{reps:>8,} {mode:>7} {stats['bytes'] / 1e6:>8.1f} {peak / 1e6:>8.1f}"
+                  f" {stats['first_byte'] * 1000:>8.1f} {stats['total'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main_()
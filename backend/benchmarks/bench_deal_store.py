@@ -0,0 +1,88 @@
+"""
+Compare the columnar ``DealStore`` against the nested dict walk it replaced.
+
+Run from the backend directory:
+
+    python benchmarks/bench_deal_store.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deal_store import DealStore  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def dict_walk_analytics(data):
+    """The original per-request walk from ``get_sales_analytics``."""
+    sales_reps = data.get('salesReps', [])
+    total_deals = []
+    deal_status_summary = {"Closed Won": 0, "In Progress": 0, "Closed Lost": 0}
+    total_deal_value = 0
+    for rep in sales_reps:
+        for deal in rep.get('deals', []):
+            total_deals.append(deal)
+            deal_status_summary[deal['status']] += 1
+            total_deal_value += deal['value']
+    return {
+        "totalDealCount": len(total_deals),
+        "dealStatusSummary": deal_status_summary,
+        "totalDealValue": total_deal_value,
+        "averageDealValue": total_deal_value / len(total_deals) if total_deals else 0,
+        "regionDistribution": list(set(rep['region'] for rep in sales_reps)),
+    }
+
+
+def dict_walk_rollups(data):
+    """The original per-rep statistics from ``generate_sales_context``."""
+    rollups = []
+    for rep in data.get('salesReps', []):
+        rollups.append({
+            "dealCount": len(rep['deals']),
+            "totalValue": sum(deal['value'] for deal in rep['deals']),
+            "wonCount": len([d for d in rep['deals'] if d['status'] == 'Closed Won']),
+            "wonValue": sum(d['value'] for d in rep['deals'] if d['status'] == 'Closed Won'),
+        })
+    return rollups
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'deals':>10} {'build ms':>10} {'walk ms':>10} {'store ms':>10} {'speedup':>8}"
+          f" {'rollup walk':>12} {'rollup store':>13}")
+    for size in SIZES:
+        data = generate_dataset(size)
+        start = time.perf_counter()
+        store = DealStore.from_data(data)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        expected = dict_walk_analytics(data)
+        actual = store.analytics()
+        assert expected["totalDealCount"] == actual["totalDealCount"]
+        assert expected["dealStatusSummary"] == actual["dealStatusSummary"]
+        assert expected["totalDealValue"] == actual["totalDealValue"]
+        assert dict_walk_rollups(data) == store.rep_rollups()
+
+        repeat = 5 if size < 1_000_000 else 3
+        walk_ms = best_of(lambda: dict_walk_analytics(data), repeat)
+        store_ms = best_of(store.analytics, repeat)
+        rollup_walk_ms = best_of(lambda: dict_walk_rollups(data), repeat)
+        rollup_store_ms = best_of(store.rep_rollups, repeat)
+        print(f"{size:>10,} {build_ms:>10.1f} {walk_ms:>10.2f} {store_ms:>10.2f}"
+              f" {walk_ms / store_ms:>7.1f}x {rollup_walk_ms:>12.2f} {rollup_store_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
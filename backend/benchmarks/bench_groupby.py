@@ -0,0 +1,104 @@
+"""
+Grouped analytics: rollup cubes vs vectorized scan vs SQLite GROUP BY vs a
+Python loop, across dataset sizes.
+
+For every size it reports the cube build time at load, the latency of a
+query answered by a cube, one rolled up from a larger cube, one that falls
+back to the scan, and the per-write cost of keeping the cubes current.
+Run from the backend directory:
+
+    python benchmarks/bench_groupby.py [deals ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import SalesDataset  # noqa: E402
+from rollups import RollupCubes, canonical, client_industries  # noqa: E402
+from storage import SqliteStorage  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+REPEAT = 5
+WRITES = 2_000
+
+QUERIES = {
+    "region x status (cube)": ("region", "status"),
+    "industry (roll-up)": ("industry",),
+    "rep x industry (scan)": ("rep", "industry"),
+}
+
+
+def loop_group_by(data, dimensions):
+    """Baseline: one Python pass over the nested data."""
+    industries = {}
+    for rep in data['salesReps']:
+        for client in rep['clients']:
+            industries.setdefault(client['name'], client['industry'])
+    cells = {}
+    for rep in data['salesReps']:
+        for deal in rep['deals']:
+            labels = {"region": rep['region'], "status": deal['status'], "rep": rep['id'],
+                      "role": rep['role'], "industry": industries.get(deal['client'], "Unknown")}
+            key = tuple(labels[dimension] for dimension in dimensions)
+            cell = cells.get(key)
+            value = deal['value']
+            if cell is None:
+                cells[key] = [1, value, value, value]
+            else:
+                cell[0] += 1
+                cell[1] += value
+                cell[2] = min(cell[2], value)
+                cell[3] = max(cell[3], value)
+    return cells
+
+
+def timed(fn, repeat=REPEAT):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main_():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'deals':>9} {'query':<24} {'loop ms':>9} {'scan ms':>9} {'sqlite ms':>10} {'served ms':>10}")
+    for size in sizes:
+        data = generate_dataset(size)
+        dataset = SalesDataset(data)
+        build = timed(lambda: RollupCubes(dataset.store, client_industries(data['salesReps'])), repeat=1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            sqlite = SqliteStorage(os.path.join(directory, "sales.db"))
+            sqlite.import_json(generate_dataset(size))
+            for name, dimensions in QUERIES.items():
+                loop = timed(lambda: loop_group_by(data, dimensions), repeat=1)
+                scan = timed(lambda: dataset.rollups.scan(canonical(dimensions)))
+                sql = timed(lambda: sqlite.group_by(dimensions), repeat=1)
+                served = timed(lambda: dataset.group_by(dimensions))
+                print(f"{size:>9,} {name:<24} {loop * 1000:>9.1f} {scan * 1000:>9.1f}"
+                      f" {sql * 1000:>10.1f} {served * 1000:>10.3f}")
+            sqlite.close()
+
+        rep_ids = [rep['id'] for rep in data['salesReps']]
+        start = time.perf_counter()
+        for i in range(WRITES):
+            dataset.create_deal(rep_ids[i % len(rep_ids)], "Bench Client", 1000 + i, "In Progress")
+        with_cubes = (time.perf_counter() - start) / WRITES
+        cubes, dataset.rollups._cubes = dataset.rollups._cubes, {}
+        start = time.perf_counter()
+        for i in range(WRITES):
+            dataset.create_deal(rep_ids[i % len(rep_ids)], "Bench Client", 1000 + i, "In Progress")
+        without_cubes = (time.perf_counter() - start) / WRITES
+        dataset.rollups._cubes = cubes
+        print(f"{size:>9,} cube build {build * 1000:.0f} ms at load,"
+              f" write {with_cubes * 1e6:.1f} us with cubes vs {without_cubes * 1e6:.1f} us without\n")
+
+
+if __name__ == "__main__":
+    main_()
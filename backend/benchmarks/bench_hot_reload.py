@@ -0,0 +1,153 @@
+"""
+Hot reload under load: reload duration, read latency while reloading, and a
+check that no read ever observes a half-built snapshot.
+
+The data file is rewritten alternately with two datasets whose totals differ
+and reloaded repeatedly while concurrent clients read the analytics and
+group-by endpoints in-process over ASGI, and threads read the published
+snapshot directly. Every response must match one of the two datasets
+exactly, and the snapshot generation and data version seen by each client
+must never go backwards. Run from the backend directory:
+
+    python benchmarks/bench_hot_reload.py [deals]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from snapshot import DataReloader, DataSnapshot  # noqa: E402
+from storage import JsonStorage, reload_storage  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+DEALS = 100_000
+RELOADS = 6
+CONCURRENCY = 8
+THREADS = 2
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def totals(data):
+    values = [deal['value'] for rep in data['salesReps'] for deal in rep['deals']]
+    return len(values), sum(values)
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000 if len(samples) > 1 else 0.0
+
+
+async def reader(client, known, latencies, stop):
+    """Read until ``stop``; return the number of consistency violations."""
+    violations = 0
+    last_generation = last_version = -1
+    paths = ("/api/sales-analytics", "/api/analytics/groupby?by=status", "/api/data/snapshot")
+    i = 0
+    while not stop.is_set():
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        body = (await client.get(path)).json()
+        latencies.append(time.perf_counter() - start)
+        if path == "/api/sales-analytics":
+            seen = (body["totalDealCount"], body["totalDealValue"])
+        elif path.startswith("/api/analytics"):
+            seen = (sum(g["count"] for g in body["groups"]), sum(g["sum"] for g in body["groups"]))
+        else:
+            if body["generation"] < last_generation or body["dataVersion"] < last_version:
+                violations += 1
+            last_generation, last_version = body["generation"], body["dataVersion"]
+            continue
+        if seen not in known:
+            violations += 1
+    return violations
+
+
+def snapshot_reader(known, stop, violations):
+    """Read the published snapshot directly, from a plain thread."""
+    while not stop.is_set():
+        storage = main.SNAPSHOT.storage
+        analytics = storage.analytics()
+        groups = storage.group_by(["region"])["groups"]
+        seen = (analytics["totalDealCount"], analytics["totalDealValue"])
+        if seen not in known or seen != (sum(g["count"] for g in groups), sum(g["sum"] for g in groups)):
+            violations.append(seen)
+
+
+async def run(path, datasets, known):
+    reloader = DataReloader(
+        path,
+        current=lambda: main.SNAPSHOT,
+        publish=main.publish_snapshot,
+        load=lambda storage: reload_storage(storage, path),
+        warm=main.warm_snapshot,
+    )
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Idle baseline
+        idle, stop = [], asyncio.Event()
+        readers = [asyncio.create_task(reader(client, known, idle, stop)) for _ in range(CONCURRENCY)]
+        await asyncio.sleep(2.0)
+        stop.set()
+        await asyncio.gather(*readers)
+
+        # Reloading
+        busy, stop = [], asyncio.Event()
+        thread_stop, thread_violations = threading.Event(), []
+        threads = [threading.Thread(target=snapshot_reader, args=(known, thread_stop, thread_violations))
+                   for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        readers = [asyncio.create_task(reader(client, known, busy, stop)) for _ in range(CONCURRENCY)]
+        load_seconds = []
+        for i in range(RELOADS):
+            await asyncio.to_thread(write_json, path, datasets[(i + 1) % 2])
+            snapshot = await asyncio.to_thread(reloader.reload)
+            load_seconds.append(snapshot.load_seconds)
+        stop.set()
+        violations = sum(await asyncio.gather(*readers))
+        thread_stop.set()
+        for thread in threads:
+            thread.join()
+
+    return idle, busy, load_seconds, violations, len(thread_violations)
+
+
+def main_():
+    # The simulated clients all share one address; rate limits would reject most of them
+    main.RATE_LIMITER.enabled = False
+    deals = int(sys.argv[1]) if len(sys.argv) > 1 else DEALS
+    datasets = [generate_dataset(deals, seed=1), generate_dataset(deals + 1000, seed=2)]
+    known = {totals(data) for data in datasets}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.json")
+        write_json(path, datasets[0])
+        main.SNAPSHOT = DataSnapshot(JsonStorage.load(path))
+        idle, busy, load_seconds, violations, thread_violations = asyncio.run(run(path, datasets, known))
+
+    print(f"{deals:,} deals, {RELOADS} reloads, {CONCURRENCY} ASGI clients + {THREADS} snapshot threads")
+    print(f"reload (parse + build + warm): median {statistics.median(load_seconds):.2f}s, "
+          f"max {max(load_seconds):.2f}s")
+    print(f"{'read latency ms':<18} {'p50':>8} {'p95':>8} {'p99':>8} {'requests':>9}")
+    for name, samples in (("idle", idle), ("during reloads", busy)):
+        print(f"{name:<18} {percentile(samples, 50):>8.2f} {percentile(samples, 95):>8.2f}"
+              f" {percentile(samples, 99):>8.2f} {len(samples):>9}")
+    print(f"inconsistent reads: {violations} over HTTP, {thread_violations} direct")
+    if violations or thread_violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,83 @@
+"""
+Cold-start guard: import time and memory of ``import main``.
+
+Every run imports the app in a fresh interpreter with ``-X importtime`` and
+reports the cumulative import time of ``main``, its heaviest direct imports
+and the peak RSS after the import. The script exits with status 1 when
+
+- the median import time over the runs exceeds the budget, or
+- a module that must stay off the startup path (the Gemini SDK, psutil,
+  pyarrow, uvicorn) was imported, with or without a Gemini API key.
+
+The budget defaults to ``BUDGET_MS`` and can be given on the command line;
+timings vary between machines, the deferred imports do not. Run from the
+backend directory:
+
+    python benchmarks/bench_import_time.py [budget_ms]
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_MS = 1000
+RUNS = 5
+TOP = 8
+# Imported on first use (AI calls, health samples, Arrow responses) or by the launcher
+DEFERRED = ("google.generativeai", "psutil", "pyarrow", "uvicorn")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+_PROBE = "import main, resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+
+def profile(api_key):
+    """(cumulative ms of main, {direct import: cumulative ms}, imported modules, peak RSS MiB)"""
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_GEMINI_API_KEY"}
+    if api_key:
+        env["GOOGLE_GEMINI_API_KEY"] = api_key
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", _PROBE],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    # Children are listed before their parent, one level of indentation deeper
+    entries = [(int(cumulative), len(indent), name)
+               for _, cumulative, indent, name in _LINE.findall(result.stderr)]
+    main_index = next(i for i, (_, _, name) in enumerate(entries) if name == "main")
+    start = main_index
+    while start > 0 and entries[start - 1][1] > entries[main_index][1]:
+        start -= 1
+    children = {name: cumulative / 1000 for cumulative, depth, name in entries[start:main_index]
+                if depth == entries[main_index][1] + 2}
+    modules = {name for _, _, name in entries}
+    rss = int(result.stdout.strip().splitlines()[-1]) / 1024
+    return entries[main_index][0] / 1000, children, modules, rss
+
+
+def main_():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    failures = []
+    for label, api_key in (("no API key", None), ("with API key", "fake-key")):
+        runs = [profile(api_key) for _ in range(RUNS)]
+        total = statistics.median(run[0] for run in runs)
+        rss = statistics.median(run[3] for run in runs)
+        print(f"import main ({label}): {total:.0f} ms median of {RUNS} runs, peak RSS {rss:.0f} MiB")
+        children = runs[-1][1]
+        for name, ms in sorted(children.items(), key=lambda item: -item[1])[:TOP]:
+            print(f"    {name:<28} {ms:>8.1f} ms")
+        if total > budget:
+            failures.append(f"{label}: import took {total:.0f} ms, budget is {budget:.0f} ms")
+        imported = sorted(module for module in DEFERRED if module in runs[-1][2])
+        if imported:
+            failures.append(f"{label}: imported at startup: {', '.join(imported)}")
+
+    if failures:
+        print("\nCold-start budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\nWithin the cold-start budget of {budget:.0f} ms; deferred: {', '.join(DEFERRED)}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,261 @@
+"""
+Load test of the API: throughput and latency percentiles per endpoint,
+saved as JSON baselines to catch performance regressions.
+
+The app runs in-process over ASGI with its lifespan (health sampling, startup
+warmup) on a synthetic dataset of configurable scale and skew. The AI
+endpoints go through the real Gemini SDK to a local fake Gemini server
+(``fake_gemini.FakeGeminiServer``), so prompt building, the SDK's REST
+round trip and the answer cache are all measured. Each scenario is run on
+its own by ``--concurrency`` closed-loop clients for ``--rounds`` rounds of
+``--duration`` seconds; the round with the highest throughput is kept, which
+filters out most of the noise of a shared machine.
+Response bodies are read raw (compressed bodies are not decoded), so client
+work stays out of the server's numbers. HTTP parsing and the network are not
+included; ``bench_workers.py`` measures a real server.
+
+Run from the backend directory:
+
+    python benchmarks/bench_load.py --save benchmarks/baselines/load-100k.json
+    python benchmarks/bench_load.py --compare benchmarks/baselines/load-100k.json
+
+``--compare`` exits with status 1 when an endpoint's throughput dropped or its
+median latency grew by more than ``--tolerance`` (default 35%; repeated runs
+on a shared single-CPU machine still differ by up to about 25%). Tail
+latencies are reported but too noisy to gate on; re-run a flagged endpoint
+with ``--only`` before trusting a single result. Baselines are only
+comparable on the same machine with the same options.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from fake_gemini import FakeGeminiServer  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+AI_LATENCY = 0.05
+AI_CHUNK_INTERVAL = 0.005
+AI_ANSWER = "Europe leads on closed value while North America has the most open deals in progress right now."
+
+_questions = itertools.count()
+
+# (name, method, path, request body factory)
+SCENARIOS = (
+    ("analytics", "GET", "/api/sales-analytics", None),
+    ("data full", "GET", "/api/data", None),
+    ("data page", "GET", "/api/data?limit=100&fields=id,name,region", None),
+    ("sales-reps", "GET", "/api/sales-reps?region=Europe&limit=50", None),
+    ("deals top-10", "GET", "/api/deals?status=Closed%20Won&sort=-value&limit=10", None),
+    ("groupby", "GET", "/api/analytics/groupby?by=region,status", None),
+    ("health", "GET", "/health", None),
+    ("ai local", "POST", "/api/ai", lambda: {"question": "How many deals are there?"}),
+    ("ai cached", "POST", "/api/ai", lambda: {"question": "Give me a narrative summary of the team"}),
+    ("ai llm", "POST", "/api/ai",
+     lambda: {"question": f"Give me a narrative summary of the team (#{next(_questions)})"}),
+    ("ai stream", "POST", "/api/ai/stream",
+     lambda: {"question": f"Give me a narrative summary of the team (#{next(_questions)})"}),
+)
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scenario(client, method, path, body, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            request = client.build_request(method, path, json=body() if body else None)
+            start = time.perf_counter()
+            response = await client.send(request, stream=True)
+            try:
+                async for _ in response.aiter_raw():
+                    pass
+            finally:
+                await response.aclose()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_load(main, options, selected):
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        # Measure warm instances, as a load balancer would only route to ready ones
+        while main.HEALTH_MONITOR.snapshot()["status"] != "healthy":
+            await asyncio.sleep(0.05)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=60) as client:
+            for name, method, path, body in SCENARIOS:
+                if selected and name not in selected:
+                    continue
+                # One untimed request fills the response and answer caches
+                await client.request(method, path, json=body() if body else None)
+                rounds = [await run_scenario(client, method, path, body, options.concurrency, options.duration)
+                          for _ in range(options.rounds)]
+                results[name] = max(rounds, key=lambda stats: stats["throughput"])
+                stats = results[name]
+                print(f"{name:<14} {stats['requests']:>8} {stats['throughput']:>9.1f} {stats['p50_ms']:>9.2f}"
+                      f" {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['errors']:>6}")
+        warmup = main.WARMUP.status()
+    return results, warmup
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    """Print the change against a baseline; returns the regressions found."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    for option in ("deals", "skew", "concurrency", "duration", "rounds"):
+        if baseline["meta"].get(option) != results["meta"].get(option):
+            print(f"WARNING: baseline was run with {option}={baseline['meta'].get(option)}, "
+                  f"this run with {results['meta'].get(option)}")
+    if baseline["meta"].get("cpus") != results["meta"]["cpus"]:
+        print("WARNING: baseline comes from a machine with a different CPU count")
+
+    print(f"\nAgainst {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    print(f"{'endpoint':<14} {'req/s':>9} {'change':>8} {'p50 ms':>9} {'change':>8} {'p95 ms':>9} {'change':>8}")
+    regressions = []
+    for name, stats in results["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            continue
+        throughput_change = stats["throughput"] / before["throughput"] - 1
+        p50_change = stats["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        p95_change = stats["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        print(f"{name:<14} {stats['throughput']:>9.1f} {throughput_change:>+8.0%}"
+              f" {stats['p50_ms']:>9.2f} {p50_change:>+8.0%} {stats['p95_ms']:>9.2f} {p95_change:>+8.0%}")
+        if throughput_change < -tolerance:
+            regressions.append(f"{name}: throughput {throughput_change:+.0%}")
+        # Sub-millisecond latencies are too noisy to judge by ratio alone
+        if p50_change > tolerance and stats["p50_ms"] - before["p50_ms"] > 1.0:
+            regressions.append(f"{name}: median latency {p50_change:+.0%}")
+    return regressions
+
+
+def main_():
+    parser = argparse.ArgumentParser(description="In-process load test of the API")
+    parser.add_argument("--deals", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.0, help="power law exponent of the synthetic data")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per round")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds per endpoint; the best one is kept")
+    parser.add_argument("--only", nargs="*", help="scenario names to run (default: all)")
+    parser.add_argument("--save", help="write the results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="baseline to compare against; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.35)
+    options = parser.parse_args()
+
+    with FakeGeminiServer(latency=AI_LATENCY, answer=AI_ANSWER, chunk_interval=AI_CHUNK_INTERVAL) as gemini:
+        # main reads its configuration when imported
+        # Every client shares one address, so the limits are raised out of the way
+        # while their bookkeeping still runs on every request
+        os.environ.update(GOOGLE_GEMINI_API_KEY="fake-key", GEMINI_API_ENDPOINT=gemini.url,
+                          DATA_RELOAD_ENABLED="false", RATE_LIMIT_DATA_PER_MINUTE="1e9",
+                          RATE_LIMIT_DATA_BURST="1e9", RATE_LIMIT_PAGES_PER_MINUTE="1e9", RATE_LIMIT_PAGES_BURST="1e9",
+                          RATE_LIMIT_AI_PER_MINUTE="1e9", RATE_LIMIT_AI_BURST="1e9",
+                          AI_UPSTREAM_TOKENS_PER_MINUTE="1e12")
+        import main
+        from snapshot import DataSnapshot
+        from storage import JsonStorage
+
+        data = generate_dataset(options.deals, skew=options.skew)
+        start = time.perf_counter()
+        storage = JsonStorage.from_data(data)
+        load_seconds = time.perf_counter() - start
+        main.SNAPSHOT = DataSnapshot(storage, load_seconds=load_seconds)
+        context_seconds = statistics.median(
+            timed(main.generate_sales_context, storage) for _ in range(3))
+
+        print(f"{options.deals:,} deals over {storage.rep_count:,} reps (skew {options.skew}), "
+              f"{options.concurrency} clients, best of {options.rounds} x {options.duration:.0f}s per endpoint, "
+              f"fake Gemini at {AI_LATENCY * 1000:.0f} ms")
+        print(f"{'endpoint':<14} {'requests':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+        endpoints, warmup = asyncio.run(run_load(main, options, options.only))
+        upstream_calls = gemini.model.calls
+
+    results = {
+        "meta": {
+            "deals": options.deals,
+            "skew": options.skew,
+            "concurrency": options.concurrency,
+            "duration": options.duration,
+            "rounds": options.rounds,
+            "commit": git_commit(),
+            "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "startup": {
+            "load_seconds": round(load_seconds, 3),
+            "sales_context_seconds": round(context_seconds, 3),
+            "warmup": warmup,
+        },
+        "endpoints": endpoints,
+    }
+    print(f"\nload {load_seconds:.2f}s, generate_sales_context {context_seconds * 1000:.0f} ms, "
+          f"warmup {warmup.get('seconds')}s {warmup.get('steps')}, {upstream_calls} fake Gemini calls")
+
+    if options.save:
+        os.makedirs(os.path.dirname(os.path.abspath(options.save)), exist_ok=True)
+        with open(options.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {options.save}")
+    if options.compare:
+        regressions = compare(results, options.compare, options.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {options.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {options.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,79 @@
+"""
+Overhead of the metrics instrumentation.
+
+Measures the cost of single metric operations and the request throughput of
+cheap endpoints with the metrics middleware enabled and disabled. Run from
+the backend directory:
+
+    python benchmarks/bench_metrics_overhead.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from metrics import MetricsMiddleware, Registry  # noqa: E402
+
+OPERATIONS = 200_000
+REQUESTS = 2_000
+ROUNDS = 3
+PATHS = ("/livez", "/api/sales-analytics")
+
+
+def per_operation_ns(fn):
+    start = time.perf_counter()
+    for _ in range(OPERATIONS):
+        fn()
+    return (time.perf_counter() - start) / OPERATIONS * 1e9
+
+
+def find_middleware(app):
+    layer = app.middleware_stack
+    while layer is not None and not isinstance(layer, MetricsMiddleware):
+        layer = getattr(layer, "app", None)
+    return layer
+
+
+async def throughput(path):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await client.get(path)
+        return REQUESTS / (time.perf_counter() - start)
+
+
+def main_():
+    # The simulated clients all share one address; rate limits would reject most of them
+    main.RATE_LIMITER.enabled = False
+    registry = Registry()
+    counter = registry.counter("bench_total", "bench", ("route", "status"))
+    histogram = registry.histogram("bench_seconds", "bench", ("route", "status"))
+    print(f"Counter.inc        {per_operation_ns(lambda: counter.inc(route='/api/data', status=200)):8.0f} ns/op")
+    print(f"Histogram.observe  {per_operation_ns(lambda: histogram.observe(0.003, route='/api/data', status=200)):8.0f} ns/op")
+
+    asyncio.run(throughput("/livez"))
+    middleware = find_middleware(main.app)
+    print(f"{'path':<24} {'off req/s':>10} {'on req/s':>10} {'overhead':>9}")
+    for path in PATHS:
+        # Interleave rounds and keep the best of each to damp scheduler noise
+        off = on = 0.0
+        for _ in range(ROUNDS):
+            middleware.enabled = False
+            off = max(off, asyncio.run(throughput(path)))
+            middleware.enabled = True
+            on = max(on, asyncio.run(throughput(path)))
+        print(f"{path:<24} {off:>10.0f} {on:>10.0f} {(1 / on - 1 / off) * 1e6:>7.1f}us")
+    start = time.perf_counter()
+    body = main.METRICS.render()
+    print(f"/metrics render: {(time.perf_counter() - start) * 1000:.2f} ms, {len(body):,} bytes")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,74 @@
+"""
+Routing rate and latency of the local query engine over a sample question corpus.
+
+Questions the engine recognizes are answered from the columnar store; the
+rest would go to Gemini. The LLM column assumes the latency of a fake model
+round-trip. Run from the backend directory:
+
+    python benchmarks/bench_query_engine.py
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import SalesDataset  # noqa: E402
+from query_engine import QueryEngine  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+DUMMY_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dummyData.json")
+ASSUMED_LLM_LATENCY_MS = 400.0
+SIZES = (15, 10_000, 100_000, 1_000_000)
+CORPUS = (
+    "Who is the top performer in North America?",
+    "What's the total value of closed deals?",
+    "Which region has the highest number of in-progress deals?",
+    "What skills do the most successful sales reps have?",
+    "Compare the performance of sales reps in Europe vs. Asia-Pacific",
+    "What's the average deal value across all regions?",
+    "How many deals are in progress?",
+    "How many sales reps are there in Europe?",
+    "What is the total deal value in Asia Pacific?",
+    "Which rep has the most lost deals?",
+    "Which region has the lowest total value of won deals?",
+    "What is the total pipeline value?",
+    "How many deals were lost in the Middle East?",
+    "Average value of won deals in South America",
+    "Who is the best performer?",
+    "What is the total revenue?",
+    "Which region has the most deals?",
+    "Why are deals being lost in Europe?",
+    "What should we focus on next quarter?",
+    "Which clients in Finance should we prioritise?",
+)
+
+
+def main():
+    print(f"{len(CORPUS)} questions; assumed LLM round-trip {ASSUMED_LLM_LATENCY_MS:.0f} ms")
+    print(f"{'deals':>10} {'routed':>7} {'median us':>10} {'max us':>10} {'mean ms/question':>17} {'all-LLM ms':>11}")
+    for size in SIZES:
+        if size == 15:
+            with open(DUMMY_DATA_PATH) as f:
+                data = json.load(f)
+        else:
+            data = generate_dataset(size)
+        engine = QueryEngine(SalesDataset(data).store)
+        timings = []
+        routed = 0
+        for question in CORPUS:
+            start = time.perf_counter()
+            answer = engine.answer(question)
+            elapsed = (time.perf_counter() - start) * 1e6
+            if answer is not None:
+                routed += 1
+                timings.append(elapsed)
+        mixed_ms = (sum(timings) / 1000 + (len(CORPUS) - routed) * ASSUMED_LLM_LATENCY_MS) / len(CORPUS)
+        print(f"{size:>10,} {routed / len(CORPUS):>6.0%} {statistics.median(timings):>10.1f} {max(timings):>10.1f}"
+              f" {mixed_ms:>17.1f} {ASSUMED_LLM_LATENCY_MS:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
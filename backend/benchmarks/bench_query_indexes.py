@@ -0,0 +1,81 @@
+"""
+Filtered rep/deal queries: secondary indexes vs a full walk of the data.
+
+Run from the backend directory:
+
+    python benchmarks/bench_query_indexes.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import SalesDataset  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+SIZES = (100_000, 1_000_000)
+REPEAT = 5
+
+QUERIES = {
+    "reps in Europe": ("reps", dict(region="Europe", limit=1000)),
+    "reps with skill crm": ("reps", dict(skill="crm", limit=1000)),
+    "reps page 50 by name": ("reps", dict(sort="name", start=4900, limit=100)),
+    "top 10 Closed Won": ("deals", dict(status="Closed Won", sort="-value", limit=10)),
+    "top 10 in Middle East": ("deals", dict(region="Middle East", sort="-value", limit=10)),
+    "deals of rep 42": ("deals", dict(rep_id=42, sort="id", limit=100)),
+    "100 deals >= 240k by id": ("deals", dict(min_value=240_000, sort="id", limit=100)),
+    "latest 100 deals": ("deals", dict(sort="-id", limit=100)),
+}
+
+
+def walk_reps(dataset, region=None, skill=None, sort="id", start=0, limit=100):
+    reps = [
+        rep for rep in dataset.data['salesReps']
+        if (region is None or rep['region'] == region)
+        and (skill is None or skill.casefold() in (s.casefold() for s in rep['skills']))
+    ]
+    field = sort.lstrip("-")
+    return sorted(reps, key=lambda rep: rep[field], reverse=sort.startswith("-"))[start:start + limit]
+
+
+def walk_deals(dataset, status=None, region=None, rep_id=None, min_value=None, sort="-value", limit=100):
+    deals = []
+    for rep in dataset.data['salesReps']:
+        if (region is not None and rep['region'] != region) or (rep_id is not None and rep['id'] != rep_id):
+            continue
+        for deal in rep['deals']:
+            if status is not None and deal['status'] != status:
+                continue
+            if min_value is not None and deal['value'] < min_value:
+                continue
+            deals.append(deal)
+    key = (lambda deal: (deal['value'], deal['id'])) if sort.lstrip("-") == "value" else (lambda deal: deal['id'])
+    return sorted(deals, key=key, reverse=sort.startswith("-"))[:limit]
+
+
+def timed(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main_():
+    print(f"{'deals':>9} {'query':<26} {'walk ms':>9} {'index ms':>9} {'speedup':>8}")
+    for size in SIZES:
+        dataset = SalesDataset(generate_dataset(size))
+        for name, (kind, params) in QUERIES.items():
+            if kind == "reps":
+                walk = timed(lambda: walk_reps(dataset, **params))
+                indexed = timed(lambda: dataset.query_reps(**params))
+            else:
+                walk = timed(lambda: walk_deals(dataset, **params))
+                indexed = timed(lambda: dataset.query_deals(**params))
+            print(f"{size:>9,} {name:<26} {walk * 1000:>9.2f} {indexed * 1000:>9.3f} {walk / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main_()
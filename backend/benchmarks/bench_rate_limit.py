@@ -0,0 +1,102 @@
+"""
+Overhead of the rate limiter.
+
+Measures the cost of one bucket check in the in-memory and the shared
+(memory-mapped file) store, for one hot client and for many distinct ones,
+the throughput of the shared store when several processes check at once, and
+the request throughput of a data and an AI endpoint with the limiter disabled
+and enabled over each store. Limits are raised so that no request is
+rejected. Run from the backend directory:
+
+    python benchmarks/bench_rate_limit.py
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from rate_limit import MemoryBucketStore, SharedBucketStore  # noqa: E402
+
+OPERATIONS = 100_000
+CLIENTS = 10_000
+PROCESSES = (1, 2, 4)
+REQUESTS = 2_000
+ROUNDS = 3
+UNLIMITED = (1e12, 1e12)
+PATHS = (("GET", "/api/sales-analytics", None), ("POST", "/api/ai", {"question": "How many deals are there?"}))
+
+
+def per_operation_ns(store, keys):
+    now = time.time()
+    start = time.perf_counter()
+    for i in range(OPERATIONS):
+        store.take(keys[i % len(keys)], 1e12, 1e10, 1, now)
+    return (time.perf_counter() - start) / OPERATIONS * 1e9
+
+
+def shared_worker(path):
+    store = SharedBucketStore(path)
+    keys = [f"data:ip:10.0.{i // 256}.{i % 256}" for i in range(CLIENTS)]
+    return per_operation_ns(store, keys)
+
+
+def shared_throughput(path, processes):
+    """Checks per second of all processes together"""
+    with multiprocessing.Pool(processes) as pool:
+        times = pool.map(shared_worker, [path] * processes)
+    return sum(1e9 / ns for ns in times)
+
+
+async def throughput(method, path, body):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.request(method, path, json=body)
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            response = await client.request(method, path, json=body)
+        assert response.status_code == 200, response.status_code
+        return REQUESTS / (time.perf_counter() - start)
+
+
+def main_():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.ratelimit")
+        stores = (("memory", MemoryBucketStore()), ("shared", SharedBucketStore(path)))
+        many = [f"data:ip:10.0.{i // 256}.{i % 256}" for i in range(CLIENTS)]
+        print(f"{'store':<8} {'1 client ns':>12} {f'{CLIENTS:,} clients ns':>17}")
+        for name, store in stores:
+            print(f"{name:<8} {per_operation_ns(store, ['data:ip:127.0.0.1']):>12.0f} {per_operation_ns(store, many):>17.0f}")
+
+        print(f"\nshared store, {CLIENTS:,} clients, processes checking at once:")
+        for processes in PROCESSES:
+            if processes > (os.cpu_count() or 1):
+                print(f"  {processes} processes: skipped, only {os.cpu_count()} CPUs")
+                continue
+            print(f"  {processes} processes: {shared_throughput(path, processes):>12,.0f} checks/s")
+
+        main.RATE_LIMITER.budgets.update(data=UNLIMITED, pages=UNLIMITED, ai=UNLIMITED, upstream=UNLIMITED)
+        print(f"\n{'request':<28} {'off req/s':>10} {'memory':>10} {'shared':>10} {'overhead':>18}")
+        for method, request_path, body in PATHS:
+            # Interleave rounds and keep the best of each to damp scheduler noise
+            best = {"off": 0.0, "memory": 0.0, "shared": 0.0}
+            for _ in range(ROUNDS):
+                main.RATE_LIMITER.enabled = False
+                best["off"] = max(best["off"], asyncio.run(throughput(method, request_path, body)))
+                main.RATE_LIMITER.enabled = True
+                for name, store in stores:
+                    main.RATE_LIMITER.store = store
+                    best[name] = max(best[name], asyncio.run(throughput(method, request_path, body)))
+            overhead = "/".join(f"{(1 / best[name] - 1 / best['off']) * 1e6:.1f}" for name, _ in stores)
+            print(f"{method + ' ' + request_path:<28} {best['off']:>10.0f} {best['memory']:>10.0f}"
+                  f" {best['shared']:>10.0f} {overhead + ' us':>18}")
+
+
+if __name__ == "__main__":
+    main_()
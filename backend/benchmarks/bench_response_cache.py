@@ -0,0 +1,67 @@
+"""
+Requests per second of the read endpoints with and without the response cache.
+
+Concurrent clients hammer the app in-process over ASGI for a fixed duration.
+Run from the backend directory:
+
+    python benchmarks/bench_response_cache.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from snapshot import DataSnapshot  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+DEALS = 20_000
+CONCURRENCY = 16
+DURATION = 3.0
+PATHS = ("/api/sales-analytics", "/api/data", "/api/data?limit=50&fields=id,name,region")
+
+
+async def run_load(path, conditional):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get(path)
+        headers = {"If-None-Match": first.headers["etag"]} if conditional else {}
+        deadline = time.perf_counter() + DURATION
+        counts = []
+
+        async def worker():
+            done = 0
+            while time.perf_counter() < deadline:
+                response = await client.get(path, headers=headers)
+                assert response.status_code in (200, 304)
+                done += 1
+            counts.append(done)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return sum(counts) / (time.perf_counter() - start)
+
+
+def main_():
+    # The simulated clients all share one address; rate limits would reject most of them
+    main.RATE_LIMITER.enabled = False
+    data = generate_dataset(DEALS)
+    main.SNAPSHOT = DataSnapshot(JsonStorage.from_data(data))
+    print(f"{DEALS:,} deals, {CONCURRENCY} concurrent clients, {DURATION:.0f}s per run")
+    print(f"{'path':<45} {'no cache':>10} {'cache':>10} {'cache+304':>10}")
+    for path in PATHS:
+        main.RESPONSE_CACHE.enabled = False
+        uncached = asyncio.run(run_load(path, conditional=False))
+        main.RESPONSE_CACHE.enabled = True
+        cached = asyncio.run(run_load(path, conditional=False))
+        revalidated = asyncio.run(run_load(path, conditional=True))
+        print(f"{path:<45} {uncached:>10.1f} {cached:>10.1f} {revalidated:>10.1f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,106 @@
+"""
+Payload size and serialization time of the negotiated response formats.
+
+Every read payload is encoded as JSON, MessagePack and Arrow IPC, each
+uncompressed and with gzip and brotli at the levels the server uses. Encode
+time is what a cache miss costs the server (paid once per data version),
+decode time what the client pays on every response. The last table requests
+``/api/data`` through the app twice per representation to show the cached
+response (its time includes httpx decompressing the body; Arrow decode time
+is the zero-copy read of the stream into a table). Run from the backend
+directory:
+
+    python benchmarks/bench_response_encoding.py [deals]
+"""
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import brotli  # noqa: E402
+import httpx  # noqa: E402
+import msgpack  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+import main  # noqa: E402
+from content_negotiation import ARROW, FORMAT_NAMES, JSON, MSGPACK, compress, encode  # noqa: E402
+from snapshot import DataSnapshot  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+DEALS = 100_000
+REPEATS = 5
+LEVELS = {"gzip": main.RESPONSE_CACHE.compression_levels["gzip"], "br": main.RESPONSE_CACHE.compression_levels["br"]}
+DECODERS = {
+    JSON: json.loads,
+    MSGPACK: msgpack.unpackb,
+    ARROW: lambda body: pa.ipc.open_stream(body).read_all(),
+}
+DECOMPRESSORS = {"identity": lambda body: body, "gzip": gzip.decompress, "br": brotli.decompress}
+
+
+def timed(function, *args):
+    """(result, median seconds over ``REPEATS`` runs)"""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def report(label, payload):
+    print(f"\n{label}")
+    print(f"{'format':<14} {'bytes':>12} {'vs json':>8} {'encode ms':>10} {'decode ms':>10}")
+    json_size = None
+    for media_type in (JSON, MSGPACK, ARROW):
+        body, encode_seconds = timed(encode, payload, media_type)
+        json_size = json_size or len(body)
+        for coding in ("identity", "gzip", "br"):
+            if coding == "identity":
+                encoded, seconds = body, encode_seconds
+            else:
+                encoded, seconds = timed(compress, body, coding, LEVELS[coding])
+            _, decode_seconds = timed(lambda: DECODERS[media_type](DECOMPRESSORS[coding](encoded)))
+            name = FORMAT_NAMES[media_type] + ("" if coding == "identity" else "+" + coding)
+            print(f"{name:<14} {len(encoded):>12,} {len(encoded) / json_size:>8.2f}"
+                  f" {seconds * 1000:>10.1f} {decode_seconds * 1000:>10.1f}")
+
+
+async def cached_requests():
+    print("\n/api/data through the app: first request encodes, second is served from the cache")
+    print(f"{'format':<14} {'first ms':>10} {'cached ms':>10}")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for media_type in (JSON, MSGPACK, ARROW):
+            for coding in ("identity", "gzip", "br"):
+                headers = {"Accept": media_type, "Accept-Encoding": coding}
+                times = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    response = await client.get("/api/data", headers=headers)
+                    times.append(time.perf_counter() - start)
+                    assert response.headers["content-type"] == media_type
+                name = FORMAT_NAMES[media_type] + ("" if coding == "identity" else "+" + coding)
+                print(f"{name:<14} {times[0] * 1000:>10.1f} {times[1] * 1000:>10.1f}")
+
+
+def main_():
+    deals = int(sys.argv[1]) if len(sys.argv) > 1 else DEALS
+    storage = JsonStorage.from_data(generate_dataset(deals))
+    main.SNAPSHOT = DataSnapshot(storage)
+    print(f"{deals:,} deals, median of {REPEATS} runs, gzip level {LEVELS['gzip']}, brotli quality {LEVELS['br']}")
+    report("/api/data (full dataset)", storage.load_data())
+    report("/api/deals?limit=1000", {"deals": storage.query_deals(limit=1000)})
+    report("/api/analytics/groupby?by=rep,status", storage.group_by(["rep", "status"]))
+    report("/api/sales-analytics", storage.analytics())
+    asyncio.run(cached_requests())
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,60 @@
+"""
+Prompt size and end-to-end latency: full sales context vs retrieval context.
+
+The fake Gemini model charges a fixed latency plus a per-prompt-token cost,
+roughly like a hosted model's prefill time. Run from the backend directory:
+
+    python benchmarks/bench_retrieval_context.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from ai_client import GeminiClient  # noqa: E402
+from fake_gemini import FakeGenerativeModel  # noqa: E402
+from snapshot import DataSnapshot  # noqa: E402
+from storage import JsonStorage  # noqa: E402
+from retrieval import estimate_tokens  # noqa: E402
+from synthetic import generate_dataset  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+QUESTIONS = (
+    "How is Rep 42 performing compared to the rest of Europe?",
+    "Which clients in the Finance industry have open deals?",
+    "What skills do the most successful reps in Asia-Pacific have?",
+)
+
+
+def use_dataset(data):
+    # A new snapshot starts without a retriever or full context
+    main.SNAPSHOT = DataSnapshot(JsonStorage.from_data(data))
+
+
+async def end_to_end(question):
+    client = GeminiClient(model_factory=lambda: FakeGenerativeModel(latency=0.05, latency_per_token=0.00002))
+    start = time.perf_counter()
+    prompt = await asyncio.to_thread(main.build_ai_prompt, question, main.SNAPSHOT)
+    await client.generate(prompt)
+    return estimate_tokens(prompt), (time.perf_counter() - start) * 1000
+
+
+def main_():
+    print(f"{'deals':>8} {'mode':>10} {'prompt tokens':>14} {'latency ms':>11}")
+    for size in SIZES:
+        use_dataset(generate_dataset(size))
+        for mode in ("full", "retrieval"):
+            main.AI_CONTEXT_MODE = mode
+            # Warm up: build the full context / retrieval index once
+            main.build_ai_prompt(QUESTIONS[0], main.SNAPSHOT)
+            results = [asyncio.run(end_to_end(question)) for question in QUESTIONS]
+            tokens = sum(r[0] for r in results) / len(results)
+            latency = sum(r[1] for r in results) / len(results)
+            print(f"{size:>8,} {mode:>10} {tokens:>14,.0f} {latency:>11.1f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,102 @@
+"""
+Startup time, memory and query latency of the JSON and SQLite backends.
+
+Each backend is measured in a fresh subprocess so the RSS numbers are not
+polluted by the generator or by the other backend. The first SQLite start
+includes the one-time import of the JSON file; the second one opens the
+existing database. Run from the backend directory:
+
+    python benchmarks/bench_storage_backends.py [deals]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEALS = 1_000_000
+REPEAT = 20
+
+
+def child(backend, data_path, sqlite_path):
+    """Open a backend, then report startup time, RSS and query latencies as JSON."""
+    import psutil
+
+    from storage import open_storage
+
+    start = time.perf_counter()
+    storage = open_storage(backend, data_path, sqlite_path=sqlite_path)
+    startup = time.perf_counter() - start
+    rss = psutil.Process().memory_info().rss
+
+    # The SQLite backend aggregates in SQL on the first read, then keeps running totals
+    start = time.perf_counter()
+    storage.analytics()
+    latencies = {"analytics (first)": time.perf_counter() - start}
+
+    middle = storage.rep_count // 2
+    deal_id = storage.create_deal(1, "Bench Client", 1000, "In Progress")["id"]
+    queries = {
+        "analytics (warm)": lambda: storage.analytics(),
+        "page of 100 reps": lambda: list(storage.iter_reps(middle, 100)),
+        "page of 100 (id,name,region)": lambda: list(storage.iter_reps(middle, 100, ["id", "name", "region"])),
+        "get deal": lambda: storage.get_deal(deal_id),
+        "update deal": lambda: storage.update_deal(deal_id, "Bench Client", 2000, "Closed Won"),
+    }
+    for name, query in queries.items():
+        samples = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            query()
+            samples.append(time.perf_counter() - start)
+        latencies[name] = statistics.median(samples)
+    storage.delete_deal(deal_id)
+    storage.close()
+    print(json.dumps({"startup": startup, "rss": rss, "latencies": latencies}))
+
+
+def run_child(backend, data_path, sqlite_path):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", backend, data_path, sqlite_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main_():
+    from synthetic import generate_dataset
+
+    deals = int(sys.argv[1]) if len(sys.argv) > 1 else DEALS
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, "data.json")
+        sqlite_path = os.path.join(directory, "sales.db")
+        with open(data_path, "w") as f:
+            json.dump(generate_dataset(deals), f)
+        print(f"{deals:,} deals, JSON file {os.path.getsize(data_path) / 1e6:.0f} MB")
+
+        results = {
+            "json": run_child("json", data_path, sqlite_path),
+            "sqlite (import)": run_child("sqlite", data_path, sqlite_path),
+            "sqlite": run_child("sqlite", data_path, sqlite_path),
+        }
+        print(f"SQLite file {os.path.getsize(sqlite_path) / 1e6:.0f} MB\n")
+
+    print(f"{'backend':<16} {'startup s':>10} {'RSS MB':>8}")
+    for name, result in results.items():
+        print(f"{name:<16} {result['startup']:>10.2f} {result['rss'] / 1e6:>8.0f}")
+
+    print(f"\n{'query (median ms)':<30} {'json':>10} {'sqlite':>10}")
+    for query in results["json"]["latencies"]:
+        print(f"{query:<30} {results['json']['latencies'][query] * 1000:>10.3f}"
+              f" {results['sqlite']['latencies'][query] * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:5])
+    else:
+        main_()
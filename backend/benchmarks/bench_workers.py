@@ -0,0 +1,157 @@
+"""
+Throughput and total memory of the server at 1, 2, 4 and 8 worker processes.
+
+Two launch modes are compared on the same data file:
+
+- ``json``: ``uvicorn main:app --workers N``, every worker parses the JSON
+  file and holds its own copy of the data and derived structures
+- ``mmap``: ``server.py``, the supervisor writes one columnar snapshot file
+  and every worker maps it read-only
+
+Each server is started as a real process tree and loaded over HTTP by
+concurrent keep-alive clients for a fixed duration. Memory is summed over the
+supervisor and its workers: RSS counts the shared mapped pages once per
+process, PSS splits them between the processes that map them (the honest
+total). On a machine with fewer cores than workers the throughput cannot
+scale and the load generator competes for the same CPU.
+Run from the backend directory:
+
+    python benchmarks/bench_workers.py [deals]
+"""
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import psutil
+
+from synthetic import generate_dataset
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEALS = 100_000
+WORKERS = (1, 2, 4, 8)
+CONCURRENCY = 32
+DURATION = 5.0
+PATHS = (
+    "/api/sales-analytics",
+    "/api/analytics/groupby?by=region,status",
+    "/api/deals?status=Closed%20Won&sort=-value&limit=10",
+    "/api/sales-reps?region=Europe&limit=20&fields=id,name",
+    "/api/data?limit=20",
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(mode, workers, data_path, directory, port):
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_GEMINI_API_KEY"}
+    env.update(DATA_PATH=data_path, DATA_RELOAD_ENABLED="false", RATE_LIMIT_ENABLED="false", PORT=str(port),
+               LOG_LEVEL="warning")
+    if mode == "json":
+        env["STORAGE_BACKEND"] = "json"
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning"]
+    else:
+        env.update(SERVER_WORKERS=str(workers), SHARED_SNAPSHOT_PATH=os.path.join(directory, "sales.snapshot"))
+        command = [sys.executable, "server.py"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url, workers, timeout=600):
+    """Wait until every worker has answered (a new connection per probe)."""
+    seen = set()
+    deadline = time.monotonic() + timeout
+    while len(seen) < workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"only {len(seen)} of {workers} workers came up")
+        try:
+            response = httpx.get(base_url + "/api/data/snapshot", headers={"Connection": "close"}, timeout=5)
+            seen.add(response.json()["worker"])
+        except (httpx.HTTPError, ValueError, KeyError):
+            time.sleep(0.5)
+
+
+async def load(base_url):
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Warm every worker's response cache before measuring
+        await asyncio.gather(*(client.get(path) for path in PATHS for _ in range(CONCURRENCY // len(PATHS) + 1)))
+        deadline = time.perf_counter() + DURATION
+        counts = []
+
+        async def worker(offset):
+            done = 0
+            while time.perf_counter() < deadline:
+                response = await client.get(PATHS[(offset + done) % len(PATHS)])
+                assert response.status_code == 200, response.status_code
+                done += 1
+            counts.append(done)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(CONCURRENCY)))
+        return sum(counts) / (time.perf_counter() - started)
+
+
+def memory(pid):
+    """(RSS, PSS) in MiB summed over ``pid`` and all of its children."""
+    rss = pss = 0
+    root = psutil.Process(pid)
+    for process in [root] + root.children(recursive=True):
+        try:
+            info = process.memory_full_info()
+        except psutil.NoSuchProcess:
+            continue
+        rss += info.rss
+        pss += getattr(info, "pss", info.rss)
+    return rss / 2**20, pss / 2**20
+
+
+def stop(process):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        for child in psutil.Process(process.pid).children(recursive=True):
+            child.kill()
+        process.kill()
+        process.wait()
+
+
+def main_():
+    deals = int(sys.argv[1]) if len(sys.argv) > 1 else DEALS
+    print(f"{deals:,} deals, {CONCURRENCY} keep-alive clients, {DURATION:.0f}s per run, {os.cpu_count()} CPU(s)")
+    print(f"{'mode':<6} {'workers':>7} {'startup s':>10} {'req/s':>9} {'RSS MiB':>9} {'PSS MiB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, "data.json")
+        with open(data_path, "w") as f:
+            json.dump(generate_dataset(deals), f)
+        for mode in ("json", "mmap"):
+            for workers in WORKERS:
+                port = free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                started = time.perf_counter()
+                process = start(mode, workers, data_path, directory, port)
+                try:
+                    wait_ready(base_url, workers)
+                    startup = time.perf_counter() - started
+                    throughput = asyncio.run(load(base_url))
+                    rss, pss = memory(process.pid)
+                finally:
+                    stop(process)
+                print(f"{mode:<6} {workers:>7} {startup:>10.1f} {throughput:>9.0f} {rss:>9.0f} {pss:>9.0f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,191 @@
+"""
+Local stand-ins for Gemini with injected latency.
+
+Lets the benchmarks exercise the AI code paths without network access or an
+API key:
+
+- ``FakeGenerativeModel`` replaces ``google.generativeai.GenerativeModel``
+  in-process. ``stream=True`` yields the answer word by word like the SDK's
+  streaming generation, and counts streams that were closed before the end.
+- ``FakeGeminiServer`` is a local HTTP server speaking the REST API the SDK
+  uses (``generateContent``, ``streamGenerateContent`` and ``countTokens``),
+  so the real SDK, its serialization and the HTTP round trip are part of the
+  measurement. Point the app at it with ``GEMINI_API_ENDPOINT``.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Answers every prompt after ``latency`` seconds, plus
+    ``latency_per_token`` seconds for every (estimated) prompt token. Streams
+    deliver the first word after the same delay and every further word
+    ``chunk_interval`` seconds later (non-streaming calls wait for all of them).
+    """
+
+    def __init__(self, latency=0.3, answer="This is a canned answer from the fake Gemini model.",
+                 latency_per_token=0.0, chunk_interval=0.0):
+        self.latency = latency
+        self.answer = answer
+        self.latency_per_token = latency_per_token
+        self.chunk_interval = chunk_interval
+        self.calls = 0
+        self.cancelled_streams = 0
+        self.chunks_sent = 0
+
+    def _chunks(self):
+        words = self.answer.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    def _delay(self, prompt):
+        return self.latency + self.latency_per_token * len(prompt) / 4
+
+    def _total_delay(self, prompt):
+        return self._delay(prompt) + self.chunk_interval * (len(self._chunks()) - 1)
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        # Blocking variant, like the synchronous SDK call
+        self.calls += 1
+        if stream:
+            return self._stream_blocking(prompt)
+        time.sleep(self._total_delay(prompt))
+        return FakeResponse(self.answer)
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        self.calls += 1
+        if stream:
+            return self._stream_async(prompt)
+        await asyncio.sleep(self._total_delay(prompt))
+        return FakeResponse(self.answer)
+
+    def _stream_blocking(self, prompt):
+        chunks = self._chunks()
+        finished = False
+        try:
+            for i, text in enumerate(chunks):
+                time.sleep(self._delay(prompt) if i == 0 else self.chunk_interval)
+                self.chunks_sent += 1
+                yield FakeResponse(text)
+            finished = True
+        finally:
+            if not finished:
+                self.cancelled_streams += 1
+
+    async def _stream_async(self, prompt):
+        chunks = self._chunks()
+        finished = False
+        try:
+            for i, text in enumerate(chunks):
+                await asyncio.sleep(self._delay(prompt) if i == 0 else self.chunk_interval)
+                self.chunks_sent += 1
+                yield FakeResponse(text)
+            finished = True
+        finally:
+            if not finished:
+                self.cancelled_streams += 1
+
+    def count_tokens(self, text):
+        return len(text.split())
+
+
+class _GeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = "".join(part.get("text", "") for content in request.get("contents", [])
+                         for part in content.get("parts", []))
+        model = self.server.model
+        model.calls += 1
+        method = self.path.split("?")[0].rsplit(":", 1)[-1]
+        if method == "countTokens":
+            self._send_json({"totalTokens": model.count_tokens(prompt)})
+        elif method == "generateContent":
+            time.sleep(model._total_delay(prompt))
+            self._send_json(_candidate(model.answer, finished=True))
+        elif method == "streamGenerateContent":
+            self._stream(model, prompt)
+        else:
+            self.send_error(404)
+
+    def _stream(self, model, prompt):
+        # The REST transport streams one JSON array, parsed element by element
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        chunks = model._chunks()
+        try:
+            self.wfile.write(b"[")
+            for i, text in enumerate(chunks):
+                time.sleep(model._delay(prompt) if i == 0 else model.chunk_interval)
+                element = json.dumps(_candidate(text, finished=i == len(chunks) - 1))
+                self.wfile.write((element if i == 0 else "," + element).encode())
+                self.wfile.flush()
+                model.chunks_sent += 1
+            self.wfile.write(b"]")
+        except (BrokenPipeError, ConnectionResetError):
+            model.cancelled_streams += 1
+        self.close_connection = True
+
+
+def _candidate(text, finished):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+class FakeGeminiServer:
+    """
+    ``FakeGenerativeModel``'s behaviour served over HTTP on 127.0.0.1 from a
+    background thread. Use as a context manager; ``url`` is the API endpoint.
+    """
+
+    def __init__(self, latency=0.3, answer="This is a canned answer from the fake Gemini model.",
+                 latency_per_token=0.0, chunk_interval=0.0, port=0):
+        self.model = FakeGenerativeModel(latency=latency, answer=answer,
+                                         latency_per_token=latency_per_token, chunk_interval=chunk_interval)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _GeminiHandler)
+        self._server.daemon_threads = True
+        self._server.model = self.model
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,125 @@
+"""
+Synthetic dataset generator following the ``dummyData.json`` schema.
+
+Used by the benchmarks to exercise the API at realistic sizes, and to write
+data files for running the server at scale:
+
+    python benchmarks/synthetic.py 1000000 --skew 1.0 -o big.json
+    DATA_PATH=big.json python main.py
+"""
+import argparse
+import json
+import random
+
+REGIONS = ["North America", "Europe", "Asia-Pacific", "South America", "Middle East"]
+ROLES = [
+    "Sales Representative",
+    "Senior Sales Executive",
+    "Account Manager",
+    "Business Development Manager",
+    "Regional Sales Manager",
+]
+SKILLS = [
+    "Negotiation", "CRM", "Client Relations", "Lead Generation", "Presentation",
+    "Customer Service", "Sales Strategy", "Data Analysis", "Strategic Partnerships",
+    "Market Analysis", "Relationship Building", "Communication",
+]
+INDUSTRIES = ["Manufacturing", "Retail", "Tech", "Finance", "Healthcare", "Energy", "Logistics"]
+STATUSES = ["Closed Won", "In Progress", "Closed Lost"]
+
+# Largest deal value of skewed datasets
+MAX_SKEWED_VALUE = 10_000_000
+
+
+def _zipf_weights(n, skew):
+    return [(rank + 1) ** -skew for rank in range(n)]
+
+
+def _deal_counts(n_deals, n_reps, deals_per_rep, skew):
+    """Deals per rep: ``deals_per_rep`` each, or Zipf distributed when skewed."""
+    if not skew:
+        counts = []
+        remaining = n_deals
+        for _ in range(n_reps):
+            counts.append(min(deals_per_rep, remaining))
+            remaining -= counts[-1]
+        return counts
+    weights = _zipf_weights(n_reps, skew)
+    total = sum(weights)
+    counts = [int(n_deals * weight / total) for weight in weights]
+    for rank in range(n_deals - sum(counts)):
+        counts[rank % n_reps] += 1
+    return counts
+
+
+def generate_dataset(n_deals, deals_per_rep=50, clients_per_rep=5, seed=42, skew=0.0):
+    """
+    Return a ``{"salesReps": [...]}`` dict holding ``n_deals`` deals in total,
+    over ``ceil(n_deals / deals_per_rep)`` reps.
+
+    With ``skew`` 0 every rep has ``deals_per_rep`` deals spread evenly over
+    its clients, regions are uniform and values uniform between 5k and 250k.
+    A positive ``skew`` is used as the exponent of power laws, like real
+    sales data: deals per rep (rep 1 owns the most, the tail may own none),
+    reps per region and deals per client follow Zipf weights, and values are
+    Pareto distributed from 5k (the larger the skew, the heavier the tail).
+    """
+    rng = random.Random(seed)
+    n_reps = max(1, -(-n_deals // deals_per_rep))
+    counts = _deal_counts(n_deals, n_reps, deals_per_rep, skew)
+    region_weights = _zipf_weights(len(REGIONS), skew) if skew else None
+    client_weights = _zipf_weights(clients_per_rep, skew) if skew else None
+
+    def deal_value():
+        if not skew:
+            return rng.randrange(5_000, 250_000, 500)
+        value = 5_000 * rng.paretovariate(1 + 1 / skew)
+        return min(MAX_SKEWED_VALUE, int(round(value / 500)) * 500)
+
+    reps = []
+    for rep_id, count in zip(range(1, n_reps + 1), counts):
+        clients = [
+            {
+                "name": f"Client {rep_id}-{c}",
+                "industry": rng.choice(INDUSTRIES),
+                "contact": f"contact{c}@client{rep_id}.example.com",
+            }
+            for c in range(clients_per_rep)
+        ]
+        deals = [
+            {
+                "client": (rng.choices(clients, weights=client_weights)[0] if skew else rng.choice(clients))["name"],
+                "value": deal_value(),
+                "status": rng.choice(STATUSES),
+            }
+            for _ in range(count)
+        ]
+        reps.append({
+            "id": rep_id,
+            "name": f"Rep {rep_id}",
+            "role": rng.choice(ROLES),
+            "region": rng.choices(REGIONS, weights=region_weights)[0] if skew else rng.choice(REGIONS),
+            "skills": rng.sample(SKILLS, 3),
+            "deals": deals,
+            "clients": clients,
+        })
+    return {"salesReps": reps}
+
+
+def main_():
+    parser = argparse.ArgumentParser(description="Write a synthetic sales data file")
+    parser.add_argument("deals", type=int, help="total number of deals")
+    parser.add_argument("--deals-per-rep", type=int, default=50)
+    parser.add_argument("--clients-per-rep", type=int, default=5)
+    parser.add_argument("--skew", type=float, default=0.0, help="power law exponent; 0 for uniform data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", required=True, help="path of the JSON file to write")
+    args = parser.parse_args()
+    data = generate_dataset(args.deals, args.deals_per_rep, args.clients_per_rep, args.seed, args.skew)
+    with open(args.output, "w") as f:
+        json.dump(data, f)
+    print(f"Wrote {args.deals:,} deals over {len(data['salesReps']):,} reps to {args.output}")
+
+
+if __name__ == "__main__":
+    main_()
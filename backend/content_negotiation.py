@@ -0,0 +1,184 @@
+"""
+Response formats and compression chosen from the request's Accept headers.
+
+Read endpoints build a plain payload (dicts, lists, numbers and strings) that
+can be served as:
+
+- ``application/json`` (the default, for browsers and ``*/*``),
+- ``application/msgpack``: MessagePack, the same structure in a compact
+  binary encoding (requires ``msgpack``),
+- ``application/vnd.apache.arrow.stream``: an Arrow IPC stream with one row
+  per record of the payload's list (``salesReps``, ``deals``, ``groups``),
+  for bulk export into dataframes (requires ``pyarrow``, imported on first
+  use).
+
+Any of them can additionally be compressed with ``br`` (requires ``brotli``)
+or ``gzip`` when the client accepts it and the body is large enough to be
+worth it. Optional libraries that are not installed simply drop their format
+from the negotiation.
+"""
+import gzip
+import importlib.util
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+IDENTITY = "identity"
+
+# Short names used in metrics and benchmarks
+FORMAT_NAMES = {JSON: "json", MSGPACK: "msgpack", ARROW: "arrow"}
+
+# Media ranges that select a format besides its own media type
+_ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+
+
+def encode_json(payload: Any) -> bytes:
+    """Encode ``payload`` as compact UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def encode_msgpack(payload: Any) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def _table_parts(payload: Any) -> Tuple[List[Dict[str, Any]], Dict[str, bytes]]:
+    """
+    Rows and schema metadata of the Arrow table for ``payload``.
+
+    The first list of records in the payload becomes the table; the
+    remaining top-level fields (``nextCursor``, ``dimensions``, ...) are kept
+    as JSON encoded schema metadata. Any other payload (the analytics
+    totals) is a single row.
+    """
+    if isinstance(payload, dict):
+        for name, value in payload.items():
+            if isinstance(value, list) and (not value or isinstance(value[0], dict)):
+                metadata = {key: encode_json(other) for key, other in payload.items() if key != name}
+                return value, {"records": name.encode(), **metadata}
+    return [payload], {}
+
+
+def encode_arrow(payload: Any) -> bytes:
+    import pyarrow as pa
+
+    rows, metadata = _table_parts(payload)
+    table = pa.Table.from_pylist(rows).replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# Encoders of the available formats, in order of preference on ties
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {JSON: encode_json}
+if msgpack is not None:
+    ENCODERS[MSGPACK] = encode_msgpack
+if importlib.util.find_spec("pyarrow") is not None:
+    ENCODERS[ARROW] = encode_arrow
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # mtime=0 keeps the output (and so the ETag) stable across rebuilds
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+# Compressors of the available content codings, in order of preference on ties
+COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {}
+if brotli is not None:
+    COMPRESSORS["br"] = _brotli
+COMPRESSORS["gzip"] = _gzip
+
+
+def _parse_accept(header: str) -> Dict[str, float]:
+    """``{token: q}`` for a comma separated header such as ``Accept``."""
+    weights = {}
+    for part in header.split(","):
+        token, *parameters = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        weights[token] = max(quality, weights.get(token, 0.0))
+    return weights
+
+
+def _media_quality(media_type: str, weights: Dict[str, float]) -> float:
+    """The weight of the most specific range matching ``media_type``."""
+    aliases = [alias for alias, target in _ALIASES.items() if target == media_type]
+    for candidate in (media_type, *aliases):
+        if candidate in weights:
+            return weights[candidate]
+    family = media_type.split("/")[0] + "/*"
+    if family in weights:
+        return weights[family]
+    return weights.get("*/*", 0.0)
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    The best available format for an ``Accept`` header.
+
+    JSON is served when the header is missing or matches nothing available
+    (rather than a 406), so clients that are strict about formats must check
+    ``Content-Type``.
+    """
+    if not accept:
+        return JSON
+    weights = _parse_accept(accept)
+    best, best_quality = JSON, 0.0
+    for media_type in ENCODERS:
+        quality = _media_quality(media_type, weights)
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def negotiate_coding(accept_encoding: Optional[str]) -> str:
+    """The best available content coding for an ``Accept-Encoding`` header."""
+    if not accept_encoding:
+        return IDENTITY
+    weights = _parse_accept(accept_encoding)
+    best, best_quality = IDENTITY, 0.0
+    for coding in COMPRESSORS:
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def encode(payload: Any, media_type: str) -> bytes:
+    return ENCODERS[media_type](payload)
+
+
+def compress(body: bytes, coding: str, level: int) -> bytes:
+    return COMPRESSORS[coding](body, level)
@@ -0,0 +1,222 @@
+"""
+Sales dataset with a write path.
+
+``SalesDataset`` owns the raw ``salesReps`` dict served by ``/api/data``, the
+columnar ``DealStore`` used for aggregation, the incrementally maintained
+``SalesAggregates``, the ``SalesIndexes`` behind filtered queries and the
+``RollupCubes`` behind grouped analytics. Every
+deal mutation goes through this class so the views never drift apart, and
+bumps ``version`` so derived data (such as the AI sales context) knows when
+it has to be rebuilt. Recent writes are also logged per rep, so derived data
+that can be updated in place (the retrieval index) only redoes the reps that
+changed.
+"""
+import itertools
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from aggregates import SalesAggregates
+from deal_store import DealStore
+from indexes import SalesIndexes
+from rollups import RollupCubes, client_industries
+
+
+# Data versions come from one process-wide counter, so a dataset built by a
+# reload never reuses a version an earlier dataset already handed to the caches
+_VERSIONS = itertools.count(1)
+
+
+def next_version() -> int:
+    """A data version greater than every version issued so far."""
+    return next(_VERSIONS)
+
+
+# Deal writes remembered for incremental consumers; older ones force a rebuild
+CHANGE_LOG_SIZE = 4096
+
+# Top-level fields of a sales rep that can be selected with a projection
+REP_FIELDS = ("id", "name", "role", "region", "skills", "deals", "clients")
+
+
+def _project(rep: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """``rep`` itself, or a copy restricted to ``fields``."""
+    if fields is None:
+        return rep
+    return {field: rep[field] for field in fields if field in rep}
+
+
+class SalesDataset:
+    """The loaded sales data plus its derived, incrementally updated views."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.version = next_version()
+        self._lock = threading.Lock()
+        # (version before, version after, rep position) of recent deal writes
+        self._changes: "deque[Tuple[int, int, int]]" = deque(maxlen=CHANGE_LOG_SIZE)
+
+        # Give every deal a stable id so it can be addressed by the write API
+        self._deal_refs: Dict[int, Dict[str, Any]] = {}
+        self._next_deal_id = 0
+        for rep in data.get('salesReps', []):
+            for deal in rep.get('deals', []):
+                if 'id' not in deal:
+                    deal['id'] = self._next_deal_id
+                self._next_deal_id = max(self._next_deal_id, deal['id']) + 1
+                self._deal_refs[deal['id']] = deal
+
+        self._rep_positions: Dict[Any, int] = {
+            rep.get('id'): position for position, rep in enumerate(data.get('salesReps', []))
+        }
+        self.store = DealStore.from_data(data)
+        self.aggregates = SalesAggregates.from_store(self.store)
+        self.indexes = SalesIndexes(data.get('salesReps', []), self._deal_refs, self.store.rep_position)
+        self.rollups = RollupCubes(self.store, client_industries(data.get('salesReps', [])))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def analytics(self) -> Dict[str, Any]:
+        """Constant-time analytics read from the running aggregates."""
+        return self.aggregates.analytics()
+
+    def iter_reps(self, start: int = 0, limit: Optional[int] = None,
+                  fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield reps one at a time starting at position ``start``.
+
+        ``fields`` restricts each rep to the given top-level keys; reps are
+        yielded as-is (not copied) when no projection is requested.
+        """
+        reps = self.data.get('salesReps', [])
+        stop = len(reps) if limit is None else min(len(reps), start + limit)
+        for position in range(start, stop):
+            yield _project(reps[position], fields)
+
+    def query_reps(self, region: Optional[str] = None, skill: Optional[str] = None,
+                   sort: str = "id", limit: int = 100,
+                   fields: Optional[Sequence[str]] = None, start: int = 0) -> List[Dict[str, Any]]:
+        """Reps in ``region`` with ``skill`` (case-insensitive), via the secondary indexes."""
+        reps = self.data.get('salesReps', [])
+        with self._lock:
+            positions = self.indexes.query_reps(region, skill, sort, limit, start)
+        return [_project(reps[position], fields) for position in positions]
+
+    def query_deals(self, status: Optional[str] = None, region: Optional[str] = None,
+                    skill: Optional[str] = None, rep_id=None, min_value=None, max_value=None,
+                    sort: str = "-value", limit: int = 100) -> List[Dict[str, Any]]:
+        """Deals matching every given filter, via the secondary indexes."""
+        with self._lock:
+            rep = None
+            if rep_id is not None:
+                rep = self._rep_positions.get(rep_id)
+                if rep is None:
+                    return []
+            deal_ids = self.indexes.query_deals(status, region, skill, rep, min_value, max_value, sort, limit)
+            return [self.get_deal(deal_id) for deal_id in deal_ids]
+
+    def group_by(self, dimensions: Sequence[str]) -> Dict[str, Any]:
+        """Deal count/sum/avg/min/max per group, from the rollup cubes or a scan."""
+        with self._lock:
+            groups, source = self.rollups.group_by(dimensions)
+        return {"dimensions": list(dimensions), "source": source, "groups": groups}
+
+    @property
+    def rep_count(self) -> int:
+        return len(self.data.get('salesReps', []))
+
+    def get_deal(self, deal_id: int) -> Dict[str, Any]:
+        """Return a deal with its owning rep id; raises ``KeyError`` if unknown."""
+        deal = self.store.get_deal(deal_id)
+        deal['repId'] = self.store.reps[deal.pop('repIndex')]['id']
+        return deal
+
+    def changed_reps(self, since_version: int) -> Tuple[int, Optional[Set[int]]]:
+        """
+        ``(version, positions)``: the current version and the positions of the
+        reps whose deals changed after ``since_version``, or None for the
+        positions when the change log no longer reaches back that far
+        """
+        with self._lock:
+            if since_version == self.version:
+                return self.version, set()
+            positions = set()
+            for before, _, position in reversed(self._changes):
+                positions.add(position)
+                if before == since_version:
+                    return self.version, positions
+            return self.version, None
+
+    def _changed(self, position: int):
+        """Bump the version after a write to the deals of the rep at ``position``."""
+        version = next_version()
+        self._changes.append((self.version, version, position))
+        self.version = version
+
+    def check_consistency(self) -> List[str]:
+        """
+        Compare the incremental state against a full recompute from the raw data.
+
+        Returns a list of human readable mismatches (empty when consistent).
+        """
+        with self._lock:
+            expected = SalesAggregates.from_store(DealStore.from_data(self.data))
+            return self.aggregates.diff(expected) + [
+                f"store {line}" for line in SalesAggregates.from_store(self.store).diff(expected)
+            ]
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+    def create_deal(self, rep_id, client: str, value, status: str,
+                    deal_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Add a deal to the rep with ``rep_id``; raises ``KeyError`` if unknown.
+
+        ``deal_id`` is only passed when the id was already assigned elsewhere
+        (by the SQLite backend this dataset mirrors).
+        """
+        with self._lock:
+            position = self._rep_positions[rep_id]
+            if deal_id is None:
+                deal_id = self._next_deal_id
+            deal = {"client": client, "value": value, "status": status, "id": deal_id}
+
+            self.data['salesReps'][position].setdefault('deals', []).append(deal)
+            self._deal_refs[deal_id] = deal
+            self.store.add_deal(deal_id, position, client, value, status)
+            self.aggregates.add_deal(value, status)
+            self.indexes.add_deal(deal_id, value, status)
+            self.rollups.add_deal(position, client, value, status)
+            self._next_deal_id = max(self._next_deal_id, deal_id) + 1
+            self._changed(position)
+            return self.get_deal(deal_id)
+
+    def update_deal(self, deal_id: int, client: str, value, status: str) -> Dict[str, Any]:
+        """Replace the client, value and status of a deal; raises ``KeyError`` if unknown."""
+        with self._lock:
+            deal = self._deal_refs[deal_id]
+            position = self.store.rep_position(deal_id)
+            self.aggregates.update_deal(deal['value'], deal['status'], value, status)
+            self.indexes.update_deal(deal_id, deal['value'], deal['status'], value, status)
+            self.rollups.update_deal(position, deal['client'], deal['value'],
+                                     deal['status'], client, value, status)
+            self.store.update_deal(deal_id, client=client, value=value, status=status)
+            deal.update(client=client, value=value, status=status)
+            self._changed(position)
+            return self.get_deal(deal_id)
+
+    def delete_deal(self, deal_id: int):
+        """Remove a deal; raises ``KeyError`` if unknown."""
+        with self._lock:
+            deal = self._deal_refs.pop(deal_id)
+            position = self.store.get_deal(deal_id)['repIndex']
+            deals = self.data['salesReps'][position]['deals']
+            # Remove by identity; equal-valued deals may exist on the same rep
+            del deals[next(i for i, candidate in enumerate(deals) if candidate is deal)]
+            self.store.remove_deal(deal_id)
+            self.aggregates.remove_deal(deal['value'], deal['status'])
+            self.indexes.remove_deal(deal_id, deal['value'], deal['status'])
+            self.rollups.remove_deal(position, deal['client'], deal['value'], deal['status'])
+            self._changed(position)
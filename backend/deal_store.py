@@ -0,0 +1,321 @@
+"""
+Columnar in-memory deal store.
+
+The raw dataset is a list of sales reps, each carrying a nested list of deals.
+Walking that structure in Python on every request scales poorly, so the deals
+are flattened once at load time into NumPy columns:
+
+- ``values``: deal value
+- ``status_codes``: index into ``statuses``
+- ``rep_index``: index into ``reps`` (the position of the rep in the dataset)
+- ``region_codes``: index into ``regions`` (the region of the owning rep)
+- ``client_codes``: index into ``clients``
+- ``deal_ids``: stable identifier of the deal
+
+Strings are interned into small lookup tables so the columns stay numeric and
+every aggregation becomes a vectorized reduction (``sum``, ``bincount``).
+
+Columns are over-allocated and grown geometrically, and removals move the last
+row into the freed slot, so single-deal mutations are amortized O(1) and the
+columns always stay dense.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Canonical deal statuses, in the order they are reported by the API
+DEAL_STATUSES = ("Closed Won", "In Progress", "Closed Lost")
+
+_COLUMNS = ("values", "status_codes", "rep_index", "region_codes", "client_codes", "deal_ids")
+
+
+class StringTable:
+    """Interns strings to small integer codes and back."""
+
+    def __init__(self, initial=()):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for value in initial:
+            self.intern(value)
+
+    def intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def code(self, value: str) -> int:
+        """Return the code for ``value`` or -1 if it was never interned."""
+        return self._codes.get(value, -1)
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _to_python(value):
+    """Convert NumPy scalars to plain Python numbers for JSON/formatting."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class DealStore:
+    """
+    Columnar snapshot of every deal in the dataset.
+
+    Build it with :meth:`from_data` and query it with the aggregate helpers;
+    all of them run in C over the columns instead of looping in Python.
+    """
+
+    def __init__(self, reps, values, status_codes, rep_index, region_codes,
+                 client_codes, deal_ids, statuses, regions, clients):
+        # Rep level metadata (one entry per rep, same order as the dataset)
+        self.reps: List[Dict[str, Any]] = reps
+        # Backing arrays; only the first ``_size`` rows are live
+        self._size = int(values.shape[0])
+        self._values = values
+        self._status_codes = status_codes
+        self._rep_index = rep_index
+        self._region_codes = region_codes
+        self._client_codes = client_codes
+        self._deal_ids = deal_ids
+        self._row_by_id: Dict[int, int] = {int(deal_id): row for row, deal_id in enumerate(deal_ids.tolist())}
+        # Interned string tables
+        self.statuses: StringTable = statuses
+        self.regions: StringTable = regions
+        self.clients: StringTable = clients
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "DealStore":
+        """
+        Flatten the nested ``salesReps`` structure into columns.
+
+        Deals carrying an ``id`` keep it; the others are numbered by their
+        position in the flattened dataset.
+        """
+        statuses = StringTable(DEAL_STATUSES)
+        regions = StringTable()
+        clients = StringTable()
+
+        reps = []
+        values = []
+        status_codes = []
+        rep_index = []
+        region_codes = []
+        client_codes = []
+        deal_ids = []
+
+        for position, rep in enumerate(data.get('salesReps', [])):
+            region_code = regions.intern(rep['region'])
+            reps.append({
+                "id": rep.get('id'),
+                "name": rep['name'],
+                "role": rep.get('role'),
+                "region": rep['region'],
+                "skills": list(rep.get('skills', [])),
+                "clients": [client['name'] for client in rep.get('clients', [])],
+            })
+            for deal in rep.get('deals', []):
+                values.append(deal['value'])
+                status_codes.append(statuses.intern(deal['status']))
+                rep_index.append(position)
+                region_codes.append(region_code)
+                client_codes.append(clients.intern(deal['client']))
+                deal_ids.append(deal.get('id', len(deal_ids)))
+
+        # Keep integer values as integers so totals format like the source data
+        value_array = np.asarray(values) if values else np.zeros(0, dtype=np.int64)
+        if value_array.dtype.kind not in "iuf":
+            value_array = value_array.astype(np.float64)
+
+        return cls(
+            reps=reps,
+            values=value_array,
+            status_codes=np.asarray(status_codes, dtype=np.int16),
+            rep_index=np.asarray(rep_index, dtype=np.int32),
+            region_codes=np.asarray(region_codes, dtype=np.int16),
+            client_codes=np.asarray(client_codes, dtype=np.int32),
+            deal_ids=np.asarray(deal_ids, dtype=np.int64),
+            statuses=statuses,
+            regions=regions,
+            clients=clients,
+        )
+
+    # ------------------------------------------------------------------
+    # Column views
+    # ------------------------------------------------------------------
+    @property
+    def values(self):
+        return self._values[:self._size]
+
+    @property
+    def status_codes(self):
+        return self._status_codes[:self._size]
+
+    @property
+    def rep_index(self):
+        return self._rep_index[:self._size]
+
+    @property
+    def region_codes(self):
+        return self._region_codes[:self._size]
+
+    @property
+    def client_codes(self):
+        return self._client_codes[:self._size]
+
+    @property
+    def deal_ids(self):
+        return self._deal_ids[:self._size]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Views of every column cut at the same length.
+
+        Reading the properties one by one can observe different lengths while a
+        writer appends concurrently; readers that combine columns use this.
+        """
+        size = self._size
+        return {name: getattr(self, "_" + name)[:size] for name in _COLUMNS}
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+    def _ensure_capacity(self, size: int):
+        capacity = self._values.shape[0]
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2, 16)
+        for name in _COLUMNS:
+            old = getattr(self, "_" + name)
+            grown = np.zeros(new_capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, "_" + name, grown)
+
+    def _coerce_value(self, value):
+        # Promote integer columns to float the first time a fractional value arrives
+        if self._values.dtype.kind in "iu" and not float(value).is_integer():
+            self._values = self._values.astype(np.float64)
+        return value
+
+    def has_deal(self, deal_id: int) -> bool:
+        return deal_id in self._row_by_id
+
+    def add_deal(self, deal_id: int, rep_position: int, client: str, value, status: str):
+        """Append a deal owned by the rep at ``rep_position``."""
+        if deal_id in self._row_by_id:
+            raise ValueError(f"Deal {deal_id} already exists")
+        row = self._size
+        self._ensure_capacity(row + 1)
+        self._values[row] = self._coerce_value(value)
+        self._status_codes[row] = self.statuses.intern(status)
+        self._rep_index[row] = rep_position
+        self._region_codes[row] = self.regions.intern(self.reps[rep_position]['region'])
+        self._client_codes[row] = self.clients.intern(client)
+        self._deal_ids[row] = deal_id
+        self._row_by_id[deal_id] = row
+        self._size += 1
+
+    def update_deal(self, deal_id: int, client: Optional[str] = None, value=None, status: Optional[str] = None):
+        """Overwrite the given fields of an existing deal in place."""
+        row = self._row_by_id[deal_id]
+        if client is not None:
+            self._client_codes[row] = self.clients.intern(client)
+        if value is not None:
+            self._values[row] = self._coerce_value(value)
+        if status is not None:
+            self._status_codes[row] = self.statuses.intern(status)
+
+    def remove_deal(self, deal_id: int):
+        """Remove a deal by moving the last row into its slot."""
+        row = self._row_by_id.pop(deal_id)
+        last = self._size - 1
+        if row != last:
+            for name in _COLUMNS:
+                column = getattr(self, "_" + name)
+                column[row] = column[last]
+            self._row_by_id[int(self._deal_ids[row])] = row
+        self._size = last
+
+    def rep_position(self, deal_id: int) -> int:
+        """Position of the rep owning ``deal_id``."""
+        return int(self._rep_index[self._row_by_id[deal_id]])
+
+    def get_deal(self, deal_id: int) -> Dict[str, Any]:
+        row = self._row_by_id[deal_id]
+        return {
+            "id": deal_id,
+            "repIndex": int(self._rep_index[row]),
+            "client": self.clients[int(self._client_codes[row])],
+            "value": _to_python(self._values[row]),
+            "status": self.statuses[int(self._status_codes[row])],
+        }
+
+    # ------------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------------
+    @property
+    def deal_count(self) -> int:
+        return self._size
+
+    @property
+    def rep_count(self) -> int:
+        return len(self.reps)
+
+    def total_value(self):
+        return _to_python(self.values.sum()) if self.deal_count else 0
+
+    def average_value(self) -> float:
+        return float(self.values.mean()) if self.deal_count else 0
+
+    def status_counts(self) -> Dict[str, int]:
+        """Deal count per status, always including the canonical statuses."""
+        counts = np.bincount(self.status_codes, minlength=len(self.statuses))
+        return {status: int(counts[code]) for code, status in enumerate(self.statuses.values)}
+
+    def region_list(self) -> List[str]:
+        """Unique regions covered by at least one rep."""
+        return list(self.regions.values)
+
+    def analytics(self) -> Dict[str, Any]:
+        """Payload for the ``SalesAnalytics`` response model."""
+        return {
+            "totalDealCount": self.deal_count,
+            "dealStatusSummary": self.status_counts(),
+            "totalDealValue": self.total_value(),
+            "averageDealValue": self.average_value(),
+            "regionDistribution": self.region_list(),
+        }
+
+    def rep_rollups(self) -> List[Dict[str, Any]]:
+        """
+        Per-rep deal count, total value and Closed Won count/value.
+
+        Returned in dataset order, one entry per rep (reps without deals
+        report zeros).
+        """
+        n_reps = self.rep_count
+        columns = self.columns()
+        rep_index = columns["rep_index"]
+        weights = columns["values"].astype(np.float64)
+        counts = np.bincount(rep_index, minlength=n_reps)
+        totals = np.bincount(rep_index, weights=weights, minlength=n_reps)
+
+        won = columns["status_codes"] == self.statuses.code("Closed Won")
+        won_counts = np.bincount(rep_index[won], minlength=n_reps)
+        won_totals = np.bincount(rep_index[won], weights=weights[won], minlength=n_reps)
+
+        integral = columns["values"].dtype.kind in "iu"
+        cast = int if integral else float
+        return [
+            {
+                "dealCount": int(counts[i]),
+                "totalValue": cast(totals[i]),
+                "wonCount": int(won_counts[i]),
+                "wonValue": cast(won_totals[i]),
+            }
+            for i in range(n_reps)
+        ]
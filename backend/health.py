@@ -0,0 +1,164 @@
+"""
+Background-sampled health status.
+
+Health probes used to measure everything inline: a blocking 100 ms CPU
+sample, several ``psutil`` calls, a file open and a live Gemini request per
+probe. ``HealthMonitor`` moves that work to a background task that samples
+system metrics and checks dependencies on its own schedule; probes only read
+the cached snapshot.
+
+A component whose last sample is older than its staleness threshold is
+reported as ``stale`` and makes the service degraded.
+
+``psutil`` is only imported by the first system sample, in the background
+task, so it does not add to the import time of the app. The startup warmup
+(see ``warmup``) is reported as its own component when one is given.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class HealthMonitor:
+    """Periodically samples system metrics and dependency status."""
+
+    def __init__(self, psutil_loader: Callable[[], Any], data_path: str,
+                 gemini_probe: Optional[Callable[[], Any]] = None,
+                 datastore_type: str = "file",
+                 sample_interval: float = 5.0, dependency_interval: float = 60.0,
+                 system_max_age: float = 30.0, dependency_max_age: float = 180.0,
+                 probe_timeout: float = 10.0, warmup_status: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.psutil_loader = psutil_loader
+        self.psutil = None
+        self.warmup_status = warmup_status
+        self.data_path = data_path
+        self.datastore_type = datastore_type
+        self.gemini_probe = gemini_probe
+        self.sample_interval = sample_interval
+        self.dependency_interval = dependency_interval
+        self.system_max_age = system_max_age
+        self.dependency_max_age = dependency_max_age
+        self.probe_timeout = probe_timeout
+        self.started_at = time.time()
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Sampling (runs in the background task, never in a probe)
+    # ------------------------------------------------------------------
+    def sample_system(self):
+        if self.psutil is None:
+            self.psutil = self.psutil_loader()
+        try:
+            memory = self.psutil.virtual_memory()
+            component = {
+                "status": "up",
+                "memory": {
+                    "total": memory.total,
+                    "available": memory.available,
+                    "percent": memory.percent,
+                },
+                "cpu": {
+                    # Non-blocking: utilisation since the previous sample
+                    "usage": self.psutil.cpu_percent(interval=None),
+                    "cores": self.psutil.cpu_count(logical=True),
+                },
+            }
+        except Exception as e:
+            component = {
+                "status": "up",  # Still up even if we can't get detailed metrics
+                "memory": {"total": 0, "available": 0, "percent": 0},
+                "cpu": {"usage": 0, "cores": 0},
+                "error": str(e),
+            }
+        component["sampledAt"] = time.time()
+        self._components["system"] = component
+
+    def check_datastore(self):
+        start_time = time.time()
+        try:
+            os.stat(self.data_path)
+            component = {
+                "status": "up",
+                "type": self.datastore_type,
+                "responseTime": round((time.time() - start_time) * 1000, 2),
+            }
+        except Exception as e:
+            component = {"status": "down", "type": self.datastore_type, "error": str(e)}
+        component["sampledAt"] = time.time()
+        self._components["datastore"] = component
+
+    async def check_gemini(self):
+        if self.gemini_probe is None:
+            self._components["gemini_api"] = {
+                "status": "disabled",
+                "reason": "API key not configured",
+                "sampledAt": time.time(),
+            }
+            return
+        start_time = time.time()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self.gemini_probe), timeout=self.probe_timeout)
+            component = {"status": "up", "responseTime": round((time.time() - start_time) * 1000, 2)}
+        except Exception as e:
+            component = {"status": "down", "error": str(e) or type(e).__name__}
+        component["sampledAt"] = time.time()
+        self._components["gemini_api"] = component
+
+    async def run(self):
+        """Sample forever; dependencies are checked every ``dependency_interval``."""
+        next_dependency_check = 0.0
+        while True:
+            try:
+                await asyncio.to_thread(self.sample_system)
+                if time.monotonic() >= next_dependency_check:
+                    await asyncio.to_thread(self.check_datastore)
+                    await self.check_gemini()
+                    next_dependency_check = time.monotonic() + self.dependency_interval
+            except Exception as e:
+                print(f"Health sampling failed: {e}")
+            await asyncio.sleep(self.sample_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ------------------------------------------------------------------
+    # Probes (cached reads only)
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        """Health payload built from the last samples; no I/O."""
+        now = time.time()
+        status = "healthy"
+        components = {}
+        for name, max_age in (("system", self.system_max_age),
+                              ("datastore", self.dependency_max_age),
+                              ("gemini_api", self.dependency_max_age)):
+            component = self._components.get(name)
+            if component is None:
+                components[name] = {"status": "pending"}
+                status = "degraded"
+                continue
+            component = dict(component)
+            component["age"] = round(now - component["sampledAt"], 2)
+            if component["age"] > max_age:
+                component["status"] = "stale"
+                status = "degraded"
+            elif component["status"] == "down":
+                status = "degraded"
+            components[name] = component
+        if self.warmup_status is not None:
+            components["warmup"] = self.warmup_status()
+            if components["warmup"]["status"] == "pending":
+                status = "degraded"
+        return {"status": status, "timestamp": now, "components": components}
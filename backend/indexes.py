@@ -0,0 +1,232 @@
+"""
+Secondary indexes for filtered rep and deal queries.
+
+Filtering the nested data for one region or the ten largest deals means
+walking every rep and deal. ``SalesIndexes`` keeps:
+
+- ``reps_by_region``: region -> rep positions
+- ``reps_by_skill``: case-folded skill -> rep positions (inverted index)
+- ``deals_by_status``: status -> deal ids
+- a value index: deal values and ids in two parallel lists sorted by
+  ``(value, id)``, and an id index: deal ids in sorted order
+- rep orders: rep positions presorted per rep sort key, built on first use
+  (rep fields never change with deal writes)
+
+so a query starts from the smallest matching candidate set (or walks a
+presorted index for top-N queries and pages) and costs time proportional to
+the result rather than the dataset. Deal writes update the indexes in
+O(log n) plus a list insert/delete.
+"""
+import bisect
+import heapq
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Sort keys accepted by the queries; a leading "-" sorts descending
+REP_SORT_KEYS = ("id", "-id", "name", "-name")
+DEAL_SORT_KEYS = ("value", "-value", "id", "-id")
+
+
+def fold_skill(skill: str) -> str:
+    return skill.strip().casefold()
+
+
+class SalesIndexes:
+    """Region, skill, status and value indexes over the live dataset."""
+
+    def __init__(self, reps: List[Dict[str, Any]], deals: Dict[int, Dict[str, Any]],
+                 rep_of: Callable[[int], int]):
+        # Live references owned by SalesDataset; the indexes never copy them
+        self._reps = reps
+        self._deals = deals
+        self._rep_of = rep_of
+
+        self.reps_by_region: Dict[str, Set[int]] = {}
+        self.reps_by_skill: Dict[str, Set[int]] = {}
+        for position, rep in enumerate(reps):
+            self.reps_by_region.setdefault(rep['region'], set()).add(position)
+            for skill in rep.get('skills', []):
+                self.reps_by_skill.setdefault(fold_skill(skill), set()).add(position)
+
+        self.deals_by_status: Dict[str, Set[int]] = {}
+        for deal_id, deal in deals.items():
+            self.deals_by_status.setdefault(deal['status'], set()).add(deal_id)
+        ordered = sorted(deals.items(), key=lambda item: (item[1]['value'], item[0]))
+        self._values: List[Any] = [deal['value'] for _, deal in ordered]
+        self._ids: List[int] = [deal_id for deal_id, _ in ordered]
+        self._sorted_ids: List[int] = sorted(deals)
+        # Sort key -> (rep positions in that order, rank of each position)
+        self._rep_orders: Dict[str, Tuple[List[int], List[int]]] = {}
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def _value_position(self, value, deal_id: int) -> int:
+        lo = bisect.bisect_left(self._values, value)
+        hi = bisect.bisect_right(self._values, value, lo)
+        return bisect.bisect_left(self._ids, deal_id, lo, hi)
+
+    def add_deal(self, deal_id: int, value, status: str):
+        position = self._value_position(value, deal_id)
+        self._values.insert(position, value)
+        self._ids.insert(position, deal_id)
+        bisect.insort(self._sorted_ids, deal_id)
+        self.deals_by_status.setdefault(status, set()).add(deal_id)
+
+    def remove_deal(self, deal_id: int, value, status: str):
+        position = self._value_position(value, deal_id)
+        del self._values[position]
+        del self._ids[position]
+        del self._sorted_ids[bisect.bisect_left(self._sorted_ids, deal_id)]
+        self.deals_by_status[status].discard(deal_id)
+
+    def update_deal(self, deal_id: int, old_value, old_status: str, new_value, new_status: str):
+        self.remove_deal(deal_id, old_value, old_status)
+        self.add_deal(deal_id, new_value, new_status)
+
+    def _rep_order(self, sort: str) -> Tuple[List[int], List[int]]:
+        """Rep positions in ``sort`` order (ties in file order) and each position's rank."""
+        order = self._rep_orders.get(sort)
+        if order is None:
+            field = sort.lstrip("-")
+            # Python's sort is stable even when reversed, so ties keep file order
+            positions = sorted(range(len(self._reps)), key=lambda position: self._reps[position][field],
+                               reverse=sort.startswith("-"))
+            ranks = [0] * len(positions)
+            for rank, position in enumerate(positions):
+                ranks[position] = rank
+            order = self._rep_orders[sort] = (positions, ranks)
+        return order
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def rep_positions(self, region: Optional[str] = None, skill: Optional[str] = None,
+                      rep: Optional[int] = None) -> Optional[Set[int]]:
+        """
+        Positions of the reps matching every given filter, or None when
+        unfiltered. A single filter returns the index set itself; do not modify it.
+        """
+        candidates = []
+        if region is not None:
+            candidates.append(self.reps_by_region.get(region, set()))
+        if skill is not None:
+            candidates.append(self.reps_by_skill.get(fold_skill(skill), set()))
+        if rep is not None:
+            candidates.append({rep})
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        candidates.sort(key=len)
+        return {position for position in candidates[0] if all(position in other for other in candidates[1:])}
+
+    def query_reps(self, region: Optional[str] = None, skill: Optional[str] = None,
+                   sort: str = "id", limit: int = 100, start: int = 0) -> List[int]:
+        """Positions of ``limit`` matching reps in ``sort`` order, skipping the first ``start``."""
+        ordered, ranks = self._rep_order(sort)
+        positions = self.rep_positions(region, skill)
+        if positions is None:
+            return ordered[start:start + limit]
+        wanted = start + limit
+        # Walking the presorted order visits about wanted * reps / matches
+        # positions; ranking the matches costs about their number
+        if wanted * len(ordered) < len(positions) * len(positions):
+            page = []
+            for position in ordered:
+                if position in positions:
+                    page.append(position)
+                    if len(page) >= wanted:
+                        break
+        else:
+            page = heapq.nsmallest(wanted, positions, key=ranks.__getitem__)
+        return page[start:]
+
+    def _value_range(self, min_value=None, max_value=None):
+        lo = 0 if min_value is None else bisect.bisect_left(self._values, min_value)
+        hi = len(self._values) if max_value is None else bisect.bisect_right(self._values, max_value)
+        return lo, max(lo, hi)
+
+    def query_deals(self, status: Optional[str] = None, region: Optional[str] = None,
+                    skill: Optional[str] = None, rep: Optional[int] = None,
+                    min_value=None, max_value=None, sort: str = "-value", limit: int = 100) -> List[int]:
+        """
+        Ids of the first ``limit`` matching deals in ``sort`` order.
+
+        Top-N by value walks the value index from the matching end and stops
+        after ``limit`` hits. When the filters are selective enough that the
+        walk would skip many deals, the smallest candidate set (the rep
+        filters' deals or the status set) is filtered and ranked instead.
+        """
+        reps = self.rep_positions(region, skill, rep)
+        statuses = self.deals_by_status.get(status, set()) if status is not None else None
+        lo, hi = self._value_range(min_value, max_value)
+
+        sources = [(hi - lo, "values")]
+        if reps is not None:
+            # Estimated from the average deals per rep; only used to pick a plan
+            sources.append((len(reps) * len(self._ids) // max(1, len(self._reps)), "reps"))
+        if statuses is not None:
+            sources.append((len(statuses), "status"))
+        smallest, source = min(sources)
+
+        # Expected walk length is limit * range / matches; prefer it unless the
+        # candidate set is smaller than that
+        if sort in ("value", "-value") and (source == "values" or limit * (hi - lo) < smallest * smallest):
+            return self._walk_values(lo, hi, sort == "-value", statuses, reps, limit)
+
+        def matches(deal_id, deal):
+            if statuses is not None and deal_id not in statuses:
+                return False
+            if min_value is not None and deal['value'] < min_value:
+                return False
+            if max_value is not None and deal['value'] > max_value:
+                return False
+            return reps is None or self._rep_of(deal_id) in reps
+
+        if sort in ("id", "-id") and (reps is None and statuses is None and (lo, hi) == (0, len(self._ids))
+                                      or limit * len(self._ids) < smallest * smallest):
+            return self._walk_ids(sort == "-id", matches, limit)
+
+        if source == "values":
+            # Already inside the value range; only ranked by id (value sorts walk)
+            matching = [
+                (None, deal_id) for deal_id in self._ids[lo:hi]
+                if (statuses is None or deal_id in statuses) and (reps is None or self._rep_of(deal_id) in reps)
+            ]
+        else:
+            candidates: Iterable
+            if source == "reps":
+                candidates = ((deal['id'], deal) for p in reps for deal in self._reps[p].get('deals', []))
+            else:
+                candidates = ((deal_id, self._deals[deal_id]) for deal_id in statuses)
+            matching = [(deal['value'], deal_id) for deal_id, deal in candidates if matches(deal_id, deal)]
+
+        if sort in ("value", "-value"):
+            select = heapq.nlargest if sort == "-value" else heapq.nsmallest
+            return [deal_id for _, deal_id in select(limit, matching)]
+        select = heapq.nlargest if sort == "-id" else heapq.nsmallest
+        return select(limit, (deal_id for _, deal_id in matching))
+
+    def _walk_ids(self, descending: bool, matches: Callable[[int, Dict[str, Any]], bool], limit: int) -> List[int]:
+        result = []
+        for deal_id in (reversed(self._sorted_ids) if descending else self._sorted_ids):
+            if matches(deal_id, self._deals[deal_id]):
+                result.append(deal_id)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def _walk_values(self, lo: int, hi: int, descending: bool, statuses: Optional[Set[int]],
+                     reps: Optional[Set[int]], limit: int) -> List[int]:
+        result = []
+        positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+        for position in positions:
+            deal_id = self._ids[position]
+            if statuses is not None and deal_id not in statuses:
+                continue
+            if reps is not None and self._rep_of(deal_id) not in reps:
+                continue
+            result.append(deal_id)
+            if len(result) >= limit:
+                break
+        return result
@@ -1,18 +1,41 @@
-from fastapi import FastAPI, Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
-import uvicorn
+from typing import Dict, List, Optional, Any, Literal
+import asyncio
+from contextlib import aclosing, asynccontextmanager
 import json
 import os
+import time
+from urllib.parse import parse_qs
 from dotenv import load_dotenv
-import google.generativeai as genai
-# Add psutil for system metrics
-try:
-    import psutil
-except ImportError:
-    print("WARNING: psutil not installed. System metrics will be limited.")
+from ai_client import GeminiClient
+from answer_cache import AnswerCache
+from dataset import REP_FIELDS
+from health import HealthMonitor
+from indexes import DEAL_SORT_KEYS, REP_SORT_KEYS
+from metrics import MetricsMiddleware, Registry
+from deal_store import DEAL_STATUSES
+from query_engine import QueryEngine, RoutingStats
+from rate_limit import (MemoryBucketStore, RateLimiter, RateLimitMiddleware, SharedBucketStore,
+                        client_key, retry_after_header)
+from retrieval import ContextRetriever, estimate_tokens
+from response_cache import ResponseCache
+from rollups import DIMENSIONS
+from shared_snapshot import GenerationCounter
+from snapshot import DataReloader, DataSnapshot
+from storage import ReadOnlyStorageError, open_storage, reload_storage
+from warmup import Warmup
+
+# psutil provides the system metrics of the health checks. It is imported by
+# the first health sample rather than here, to keep it off the startup path
+def load_psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        print("WARNING: psutil not installed. System metrics will be limited.")
     # Provide a fallback psutil module with minimal functionality
     class FallbackPsUtil:
         class VirtualMemory:
@@ -30,7 +53,7 @@ except ImportError:
         def cpu_count(self, logical=True):
             return 4
     
-    psutil = FallbackPsUtil()
+    return FallbackPsUtil()
 
 # Load environment variables
 load_dotenv()
@@ -47,17 +70,43 @@ This API provides access to sales representatives data and AI-powered insights u
 * **AI Insights**: Ask questions about sales data in natural language
 * **Analytics**: Get aggregated sales performance metrics
 
+## Response Formats
+
+The data and analytics endpoints answer in the format requested with `Accept`:
+JSON (default), MessagePack (`application/msgpack`) or an Arrow IPC stream
+(`application/vnd.apache.arrow.stream`, one row per rep, deal or group).
+Bodies of 1 KB and more are compressed when `Accept-Encoding` allows `br` or `gzip`.
+
 ## Authentication
 
 This API currently does not require authentication, but it may be added in future versions.
 
 ## Rate Limiting
 
-There are no rate limits currently applied to the API endpoints, but please use them responsibly.
+Requests are limited per client (a configured `X-API-Key`, otherwise the
+client IP) with token buckets: one budget for the data and analytics
+endpoints and a smaller one for AI questions. Gemini calls of all clients
+also share a budget of upstream tokens per minute. A request over its limit
+gets `429 Too Many Requests` with a `Retry-After` header; an AI question
+over the limit is still answered when it can be answered locally or from
+the answer cache. Health, metrics and documentation endpoints are not limited.
 """
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Health metrics are sampled in the background so probes never block
+    HEALTH_MONITOR.start()
+    WARMUP.start()
+    if DATA_RELOAD_ENABLED:
+        DATA_RELOADER.start()
+    yield
+    await DATA_RELOADER.stop()
+    await WARMUP.stop()
+    await HEALTH_MONITOR.stop()
+
 # Initialize FastAPI with metadata
 app = FastAPI(
+    lifespan=lifespan,
     title="Sales Dashboard API",
     description=description,
     version="1.0.0",
@@ -90,6 +139,63 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Gemini tokens (prompt estimate plus the output limit) all clients may use
+# per minute; Gemini 2.0 Flash-Lite allows 1M on the free tier
+AI_UPSTREAM_TOKENS_PER_MINUTE = float(os.getenv('AI_UPSTREAM_TOKENS_PER_MINUTE', '1000000'))
+
+# Token buckets per client ("data", "pages", "ai") and for Gemini tokens of all
+# clients ("upstream"), as (per minute, burst); a rate of 0 disables one.
+# With RATE_LIMIT_STATE_PATH the buckets live in a file shared by the
+# workers of server.py, otherwise in this process
+RATE_LIMITER = RateLimiter(
+    SharedBucketStore(os.getenv('RATE_LIMIT_STATE_PATH')) if os.getenv('RATE_LIMIT_STATE_PATH') else MemoryBucketStore(),
+    budgets={
+        'data': (float(os.getenv('RATE_LIMIT_DATA_PER_MINUTE', '600')), float(os.getenv('RATE_LIMIT_DATA_BURST', '100'))),
+        'ai': (float(os.getenv('RATE_LIMIT_AI_PER_MINUTE', '20')), float(os.getenv('RATE_LIMIT_AI_BURST', '5'))),
+        # Continuation pages of paged reads, so a large dataset loads without running into 429s
+        'pages': (float(os.getenv('RATE_LIMIT_PAGES_PER_MINUTE', '6000')), float(os.getenv('RATE_LIMIT_PAGES_BURST', '1000'))),
+        # A whole minute of tokens may be spent at once
+        'upstream': (AI_UPSTREAM_TOKENS_PER_MINUTE, AI_UPSTREAM_TOKENS_PER_MINUTE),
+    },
+    enabled=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() != 'false',
+)
+# API keys with their own buckets; X-Forwarded-For is only trusted behind a proxy
+RATE_LIMIT_API_KEYS = frozenset(key.strip() for key in os.getenv('RATE_LIMIT_API_KEYS', '').split(',') if key.strip())
+RATE_LIMIT_TRUST_PROXY = os.getenv('RATE_LIMIT_TRUST_PROXY', 'false').lower() != 'false'
+
+def identify_client(scope) -> str:
+    return client_key(scope, RATE_LIMIT_API_KEYS, RATE_LIMIT_TRUST_PROXY)
+
+# Paged reads whose continuation pages are charged to the "pages" budget
+PAGED_PATHS = ("/api/data", "/api/sales-reps")
+
+def rate_limit_budget(scope) -> Optional[str]:
+    """
+    The budget of a request: "data" for the API routes, None for the probes,
+    metrics and docs. The AI endpoints check their budgets themselves.
+    Continuation pages of a paged read (a cursor past the first page) are
+    charged to the larger "pages" budget, so loading a large dataset page by
+    page is bounded without counting every page as a data request
+    """
+    path = scope["path"]
+    if not path.startswith("/api/") or path in ("/api/ai", "/api/ai/stream"):
+        return None
+    if path in PAGED_PATHS:
+        cursor = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("cursor", [""])[0]
+        # cursor=0 is the first page, and an invalid cursor is rejected as usual
+        if cursor.isdigit() and int(cursor) > 0:
+            return "pages"
+    return "data"
+
+# Innermost, so rejected requests still get CORS headers and are counted in metrics
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=RATE_LIMITER,
+    budget_for=rate_limit_budget,
+    identify=identify_client,
+    on_limited=lambda budget: RATE_LIMITED.inc(budget=budget, outcome="rejected"),
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -97,18 +203,132 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["Retry-After"],  # Lets browsers wait out a 429
 )
 
-# Load dummy data
-with open("dummyData.json", "r") as f:
-    DUMMY_DATA = json.load(f)
+# Prometheus-style metrics exported on /metrics
+METRICS = Registry()
+app.add_middleware(
+    MetricsMiddleware,
+    registry=METRICS,
+    enabled=os.getenv('METRICS_ENABLED', 'true').lower() != 'false',
+)
+SECTION_SECONDS = METRICS.histogram(
+    "app_section_duration_seconds", "Time spent in instrumented hot sections", ("section",))
+AI_UPSTREAM_SECONDS = METRICS.histogram(
+    "ai_upstream_duration_seconds", "Latency of Gemini calls made by /api/ai and /api/ai/stream", ("outcome",))
+AI_UPSTREAM_ERRORS = METRICS.counter(
+    "ai_upstream_errors_total", "Failed Gemini calls made by /api/ai", ("kind",))
+AI_ANSWERS = METRICS.counter(
+    "ai_answers_total", "Answers returned by /api/ai by source", ("source",))
+AI_TIME_TO_FIRST_TOKEN = METRICS.histogram(
+    "ai_time_to_first_token_seconds", "Time from the Gemini call to its first streamed chunk on /api/ai/stream")
+RATE_LIMITED = METRICS.counter(
+    "rate_limited_requests_total", "Requests over a rate limit budget, rejected or answered without Gemini",
+    ("budget", "outcome"))
+
+# Resolve the data file next to this module, not the working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.getenv('DATA_PATH', os.path.join(BASE_DIR, "dummyData.json"))
+
+# "json" parses the whole file into memory (columnar deals plus running
+# aggregates); "sqlite" serves reads from an indexed database imported from it;
+# "mmap" maps the read-only snapshot file shared by the workers of server.py.
+# Handlers read SNAPSHOT once per request; a reload publishes a new one.
+_load_started = time.perf_counter()
+_storage = open_storage(
+    os.getenv('STORAGE_BACKEND', 'json'),
+    DATA_PATH,
+    sqlite_path=os.getenv('SQLITE_PATH', os.path.join(BASE_DIR, "sales.db")),
+    pool_size=int(os.getenv('SQLITE_POOL_SIZE', '4')),
+    snapshot_path=os.getenv('SHARED_SNAPSHOT_PATH'),
+)
+SNAPSHOT = DataSnapshot(_storage, generation=_storage.generation or 0,
+                        load_seconds=time.perf_counter() - _load_started)
+
+# Answers structured questions (totals, counts, rankings) without calling the LLM
+LOCAL_ANSWERS_ENABLED = os.getenv('AI_LOCAL_ANSWERS', 'true').lower() != 'false'
+
+# Local vs LLM routing counts, shared by the engines of every snapshot
+QUERY_ROUTING = RoutingStats()
+
+def get_query_engine(snapshot: DataSnapshot) -> QueryEngine:
+    """
+    Return the snapshot's query engine over the in-memory dataset, creating it on first use
+    """
+    store = snapshot.storage.deal_store
+    return snapshot.derived("query_engine", lambda: QueryEngine(store, QUERY_ROUTING), key=store)
+
+# Encoded bodies of read endpoints, one per negotiated format and compression,
+# invalidated whenever the data version changes
+RESPONSE_CACHE = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256')),
+    enabled=os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() != 'false',
+    on_encode=lambda path, representation, seconds, size: SECTION_SECONDS.observe(
+        seconds, section=f"encode {path}" if representation == "json" else f"encode {path} as {representation}"),
+    compression_min_size=int(os.getenv('COMPRESSION_MIN_SIZE', '1024')),
+    compression_levels={
+        'gzip': int(os.getenv('GZIP_LEVEL', '6')),
+        'br': int(os.getenv('BROTLI_QUALITY', '5')),
+    },
+)
 
 # Configure Google Gemini API
 GEMINI_API_KEY = os.getenv('GOOGLE_GEMINI_API_KEY')
 if not GEMINI_API_KEY:
     print("WARNING: Gemini API key not found. AI features will be disabled.")
-else:
-    genai.configure(api_key=GEMINI_API_KEY)
+
+# Alternative API endpoint (a proxy, or the fake server of the load tests),
+# e.g. http://127.0.0.1:9000; spoken to over REST instead of gRPC
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+
+def create_gemini_model():
+    """
+    Import and configure the Gemini SDK, then create the model. The SDK
+    (grpc, protobuf) is by far the heaviest import of the app, so it is only
+    loaded on the first AI call or by the startup warmup, never at import
+    """
+    import google.generativeai as genai
+    if GEMINI_API_ENDPOINT:
+        genai.configure(api_key=GEMINI_API_KEY, transport="rest",
+                        client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    else:
+        genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel('gemini-2.0-flash-lite')
+
+# Gemini 2.0 Flash-Lite behind a non-blocking, bounded and coalescing client
+AI_CLIENT = GeminiClient(
+    model_factory=create_gemini_model,
+    generation_config={
+        'temperature': 0.5,  # Balanced creativity and factuality
+        'max_output_tokens': 200,  # Limit response length
+    },
+    max_concurrency=int(os.getenv('AI_MAX_CONCURRENCY', '4')),
+    timeout=float(os.getenv('AI_TIMEOUT_SECONDS', '30')),
+    use_async_api=not GEMINI_API_ENDPOINT,
+)
+
+# Background sampler behind /health, /readyz and /livez
+HEALTH_MONITOR = HealthMonitor(
+    load_psutil,
+    data_path=SNAPSHOT.storage.path,
+    datastore_type="file" if SNAPSHOT.storage.name == "json" else SNAPSHOT.storage.name,
+    gemini_probe=(lambda: AI_CLIENT.model.count_tokens("test")) if GEMINI_API_KEY else None,
+    sample_interval=float(os.getenv('HEALTH_SAMPLE_INTERVAL', '5')),
+    dependency_interval=float(os.getenv('HEALTH_DEPENDENCY_INTERVAL', '60')),
+    system_max_age=float(os.getenv('HEALTH_SYSTEM_MAX_AGE', '30')),
+    dependency_max_age=float(os.getenv('HEALTH_DEPENDENCY_MAX_AGE', '180')),
+    warmup_status=lambda: WARMUP.status(),
+)
+
+# Previous AI answers, invalidated whenever the data version changes
+ANSWER_CACHE = AnswerCache(
+    max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', '1024')),
+    max_bytes=int(os.getenv('AI_CACHE_MAX_BYTES', str(4 * 1024 * 1024))),
+    ttl=float(os.getenv('AI_CACHE_TTL_SECONDS', '3600')),
+    similarity_threshold=float(os.getenv('AI_CACHE_SIMILARITY')) if os.getenv('AI_CACHE_SIMILARITY') else None,
+    enabled=os.getenv('AI_CACHE_ENABLED', 'true').lower() != 'false',
+)
 
 # Define request and response models for better documentation
 class AIQuestion(BaseModel):
@@ -157,39 +377,54 @@ class SalesAnalytics(BaseModel):
     averageDealValue: float
     regionDistribution: List[str]
 
-# Generate context from DUMMY_DATA
-def generate_sales_context():
+DealStatus = Literal[DEAL_STATUSES]
+
+class DealInput(BaseModel):
+    client: str = Field(..., example="Acme Corp", description="Client name")
+    value: float = Field(..., ge=0, example=120000, description="Deal value in dollars")
+    status: DealStatus = Field(..., example="In Progress", description="Deal status")
+
+class Deal(DealInput):
+    id: int = Field(..., example=15, description="Deal identifier")
+    repId: int = Field(..., example=1, description="Identifier of the owning sales representative")
+
+class DealList(BaseModel):
+    deals: List[Deal]
+
+class ConsistencyReport(BaseModel):
+    consistent: bool
+    mismatches: List[str]
+
+class GroupByResult(BaseModel):
+    dimensions: List[str]
+    source: str
+    groups: List[Dict[str, Any]]
+
+# Generate context from the sales data
+def generate_sales_context(storage):
     """
     Create a detailed, comprehensive context based on the sales representatives data
     """
+    store = storage.deal_store
+
     # Overall sales team statistics
-    total_reps = len(DUMMY_DATA.get('salesReps', []))
-    total_deals = sum(len(rep['deals']) for rep in DUMMY_DATA.get('salesReps', []))
-    total_deal_value = sum(sum(deal['value'] for deal in rep['deals']) for rep in DUMMY_DATA.get('salesReps', []))
+    total_reps = store.rep_count
+    total_deals = store.deal_count
+    total_deal_value = store.total_value()
     
     # Deal status aggregation
-    deal_status = {
-        "Closed Won": sum(len([d for d in rep['deals'] if d['status'] == 'Closed Won']) for rep in DUMMY_DATA.get('salesReps', [])),
-        "In Progress": sum(len([d for d in rep['deals'] if d['status'] == 'In Progress']) for rep in DUMMY_DATA.get('salesReps', [])),
-        "Closed Lost": sum(len([d for d in rep['deals'] if d['status'] == 'Closed Lost']) for rep in DUMMY_DATA.get('salesReps', []))
-    }
+    deal_status = store.status_counts()
     
     # Detailed sales representatives breakdown
     rep_details = []
-    for rep in DUMMY_DATA.get('salesReps', []):
-        # Calculate rep-specific statistics
-        rep_total_deals = len(rep['deals'])
-        rep_total_value = sum(deal['value'] for deal in rep['deals'])
-        rep_won_deals = len([d for d in rep['deals'] if d['status'] == 'Closed Won'])
-        rep_won_value = sum(deal['value'] for deal in rep['deals'] if deal['status'] == 'Closed Won')
-        
+    for rep, rollup in zip(store.reps, store.rep_rollups()):
         rep_summary = (
             f"{rep['name']} ({rep['role']} in {rep['region']}):\n"
             f"  - Key Skills: {', '.join(rep['skills'])}\n"
-            f"  - Total Deals: {rep_total_deals}\n"
-            f"  - Total Deal Value: ${rep_total_value:,}\n"
-            f"  - Closed Won Deals: {rep_won_deals} (${rep_won_value:,})\n"
-            f"  - Top Clients: {', '.join(client['name'] for client in rep['clients'])}"
+            f"  - Total Deals: {rollup['dealCount']}\n"
+            f"  - Total Deal Value: ${rollup['totalValue']:,}\n"
+            f"  - Closed Won Deals: {rollup['wonCount']} (${rollup['wonValue']:,})\n"
+            f"  - Top Clients: {', '.join(rep['clients'])}"
         )
         rep_details.append(rep_summary)
     
@@ -227,11 +462,183 @@ def generate_sales_context():
     
     return full_context
 
-# Generate context once when the module is loaded
-SALES_CONTEXT = generate_sales_context()
+def get_sales_context(snapshot: DataSnapshot):
+    """
+    Return the snapshot's sales context, regenerating it if deals changed since
+    it was built. Generated on first use, so the SQLite backend does not load
+    the whole dataset into memory unless the full context is actually needed
+    """
+    storage = snapshot.storage
+    return snapshot.derived("sales_context", lambda: generate_sales_context(storage), key=storage.version)
+
+# Retrieves only the chunks relevant to each question instead of the full context
+AI_CONTEXT_MODE = os.getenv('AI_CONTEXT_MODE', 'retrieval')
+
+def get_context_retriever(snapshot: DataSnapshot) -> ContextRetriever:
+    """
+    Return the snapshot's retriever over the in-memory dataset (or, for a
+    mapped snapshot, over its precomputed chunks), creating it on first use
+    """
+    source = snapshot.storage.context_source
+    return snapshot.derived(
+        "context_retriever",
+        lambda: ContextRetriever(
+            source,
+            top_k=int(os.getenv('AI_CONTEXT_TOP_K', '8')),
+            token_budget=int(os.getenv('AI_CONTEXT_TOKEN_BUDGET', '1500')),
+        ),
+        key=source,
+    )
+
+def build_ai_prompt(user_question: str, snapshot: DataSnapshot) -> str:
+    """
+    Wrap the question with sales context: the question-scoped retrieval context
+    by default, or the full sales context when AI_CONTEXT_MODE is "full"
+    """
+    with SECTION_SECONDS.time(section="context_build"):
+        if AI_CONTEXT_MODE == "full":
+            context = get_sales_context(snapshot)
+        else:
+            context = get_context_retriever(snapshot).build_context(user_question)
+    return f"""
+        Sales Context:
+        {context}
+
+        Analyze and respond to this query concisely:
+        {user_question}
+
+        Guidelines:
+        - Be precise and data-driven
+        - Provide clear, actionable insights
+        - Limit response to 200 words
+        """
+
+DATA_SNAPSHOT_GENERATION = METRICS.gauge(
+    "data_snapshot_generation", "Generation of the published data snapshot (0 = loaded at startup)")
+DATA_SNAPSHOT_LOAD_SECONDS = METRICS.gauge(
+    "data_snapshot_load_seconds", "Seconds spent loading and warming the published data snapshot")
+DATA_RELOADS = METRICS.counter(
+    "data_reloads_total", "Hot reloads of the data file by outcome", ("outcome",))
+DATA_SNAPSHOT_GENERATION.set(SNAPSHOT.generation)
+DATA_SNAPSHOT_LOAD_SECONDS.set(SNAPSHOT.load_seconds)
+
+def warm_snapshot(snapshot: DataSnapshot):
+    """
+    Build the structures the AI features derive from a new snapshot before it
+    is published, so the first questions after a reload do not pay for them.
+    The SQLite backend's in-memory dataset stays lazy; the mapped snapshot
+    needs none.
+    """
+    if not snapshot.storage.dataset_loaded and snapshot.storage.name != "mmap":
+        return
+    if LOCAL_ANSWERS_ENABLED:
+        get_query_engine(snapshot)
+    if AI_CONTEXT_MODE == "full":
+        get_sales_context(snapshot)
+    else:
+        get_context_retriever(snapshot).index()
+
+def publish_snapshot(snapshot: DataSnapshot):
+    """Make ``snapshot`` the one new requests read; a single reference assignment"""
+    global SNAPSHOT
+    SNAPSHOT = snapshot
+    DATA_SNAPSHOT_GENERATION.set(snapshot.generation)
+    DATA_SNAPSHOT_LOAD_SECONDS.set(snapshot.load_seconds)
+
+# Watches DATA_PATH and publishes a new snapshot when the file changes. Workers
+# sharing a mapped snapshot follow the generation counter bumped by the
+# supervisor (server.py) instead, which watches DATA_PATH for all of them
+DATA_RELOAD_ENABLED = os.getenv('DATA_RELOAD_ENABLED', 'true').lower() != 'false'
+if SNAPSHOT.storage.name == "mmap":
+    _generation = GenerationCounter.for_snapshot(SNAPSHOT.storage.path)
+    _watch = dict(path=SNAPSHOT.storage.path, signature=lambda path: _generation.read(), settle=False)
+else:
+    _watch = dict(path=DATA_PATH)
+DATA_RELOADER = DataReloader(
+    current=lambda: SNAPSHOT,
+    publish=publish_snapshot,
+    load=lambda storage: reload_storage(storage, DATA_PATH),
+    warm=warm_snapshot,
+    interval=float(os.getenv('DATA_RELOAD_INTERVAL', '1')),
+    on_reload=lambda outcome, seconds: DATA_RELOADS.inc(outcome=outcome),
+    **_watch,
+)
+
+# Builds the query engine and AI context and imports the Gemini SDK in a
+# background thread after startup, instead of on the first questions; the
+# instance reports itself not ready until this has finished
+WARMUP = Warmup(
+    [("snapshot", lambda: warm_snapshot(SNAPSHOT))]
+    + ([("gemini", AI_CLIENT.load_model)] if GEMINI_API_KEY else []),
+    enabled=os.getenv('STARTUP_WARMUP_ENABLED', 'true').lower() != 'false',
+)
+
+async def answer_without_llm(user_question: str, snapshot: DataSnapshot, data_version) -> Optional[str]:
+    """
+    The answer to a question that does not need Gemini: empty questions,
+    structured questions the local query engine understands, disabled AI
+    features and cached answers. None when Gemini has to be asked
+    """
+    # Validate input
+    if not user_question.strip():
+        return "Please ask a specific question about sales."
+
+    # Answer plain aggregations locally; open-ended questions go to Gemini
+    if LOCAL_ANSWERS_ENABLED:
+        if not snapshot.storage.dataset_loaded:
+            # The SQLite backend builds the in-memory view on the first question
+            await asyncio.to_thread(lambda: snapshot.storage.deal_store)
+        with SECTION_SECONDS.time(section="query_engine"):
+            local_answer = get_query_engine(snapshot).answer(user_question)
+        if local_answer is not None:
+            AI_ANSWERS.inc(source="local")
+            return local_answer
+
+    # Check if API key is configured
+    if not GEMINI_API_KEY:
+        return "AI features are currently unavailable. Please contact support."
+
+    # Serve repeated questions from the answer cache
+    cached_answer = ANSWER_CACHE.get(user_question, data_version)
+    if cached_answer is not None:
+        AI_ANSWERS.inc(source="cache")
+        return cached_answer
+    return None
+
+def rate_limit_exceeded(budget: str, wait: float) -> HTTPException:
+    RATE_LIMITED.inc(budget=budget, outcome="rejected")
+    retry_after = retry_after_header(wait)
+    detail = (f"AI request budget exhausted, retry in {retry_after} seconds" if budget == "upstream"
+              else f"Rate limit exceeded, retry in {retry_after} seconds")
+    return HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail,
+                         headers={"Retry-After": retry_after})
+
+async def route_question(user_question: str, snapshot: DataSnapshot, data_version, over_limit: float):
+    """
+    (answer, None) when the question can be answered without Gemini, else
+    (None, prompt) once the prompt fits in the upstream token budget.
+    ``over_limit`` is the client's wait from its AI budget: such a client is
+    still given local and cached answers, but raises 429 instead of calling Gemini
+    """
+    answer = await answer_without_llm(user_question, snapshot, data_version)
+    if answer is not None:
+        if over_limit:
+            RATE_LIMITED.inc(budget="ai", outcome="fallback")
+        return answer, None
+    if over_limit:
+        raise rate_limit_exceeded("ai", over_limit)
+
+    # Generate response with optimized prompt; the context build can
+    # rebuild the retrieval index, so keep it off the event loop
+    full_prompt = await asyncio.to_thread(build_ai_prompt, user_question, snapshot)
+    tokens = estimate_tokens(full_prompt) + AI_CLIENT.generation_config.get('max_output_tokens', 0)
+    wait = RATE_LIMITER.check("upstream", "gemini", tokens)
+    if wait:
+        raise rate_limit_exceeded("upstream", wait)
+    return None, full_prompt
 
 @app.post("/api/ai", response_model=AIResponse, tags=["AI"], summary="Get AI-powered answer to sales questions")
-async def ai_endpoint(question_data: AIQuestion):
+async def ai_endpoint(question_data: AIQuestion, request: Request):
     """
     Ask a question about sales data and get an AI-generated response.
     
@@ -253,62 +660,222 @@ async def ai_endpoint(question_data: AIQuestion):
     - Questions should be related to the available sales data
     - Responses are limited to 200 words for conciseness
     - If the Gemini API key is not configured, AI features will be unavailable
+    - Upstream calls are limited to `AI_MAX_CONCURRENCY` at a time and time out
+      after `AI_TIMEOUT_SECONDS`; identical questions asked concurrently share
+      a single upstream call
+    - Structured questions (totals, counts, averages, "which region/rep has
+      the most ...") are answered directly from the data without calling
+      Gemini, even when the API key is not configured; see `/api/ai/routing-stats`
+    - Gemini receives the team totals plus only the rep, region and client
+      summaries most relevant to the question (BM25 retrieval within
+      `AI_CONTEXT_TOKEN_BUDGET`), not the whole dataset
+    - Answers are cached per normalized question until the data changes;
+      see `/api/ai/cache-stats`
+    - Each question is charged to the client's AI budget
+      (`RATE_LIMIT_AI_PER_MINUTE`, `RATE_LIMIT_AI_BURST`) and each Gemini call
+      to the shared `AI_UPSTREAM_TOKENS_PER_MINUTE`
     
     ## Error Handling:
-    - Returns 200 with explanatory message if AI features are disabled
+    - Returns 429 with `Retry-After` if the client is over its AI budget and
+      the question needs Gemini, or if the upstream token budget is spent;
+      local and cached answers are still returned over the limit
+    - Returns 200 with explanatory message if AI features are disabled and the
+      question cannot be answered locally
     - Returns 200 with helpful message if question is empty
-    - Returns 200 with error message if processing fails
+    - Returns 200 with error message if processing fails or times out
     """
+    # Answer from the snapshot current on arrival, even if a reload lands meanwhile
+    snapshot = SNAPSHOT
+    over_limit = RATE_LIMITER.check("ai", identify_client(request.scope))
     try:
-        # Check if API key is configured
-        if not GEMINI_API_KEY:
-            return AIResponse(answer="AI features are currently unavailable. Please contact support.")
-
         user_question = question_data.question
-
-        # Validate input
-        if not user_question.strip():
-            return AIResponse(answer="Please ask a specific question about sales.")
-
-        # Select Gemini 2.0 Flash-Lite model
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
-
-        # Generate response with optimized prompt
-        full_prompt = f"""
-        Sales Context:
-        {SALES_CONTEXT}
-
-        Analyze and respond to this query concisely:
-        {user_question}
-
-        Guidelines:
-        - Be precise and data-driven
-        - Provide clear, actionable insights
-        - Limit response to 200 words
-        """
+        data_version = snapshot.storage.version
+        answer, full_prompt = await route_question(user_question, snapshot, data_version, over_limit)
+        if answer is not None:
+            return AIResponse(answer=answer)
         
-        # Generate response with reduced tokens and specificity
-        generation_config = {
-            'temperature': 0.5,  # Balanced creativity and factuality
-            'max_output_tokens': 200,  # Limit response length
-        }
-        
-        response = model.generate_content(
-            full_prompt, 
-            generation_config=generation_config
-        )
-
-        # Extract and return the AI's response
-        ai_answer = response.text.strip()
+        # Awaiting the client keeps the event loop free for other requests;
+        # identical concurrent questions share one upstream call
+        started = time.perf_counter()
+        try:
+            ai_answer = await AI_CLIENT.generate(full_prompt)
+        except asyncio.TimeoutError:
+            AI_UPSTREAM_SECONDS.observe(time.perf_counter() - started, outcome="timeout")
+            AI_UPSTREAM_ERRORS.inc(kind="timeout")
+            raise
+        except Exception:
+            AI_UPSTREAM_SECONDS.observe(time.perf_counter() - started, outcome="error")
+            AI_UPSTREAM_ERRORS.inc(kind="error")
+            raise
+        elapsed = time.perf_counter() - started
+        AI_UPSTREAM_SECONDS.observe(elapsed, outcome="success")
+        AI_ANSWERS.inc(source="llm")
+        ANSWER_CACHE.put(user_question, data_version, ai_answer, cost=elapsed)
         return AIResponse(answer=ai_answer)
 
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        print(f"AI endpoint timed out after {AI_CLIENT.timeout}s")
+        return AIResponse(answer="Sorry, the AI service took too long to respond. Please try again.")
     except Exception as e:
         # Comprehensive error handling
         print(f"Error in AI endpoint: {e}")
         return AIResponse(answer="Sorry, I'm having trouble processing your request right now.")
 
+def _sse(event: str, payload: Dict[str, Any]) -> str:
+    """One Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+async def _wait_for_disconnect(request: Request):
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+async def _until_disconnect(request: Request, events):
+    """
+    Relay ``events`` until the client goes away. A disconnect cancels the
+    pending step of ``events``, which closes the upstream Gemini stream
+    immediately instead of when the abandoned generator is collected
+    """
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(events.__anext__())
+            await asyncio.wait({step, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not step.done():
+                return
+            try:
+                event = step.result()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        # Also reached when the server cancels the response on its own
+        disconnected.cancel()
+        if step is not None and not step.done():
+            step.cancel()
+            await asyncio.gather(step, return_exceptions=True)
+        await events.aclose()
+
+@app.post("/api/ai/stream", tags=["AI"], summary="Stream an AI answer as Server-Sent Events", response_class=StreamingResponse)
+async def ai_stream_endpoint(question_data: AIQuestion, request: Request):
+    """
+    Streaming variant of `/api/ai`: same request body, but the answer is sent
+    as `text/event-stream` while Gemini generates it, so clients can render
+    the first words without waiting for the whole answer.
+    
+    ## Events:
+    - `token`: `{"text": "..."}`, the next piece of the answer
+    - `done`: `{"answer": "..."}`, the complete answer; always the last event on success
+    - `error`: `{"message": "..."}`, sent instead of `done` if the upstream call
+      fails or takes longer than `AI_TIMEOUT_SECONDS`
+    
+    Local, cached and "AI unavailable" answers arrive as a single `token`
+    followed by `done`. Completed answers are added to the answer cache like
+    the ones from `/api/ai`.
+    
+    ## Notes:
+    - Rate limits apply as on `/api/ai`: a 429 with `Retry-After` is returned
+      before the stream starts
+    - If the client disconnects, the upstream Gemini call is cancelled
+    - Time to first token is exported as `ai_time_to_first_token_seconds` on `/metrics`
+    - `/api/ai` keeps returning the complete `AIResponse` JSON
+    """
+    snapshot = SNAPSHOT
+    user_question = question_data.question
+    data_version = snapshot.storage.version
+    over_limit = RATE_LIMITER.check("ai", identify_client(request.scope))
+    # Routed before the response starts, so rate limits can still answer 429
+    failed = False
+    try:
+        answer, full_prompt = await route_question(user_question, snapshot, data_version, over_limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in AI stream endpoint: {e}")
+        answer, full_prompt, failed = None, None, True
+
+    async def events():
+        if failed:
+            yield _sse("error", {"message": "Sorry, I'm having trouble processing your request right now."})
+            return
+        if answer is not None:
+            yield _sse("token", {"text": answer})
+            yield _sse("done", {"answer": answer})
+            return
+
+        parts = []
+        outcome = "cancelled"
+        started = time.perf_counter()
+        try:
+            async with aclosing(AI_CLIENT.stream(full_prompt)) as chunks:
+                async for text in chunks:
+                    if not parts:
+                        AI_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started)
+                    parts.append(text)
+                    yield _sse("token", {"text": text})
+            outcome = "success"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            print(f"AI stream timed out after {AI_CLIENT.timeout}s")
+        except Exception as e:
+            outcome = "error"
+            print(f"Error in AI stream endpoint: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            AI_UPSTREAM_SECONDS.observe(elapsed, outcome=outcome)
+            if outcome in ("timeout", "error"):
+                AI_UPSTREAM_ERRORS.inc(kind=outcome)
+
+        if outcome == "timeout":
+            yield _sse("error", {"message": "Sorry, the AI service took too long to respond. Please try again."})
+        elif outcome == "error":
+            yield _sse("error", {"message": "Sorry, I'm having trouble processing your request right now."})
+        else:
+            ai_answer = "".join(parts).strip()
+            AI_ANSWERS.inc(source="llm")
+            ANSWER_CACHE.put(user_question, data_version, ai_answer, cost=elapsed)
+            yield _sse("done", {"answer": ai_answer})
+
+    return StreamingResponse(
+        _until_disconnect(request, events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/ai/routing-stats", tags=["AI"], summary="AI question routing statistics")
+def get_ai_routing_stats():
+    """
+    How many AI questions were answered by the local query engine.
+    
+    ## Response Details:
+    - `localAnswers`: Questions answered directly from the data
+    - `llmFallbacks`: Questions forwarded to Gemini
+    - `routingRate`: Share of questions answered locally
+    - `intents`: Local answers per recognized question shape
+    
+    Counted since the process started, across data reloads and writes.
+    """
+    return QUERY_ROUTING.stats()
+
+@app.get("/api/ai/cache-stats", tags=["AI"], summary="AI answer cache statistics")
+def get_ai_cache_stats():
+    """
+    Hit/miss counters of the AI answer cache.
+    
+    ## Response Details:
+    - `entries` / `bytes`: Current cache size
+    - `exactHits`: Answers served for the same normalized question
+    - `similarHits`: Answers served for a similar question (when `AI_CACHE_SIMILARITY` is set)
+    - `misses`: Questions forwarded to Gemini
+    - `evictions` / `expirations` / `invalidations`: Entries dropped by the size caps, the TTL or data changes
+    - `upstreamCallsSaved` / `latencySavedSeconds`: Gemini calls and upstream latency avoided by cache hits
+    """
+    return ANSWER_CACHE.stats()
+
 @app.get("/api/sales-analytics", response_model=SalesAnalytics, tags=["Analytics"], summary="Get sales analytics metrics")
-def get_sales_analytics():
+def get_sales_analytics(request: Request):
     """
     Provide aggregated sales analytics based on the sales representatives data.
     
@@ -331,34 +898,96 @@ def get_sales_analytics():
     - Sales performance monitoring
     - Regional distribution analysis
     - Executive reporting
+    
+    ## Caching:
+    The encoded response is cached until the data changes and carries a strong
+    `ETag`; requests sending a matching `If-None-Match` get an empty 304.
+    MessagePack and Arrow are served on request through `Accept`, as for `/api/data`.
+    """
+    storage = SNAPSHOT.storage
+
+    def build_analytics():
+        with SECTION_SECONDS.time(section="analytics"):
+            return SalesAnalytics(**storage.analytics()).model_dump()
+
+    # Running aggregates in memory, or a GROUP BY over indexed columns in SQLite
+    return RESPONSE_CACHE.respond(request, storage.version, build_analytics)
+
+@app.get("/api/sales-analytics/consistency", response_model=ConsistencyReport, tags=["Analytics"], summary="Verify incremental analytics")
+def check_sales_analytics_consistency():
     """
-    sales_reps = DUMMY_DATA.get('salesReps', [])
+    Compare the incrementally maintained analytics against a full recompute.
+    
+    The recompute walks the raw sales data, so this endpoint costs time
+    proportional to the dataset size and is intended for diagnostics only.
     
-    # Calculate total deals and their statuses
-    total_deals = []
-    deal_status_summary = {
-        "Closed Won": 0,
-        "In Progress": 0,
-        "Closed Lost": 0
+    ## Response Details:
+    - `consistent`: True when the running aggregates match the recompute
+    - `mismatches`: Description of every field that differs
+    """
+    mismatches = SNAPSHOT.storage.check_consistency()
+    return ConsistencyReport(consistent=not mismatches, mismatches=mismatches)
+
+@app.get("/api/analytics/groupby", response_model=GroupByResult, tags=["Analytics"], summary="Grouped deal analytics")
+def group_by_analytics(
+    request: Request,
+    by: str = Query(..., description=f"Comma separated dimensions to group by: {', '.join(DIMENSIONS)}"),
+):
+    """
+    Deal count, total, average, minimum and maximum value per group, for any
+    combination of the dimensions `region`, `status`, `rep` (rep id), `role`
+    and `industry` (the client's industry, `Unknown` for unlisted clients).
+    
+    Example: `/api/analytics/groupby?by=region,status`
+    
+    ## Response:
+    ```json
+    {
+      "dimensions": ["region", "status"],
+      "source": "cube",
+      "groups": [
+        {"region": "Europe", "status": "Closed Won", "count": 3, "sum": 360000,
+         "avg": 120000.0, "min": 90000, "max": 150000}
+      ]
     }
-    total_deal_value = 0
-    
-    for rep in sales_reps:
-        for deal in rep.get('deals', []):
-            total_deals.append(deal)
-            deal_status_summary[deal['status']] += 1
-            total_deal_value += deal['value']
-    
-    return SalesAnalytics(
-        totalDealCount=len(total_deals),
-        dealStatusSummary=deal_status_summary,
-        totalDealValue=total_deal_value,
-        averageDealValue=total_deal_value / len(total_deals) if total_deals else 0,
-        regionDistribution=list(set(rep['region'] for rep in sales_reps))
-    )
+    ```
+    Groups are sorted by their dimension values in the requested order.
+    
+    ## Performance:
+    Common combinations are precomputed as rollup cubes when the data is
+    loaded and updated on every deal write; any subset of a cube's
+    dimensions is rolled up from it (`source: cube`). Other combinations
+    fall back to a vectorized scan of the deal columns (`source: scan`).
+    The SQLite backend aggregates with a single GROUP BY (`source: sql`).
+    
+    ## HTTP Status Codes:
+    - 200: Groups returned
+    - 304: Unchanged since the `ETag` sent in `If-None-Match`
+    - 400: Missing, unknown or repeated dimension
+    """
+    dimensions = _parse_dimensions(by)
+    storage = SNAPSHOT.storage
+    return RESPONSE_CACHE.respond(request, storage.version, lambda: storage.group_by(dimensions))
+
+def _parse_dimensions(by: str) -> List[str]:
+    """Validate a comma separated list of group-by dimensions"""
+    selected = [dimension.strip() for dimension in by.split(",") if dimension.strip()]
+    unknown = [dimension for dimension in selected if dimension not in DIMENSIONS]
+    if not selected or unknown or len(set(selected)) != len(selected):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid dimensions: {by!r}. Choose distinct dimensions from: {', '.join(DIMENSIONS)}",
+        )
+    return selected
 
 @app.get("/api/data", tags=["Data"], summary="Get all sales representatives data")
-def get_data():
+def get_data(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as `nextCursor` by the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of sales representatives per page"),
+    fields: Optional[str] = Query(None, description="Comma separated rep fields to include, e.g. `id,name,region`"),
+    format: Literal["json", "ndjson"] = Query("json", description="`ndjson` streams one sales representative per line"),
+):
     """
     Returns complete sales representatives data from the database.
     
@@ -402,8 +1031,251 @@ def get_data():
     - Deal tracking interfaces
     - Client relationship management
     - Performance analysis dashboards
+    
+    ## Pagination, Projection and Streaming:
+    - Without parameters the full dataset is returned, as above
+    - `limit` pages through the reps; the response then also contains
+      `nextCursor`, to be passed as `cursor` for the next page (null on the last page)
+    - `fields` keeps only the listed rep fields, e.g. `fields=id,name,region`
+      to skip the `deals` and `clients` lists
+    - `format=ndjson` streams one JSON encoded rep per line
+      (`application/x-ndjson`), honouring `cursor`, `limit` and `fields`.
+      Reps are encoded one at a time, so server memory stays flat as the
+      dataset grows
+    
+    ## Formats and Compression:
+    The format follows the `Accept` header: `application/json` (default),
+    `application/msgpack` (same structure, smaller and faster to decode) or
+    `application/vnd.apache.arrow.stream` for bulk export, an Arrow IPC
+    stream with one row per rep (`deals`, `skills` and `clients` as list
+    columns) and `nextCursor` kept in the schema metadata. Bodies of at least
+    `COMPRESSION_MIN_SIZE` bytes are sent with `Content-Encoding: br` or `gzip`
+    when `Accept-Encoding` allows it. The same negotiation applies to the
+    analytics, group-by, sales rep and deal queries.
+    
+    ## Caching:
+    Responses are cached pre-encoded per query, format and compression until
+    the data changes, so every representation is encoded and compressed once
+    per data version. Each carries its own strong `ETag`; requests sending a
+    matching `If-None-Match` get an empty 304.
+    
+    ## HTTP Status Codes:
+    - 200: Data returned
+    - 304: Data unchanged since the `ETag` sent in `If-None-Match`
+    - 400: Invalid cursor, `cursor` without `limit` or unknown field
     """
-    return DUMMY_DATA
+    storage = SNAPSHOT.storage
+    if cursor is None and limit is None and fields is None and format == "json":
+        return RESPONSE_CACHE.respond(request, storage.version, storage.load_data)
+    if cursor is not None and limit is None:
+        # Cursors are only issued for bounded pages; the rest of the data is not one
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor requires limit")
+
+    start = _decode_cursor(cursor)
+    projection = _parse_fields(fields)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            (json.dumps(rep, separators=(",", ":")) + "\n" for rep in storage.iter_reps(start, limit, projection)),
+            media_type="application/x-ndjson",
+        )
+
+    def build_page():
+        reps = list(storage.iter_reps(start, limit, projection))
+        end = start + len(reps)
+        return {
+            "salesReps": reps,
+            "nextCursor": str(end) if limit is not None and end < storage.rep_count else None,
+        }
+
+    return RESPONSE_CACHE.respond(request, storage.version, build_page)
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    """Turn a `nextCursor` value back into a rep offset"""
+    if cursor is None:
+        return 0
+    if not cursor.isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return int(cursor)
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a comma separated `fields` projection"""
+    if fields is None:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in REP_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(REP_FIELDS)}",
+        )
+    return selected
+
+@app.get("/api/sales-reps", tags=["Data"], summary="Query sales representatives")
+def query_sales_reps(
+    request: Request,
+    region: Optional[str] = Query(None, description="Only reps in this region, e.g. `Europe`"),
+    skill: Optional[str] = Query(None, description="Only reps with this skill (case-insensitive)"),
+    sort: Literal[REP_SORT_KEYS] = Query("id", description="Sort key; a leading `-` sorts descending"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of sales representatives returned"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as `nextCursor` by the previous page"),
+    fields: Optional[str] = Query(None, description="Comma separated rep fields to include, e.g. `id,name,region`"),
+):
+    """
+    Sales representatives filtered by region and skill, sorted and limited on
+    the server.
+    
+    Filters are answered from prebuilt secondary indexes (region -> reps and
+    an inverted skill index), so a single-region query costs time
+    proportional to the number of reps in that region, not to the dataset.
+    
+    ## Response:
+    `{"salesReps": [...], "nextCursor": ...}` with reps in the `/api/data`
+    format, restricted to `fields` when given. `nextCursor` is passed as
+    `cursor` to fetch the next `limit` matches (null on the last page); ties
+    in the sort key keep file order, so pages never overlap.
+    
+    ## HTTP Status Codes:
+    - 200: Matching reps returned (possibly none)
+    - 304: Unchanged since the `ETag` sent in `If-None-Match`
+    - 400: Invalid cursor or unknown field
+    """
+    start = _decode_cursor(cursor)
+    projection = _parse_fields(fields)
+    storage = SNAPSHOT.storage
+
+    def build_page():
+        # One extra match tells whether another page follows
+        reps = storage.query_reps(region, skill, sort, limit + 1, projection, start)
+        return {
+            "salesReps": reps[:limit],
+            "nextCursor": str(start + limit) if len(reps) > limit else None,
+        }
+
+    return RESPONSE_CACHE.respond(request, storage.version, build_page)
+
+@app.get("/api/deals", response_model=DealList, tags=["Data"], summary="Query deals")
+def query_deals(
+    request: Request,
+    status: Optional[DealStatus] = Query(None, description="Only deals with this status"),
+    region: Optional[str] = Query(None, description="Only deals of reps in this region"),
+    skill: Optional[str] = Query(None, description="Only deals of reps with this skill (case-insensitive)"),
+    rep_id: Optional[int] = Query(None, description="Only deals of this sales representative"),
+    min_value: Optional[float] = Query(None, ge=0, description="Smallest deal value included"),
+    max_value: Optional[float] = Query(None, ge=0, description="Largest deal value included"),
+    sort: Literal[DEAL_SORT_KEYS] = Query("-value", description="Sort key; a leading `-` sorts descending"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of deals returned"),
+):
+    """
+    Deals filtered by status, region, skill, rep and value range, sorted and
+    limited on the server.
+    
+    Backed by secondary indexes (status -> deals, a sorted value index and the
+    rep region/skill indexes). A top-N query such as
+    `/api/deals?status=Closed Won&sort=-value&limit=10` walks the value index
+    from the top and stops after `limit` matches, so its cost is proportional
+    to the result rather than to the number of deals.
+    
+    ## Response:
+    `{"deals": [{"id", "client", "value", "status", "repId"}, ...]}`
+    
+    ## HTTP Status Codes:
+    - 200: Matching deals returned (possibly none)
+    - 304: Unchanged since the `ETag` sent in `If-None-Match`
+    """
+    storage = SNAPSHOT.storage
+    return RESPONSE_CACHE.respond(
+        request, storage.version,
+        lambda: {"deals": storage.query_deals(status, region, skill, rep_id, min_value, max_value, sort, limit)},
+    )
+
+
+@app.post("/api/sales-reps/{rep_id}/deals", response_model=Deal, status_code=status.HTTP_201_CREATED, tags=["Data"], summary="Create a deal")
+def create_deal(rep_id: int, deal: DealInput):
+    """
+    Add a new deal to a sales representative.
+    
+    Analytics are updated incrementally, so the change is visible immediately
+    in `/api/sales-analytics` and `/api/data`.
+    
+    ## HTTP Status Codes:
+    - 201: Deal created
+    - 404: Sales representative not found
+    - 409: The data is served read-only from a shared snapshot (multi-worker mode)
+    """
+    try:
+        return SNAPSHOT.storage.create_deal(rep_id, deal.client, _deal_value(deal.value), deal.status)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Sales representative {rep_id} not found")
+    except ReadOnlyStorageError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+@app.put("/api/deals/{deal_id}", response_model=Deal, tags=["Data"], summary="Update a deal")
+def update_deal(deal_id: int, deal: DealInput):
+    """
+    Replace the client, value and status of an existing deal.
+    
+    ## HTTP Status Codes:
+    - 200: Deal updated
+    - 404: Deal not found
+    - 409: The data is served read-only from a shared snapshot (multi-worker mode)
+    """
+    try:
+        return SNAPSHOT.storage.update_deal(deal_id, deal.client, _deal_value(deal.value), deal.status)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Deal {deal_id} not found")
+    except ReadOnlyStorageError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+@app.delete("/api/deals/{deal_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Data"], summary="Delete a deal")
+def delete_deal(deal_id: int):
+    """
+    Remove a deal.
+    
+    ## HTTP Status Codes:
+    - 204: Deal deleted
+    - 404: Deal not found
+    - 409: The data is served read-only from a shared snapshot (multi-worker mode)
+    """
+    try:
+        SNAPSHOT.storage.delete_deal(deal_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Deal {deal_id} not found")
+    except ReadOnlyStorageError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+@app.get("/api/data/snapshot", tags=["Data"], summary="Loaded data snapshot")
+def get_data_snapshot():
+    """
+    The data snapshot currently served and the state of the file watcher.
+    
+    When `DATA_RELOAD_ENABLED` is on (the default), the data file is polled
+    every `DATA_RELOAD_INTERVAL` seconds. A change is parsed, and the
+    derived structures (aggregates, indexes, rollup cubes, AI context) are
+    rebuilt off the event loop, before the new snapshot replaces the current
+    one in a single step. Requests already running finish on the snapshot
+    they started with, and a file that fails to parse keeps the current data.
+    Deals written through the API are replaced by the file's contents on reload.
+    
+    Under `server.py` the workers share a memory-mapped snapshot file instead:
+    the supervisor watches the data file, writes a new snapshot and bumps a
+    shared generation counter, and every worker switches to the new file on
+    its next poll.
+    
+    ## Response Details:
+    - `generation`: 0 for the data loaded at startup, +1 per reload (the
+      supervisor's counter for workers sharing a snapshot)
+    - `dataVersion`: Version the response caches are keyed on; it only ever increases
+    - `loadSeconds`: Time spent parsing and warming the snapshot
+    - `worker`: Process id of the worker that answered
+    - `reloader`: `reloads`, `failures` and `lastError` of the file watcher
+    """
+    snapshot = SNAPSHOT
+    return {**snapshot.info(), "worker": os.getpid(), "reloader": DATA_RELOADER.stats()}
+
+def _deal_value(value: float):
+    """Store whole-dollar values as integers, like the source data"""
+    return int(value) if value.is_integer() else value
 
 
 @app.get("/health", tags=["System"], summary="API health check")
@@ -412,6 +1284,10 @@ async def health_check():
     Comprehensive health check endpoint that verifies API is running
     along with critical dependencies and services.
     
+    System metrics and dependency checks are sampled by a background task
+    (every `HEALTH_SAMPLE_INTERVAL` / `HEALTH_DEPENDENCY_INTERVAL` seconds);
+    this endpoint only reads the latest snapshot and performs no I/O.
+    
     ## Response Structure:
     - `status`: Overall health status ("healthy", "degraded", or "unhealthy")
     - `timestamp`: Unix timestamp when health check was performed
@@ -420,96 +1296,23 @@ async def health_check():
       - `datastore`: Status of the data storage system
       - `gemini_api`: Status and response time of the Gemini API
       - `system`: System resources like CPU and memory usage
+      - `warmup`: The background warmup after startup; `pending` until the
+        query engine, AI context and Gemini model are built, then `up` with
+        the seconds spent per step (`failed` if a step failed, which does
+        not degrade the service)
+      
+      Every component reports `age`, the seconds since it was sampled. A
+      component older than its staleness threshold is reported as `stale`.
     
     ## HTTP Status Codes:
     - 200: API is fully operational
-    - 503: API is running but one or more components are degraded or unavailable
+    - 503: API is running but one or more components are degraded, stale or unavailable
     
     This endpoint is designed to work with frontend health monitoring components
     and automated health check systems.
     """
-    import time
-    import psutil
-    
-    health_data = {
-        "status": "healthy",
-        "timestamp": time.time(),
-        "version": "1.0.0",
-        "components": {}
-    }
-    
-    # Add system metrics
-    try:
-        health_data["components"]["system"] = {
-            "status": "up",
-            "memory": {
-                "total": psutil.virtual_memory().total,
-                "available": psutil.virtual_memory().available,
-                "percent": psutil.virtual_memory().percent
-            },
-            "cpu": {
-                "usage": psutil.cpu_percent(interval=0.1),
-                "cores": psutil.cpu_count(logical=True)
-            }
-        }
-    except Exception as e:
-        health_data["components"]["system"] = {
-            "status": "up",  # Still up even if we can't get detailed metrics
-            "memory": {
-                "total": 0,
-                "available": 0,
-                "percent": 0
-            },
-            "cpu": {
-                "usage": 0,
-                "cores": 0
-            },
-            "error": str(e)
-        }
-    
-    # Check file system access
-    try:
-        start_time = time.time()
-        with open("dummyData.json", "r") as f:
-            pass
-        response_time = time.time() - start_time
-        
-        health_data["components"]["datastore"] = {
-            "status": "up",
-            "type": "file",
-            "responseTime": round(response_time * 1000, 2)
-        }
-    except Exception as e:
-        health_data["components"]["datastore"] = {
-            "status": "down",
-            "type": "file",
-            "error": str(e)
-        }
-        health_data["status"] = "degraded"
-    
-    # Check Gemini API connectivity
-    if GEMINI_API_KEY:
-        try:
-            model = genai.GenerativeModel('gemini-2.0-flash-lite')
-            start_time = time.time()
-            model_info = model.count_tokens("test")
-            response_time = time.time() - start_time
-            
-            health_data["components"]["gemini_api"] = {
-                "status": "up",
-                "responseTime": round(response_time * 1000, 2)
-            }
-        except Exception as e:
-            health_data["components"]["gemini_api"] = {
-                "status": "down",
-                "error": str(e)
-            }
-            health_data["status"] = "degraded"
-    else:
-        health_data["components"]["gemini_api"] = {
-            "status": "disabled",
-            "reason": "API key not configured"
-        }
+    health_data = HEALTH_MONITOR.snapshot()
+    health_data["version"] = app.version
     
     # Determine response status code
     response_status = status.HTTP_200_OK
@@ -521,5 +1324,57 @@ async def health_check():
         status_code=response_status
     )
 
+@app.get("/metrics", tags=["System"], summary="Prometheus metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Metrics in the Prometheus text exposition format.
+    
+    ## Exported Metrics:
+    - `http_requests_total`: Requests by method, route template and status
+    - `http_request_duration_seconds`: Latency histogram by method, route and status
+    - `http_requests_in_flight`: Requests currently being handled
+    - `http_response_size_bytes`: Response body size histogram by route
+    - `app_section_duration_seconds`: Time spent in hot sections (analytics,
+      response encoding per path, AI context build, local query engine)
+    - `ai_upstream_duration_seconds` / `ai_upstream_errors_total`: Gemini call
+      latency by outcome and failures by kind
+    - `ai_answers_total`: AI answers by source (local, cache, llm)
+    - `ai_time_to_first_token_seconds`: Time until Gemini's first chunk on `/api/ai/stream`
+    - `data_snapshot_generation` / `data_snapshot_load_seconds`: Published
+      data snapshot and how long it took to load and warm
+    - `data_reloads_total`: Hot reloads of the data file by outcome
+    """
+    return PlainTextResponse(METRICS.render(), media_type=Registry.content_type)
+
+@app.get("/livez", tags=["System"], summary="Liveness probe")
+async def liveness_probe():
+    """
+    Constant-time liveness probe: answers as long as the event loop is
+    responsive. Performs no I/O and checks no dependencies.
+    """
+    return {"status": "alive"}
+
+@app.get("/readyz", tags=["System"], summary="Readiness probe")
+async def readiness_probe():
+    """
+    Readiness probe backed by the cached health snapshot.
+    
+    ## HTTP Status Codes:
+    - 200: All components are up and their samples are fresh
+    - 503: A component is down, a sample is older than its staleness
+      threshold, the first samples have not been taken yet, or the startup
+      warmup is still running
+    """
+    snapshot = HEALTH_MONITOR.snapshot()
+    ready = snapshot["status"] == "healthy"
+    return JSONResponse(
+        content={
+            "status": "ready" if ready else "not ready",
+            "components": {name: component["status"] for name, component in snapshot["components"].items()},
+        },
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+Lightweight Prometheus-style metrics.
+
+A minimal, dependency-free implementation of counters, gauges and
+histograms with labels, rendered in the Prometheus text exposition format,
+plus an ASGI middleware that records per-route request counts, latency,
+in-flight requests and response sizes.
+
+Recording a sample is a dict lookup and a couple of additions under a lock,
+so the instrumentation is cheap enough to leave on in production.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond handlers to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Payload size buckets in bytes, 100 B to 100 MB
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple([str(labels.get(name, "")) for name in self.labelnames])
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self):
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total[0])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together on ``/metrics``."""
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency, in-flight requests and
+    response size per route template and status code.
+    """
+
+    def __init__(self, app, registry: Registry, enabled: bool = True):
+        self.app = app
+        self.enabled = enabled
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "HTTP requests currently being handled", ("method",))
+        self.response_size = registry.histogram(
+            "http_response_size_bytes", "HTTP response body size", ("route",), buckets=SIZE_BUCKETS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight.dec(method=method)
+            # Route templates keep label cardinality bounded; unknown paths share one label
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            self.requests.inc(method=method, route=route, status=status_code)
+            self.latency.observe(elapsed, method=method, route=route, status=status_code)
+            self.response_size.observe(size, route=route)
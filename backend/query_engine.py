@@ -0,0 +1,361 @@
+"""
+Deterministic answers for structured sales questions.
+
+Many ``/api/ai`` questions are plain aggregations ("total value of closed
+deals", "which region has the most in-progress deals"). ``QueryEngine``
+recognizes those shapes with a small intent/slot parser and answers them from
+the columnar ``DealStore`` in microseconds; anything it does not recognize is
+left to the LLM.
+
+The parser only answers when it understood the whole question: every word
+has to be consumed by an intent, status or metric phrase, a known rep or
+region name, or a small set of filler words. Questions with a qualifier
+the engine cannot apply (a negation, a comparison, a number or date, an
+unknown name such as a client) go to the LLM rather than being answered for
+a broader question. A bare "closed" covers both closed statuses, won and
+lost.
+
+Supported intents:
+
+- ``aggregate``: count / total / average of deals, optionally filtered by
+  status, region and rep
+- ``rank``: the region or rep with the highest (or lowest) deal count or
+  value, optionally filtered by status and region ("top performer" ranks reps
+  by Closed Won value)
+- ``rep_count``: number of sales representatives, optionally per region
+"""
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from answer_cache import normalize_question
+from deal_store import DealStore
+
+# Questions containing these words ask for judgement, not arithmetic
+_OPEN_ENDED = re.compile(
+    r"\b(why|how can|how should|should|compare|comparison|versus|vs|recommend|improve|strategy|"
+    r"skills?|trend|explain|insight|advice|suggest|industry|industries|client|clients)\b"
+)
+# Every closed deal, won or lost; a status filter of its own
+CLOSED = "Closed"
+_CLOSED_STATUSES = ("Closed Won", "Closed Lost")
+_STATUS_PATTERNS = (
+    (CLOSED, re.compile(r"\bclosed\b(?! (won|lost)\b)")),
+    ("Closed Won", re.compile(r"\b(closed won|won|successful)\b")),
+    ("Closed Lost", re.compile(r"\b(closed lost|lost|lose|losing)\b")),
+    ("In Progress", re.compile(r"\b(in progress|in-progress|open|ongoing|pipeline|running)\b")),
+)
+_AVERAGE = re.compile(r"\b(average|mean|avg)\b")
+_COUNT = re.compile(r"\b(how many|number of|count)\b")
+_TOTAL = re.compile(r"\b(total|sum|how much|revenue|value|worth)\b")
+_DEALS = re.compile(r"\b(deals?|sales|revenue|value|pipeline)\b")
+_REPS = re.compile(r"\b(sales reps?|reps?|representatives?|salespeople|people|team members?)\b")
+_WHICH_REGION = re.compile(r"\b(which|what) regions?\b")
+_WHICH_REP = re.compile(r"\b(who|which (sales )?reps?|which representatives?|which salesperson)\b")
+_TOP_PERFORMER = re.compile(r"\b(top|best|leading) (performer|performing|seller|sales ?rep|rep)\b")
+_LOWEST = re.compile(r"\b(least|lowest|fewest|smallest|worst|minimum)\b")
+# Longest list of tied names spelled out in a ranking answer
+MAX_TIED_NAMES = 5
+
+_HIGHEST = re.compile(r"\b(most|highest|largest|biggest|best|maximum|top|leading)\b")
+
+_NEGATION = re.compile(
+    r"\b(not|no|non|none|never|outside|excluding|exclude|excluded|except|without|other than|besides|"
+    r"apart from|aside from|neither|nor|\w+n t)\b"
+)
+# Thresholds, numbers and time ranges the engine cannot filter by
+_QUALIFIER = re.compile(
+    r"\d|\b(above|below|over|under|more than|less than|greater than|fewer than|at least|at most|between|"
+    r"exceed\w*|before|after|since|until|during|last|past|previous|this|next|ytd|quarters?|months?|"
+    r"years?|weeks?|today|yesterday)\b"
+)
+# Phrases the intent, metric and status slots are read from, longest first
+_SLOT_PATTERNS = (_TOP_PERFORMER, _WHICH_REGION, _WHICH_REP, _REPS) + tuple(
+    pattern for _, pattern in _STATUS_PATTERNS) + (_AVERAGE, _COUNT, _TOTAL, _DEALS, _LOWEST, _HIGHEST)
+# Words that do not change the meaning of a structured question
+_FILLER = frozenset(
+    "a an the of in on at for to by from with and is are was were be been being do does did has have had "
+    "there here what whats which who s me tell show give find please us our we i you currently current "
+    "overall all across combined now region regions team company".split()
+)
+
+
+def _fold(text: str) -> str:
+    """Normalize and treat hyphens as spaces so 'asia-pacific' == 'asia pacific'."""
+    return normalize_question(text).replace("-", " ")
+
+
+def format_money(value) -> str:
+    value = float(value)
+    return f"${value:,.0f}" if value.is_integer() else f"${value:,.2f}"
+
+
+def _plural(count: int, noun: str) -> str:
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+
+@dataclass
+class ParsedQuery:
+    intent: str
+    metric: str = "count"
+    status: Optional[str] = None
+    region: Optional[str] = None
+    rep: Optional[int] = None
+    group_by: Optional[str] = None
+    descending: bool = True
+
+
+class RoutingStats:
+    """
+    How many questions were answered locally and how many went to the LLM.
+    Shared by the engines of successive data snapshots, so the counts survive
+    reloads and deal writes.
+    """
+
+    def __init__(self):
+        self.local_answers = 0
+        self.fallbacks = 0
+        self.intent_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: Optional[ParsedQuery]):
+        with self._lock:
+            if query is None:
+                self.fallbacks += 1
+            else:
+                self.local_answers += 1
+                self.intent_counts[query.intent] = self.intent_counts.get(query.intent, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.local_answers + self.fallbacks
+            return {
+                "localAnswers": self.local_answers,
+                "llmFallbacks": self.fallbacks,
+                "routingRate": self.local_answers / total if total else 0.0,
+                "intents": dict(self.intent_counts),
+            }
+
+
+class QueryEngine:
+    """Parses structured questions and executes them over a ``DealStore``."""
+
+    def __init__(self, store: DealStore, routing: Optional[RoutingStats] = None):
+        self.store = store
+        self.routing = routing if routing is not None else RoutingStats()
+        self._names: Dict[str, Any] = {}
+        self._names_built_for = None
+
+    def _name_index(self) -> Dict[str, Any]:
+        """Folded region/rep name -> ("region", name) or ("rep", position)."""
+        key = (len(self.store.regions), len(self.store.reps))
+        if key != self._names_built_for:
+            names = {}
+            for position, rep in enumerate(self.store.reps):
+                names.setdefault(_fold(rep['name']), ("rep", position))
+            # Regions win over reps that happen to share a name
+            for region in self.store.regions.values:
+                names[_fold(region)] = ("region", region)
+            self._names = names
+            self._names_built_for = key
+        return self._names
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+    def _match_names(self, text: str):
+        """
+        Find the first region and rep named in ``text`` via word n-gram
+        lookups; returns them with the text left once their names are removed
+        """
+        names = self._name_index()
+        words = text.split()
+        region = rep = None
+        consumed = set()
+        for length in (4, 3, 2, 1):
+            for start in range(len(words) - length + 1):
+                span = range(start, start + length)
+                if consumed.intersection(span):
+                    continue
+                match = names.get(" ".join(words[start:start + length]))
+                if match is None:
+                    continue
+                kind, value = match
+                if kind == "region" and region is None:
+                    region = value
+                elif kind == "rep" and rep is None:
+                    rep = value
+                else:
+                    # A second region or rep is a filter the engine cannot apply
+                    continue
+                consumed.update(span)
+        rest = " ".join(word for position, word in enumerate(words) if position not in consumed)
+        return region, rep, rest
+
+    @staticmethod
+    def _fully_consumed(text: str) -> bool:
+        """True if nothing but slot phrases and filler words is left in ``text``."""
+        for pattern in _SLOT_PATTERNS:
+            text = pattern.sub(" ", text)
+        return all(word in _FILLER for word in text.split())
+
+    def parse(self, question: str) -> Optional[ParsedQuery]:
+        """
+        Return the structured form of ``question``, or None if it is
+        open-ended or has a part the engine would have to ignore
+        """
+        text = _fold(question)
+        if not text or _OPEN_ENDED.search(text) or _NEGATION.search(text) or _QUALIFIER.search(text):
+            return None
+
+        region, rep, rest = self._match_names(text)
+        if not self._fully_consumed(rest):
+            return None
+        statuses = [status for status, pattern in _STATUS_PATTERNS if pattern.search(text)]
+        if len(statuses) > 1:
+            return None
+        status = statuses[0] if statuses else None
+
+        if _TOP_PERFORMER.search(text):
+            # Ranked by won value; a rep filter, count or average would be ignored
+            if rep is not None or _COUNT.search(text) or _AVERAGE.search(text):
+                return None
+            return ParsedQuery("rank", metric="sum", status=status or "Closed Won", region=region, group_by="rep")
+
+        if _WHICH_REGION.search(text) or _WHICH_REP.search(text):
+            group_by = "region" if _WHICH_REGION.search(text) else "rep"
+            if not (_HIGHEST.search(text) or _LOWEST.search(text)) or rep is not None or _AVERAGE.search(text):
+                return None
+            if _COUNT.search(text) or re.search(r"\b(most|fewest|least) (\w+ ){0,3}deals\b", text):
+                metric = "count"
+            elif _TOTAL.search(text):
+                metric = "sum"
+            else:
+                metric = "count"
+            return ParsedQuery("rank", metric=metric, status=status, region=region, group_by=group_by,
+                               descending=not _LOWEST.search(text))
+
+        if _COUNT.search(text) and _REPS.search(text) and not re.search(r"\bdeals?\b", text):
+            if rep is not None or status is not None:
+                return None
+            return ParsedQuery("rep_count", region=region)
+
+        # "Highest deal value" asks for one deal, not a total
+        if not _DEALS.search(text) or _HIGHEST.search(text) or _LOWEST.search(text):
+            return None
+        if _AVERAGE.search(text):
+            metric = "avg"
+        elif _COUNT.search(text):
+            metric = "count"
+        elif _TOTAL.search(text):
+            metric = "sum"
+        else:
+            return None
+        return ParsedQuery("aggregate", metric=metric, status=status, region=region, rep=rep)
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+    def _mask(self, columns, status=None, region=None, rep=None):
+        mask = np.ones(columns["values"].shape[0], dtype=bool)
+        if status == CLOSED:
+            codes = [self.store.statuses.code(closed) for closed in _CLOSED_STATUSES]
+            mask &= np.isin(columns["status_codes"], codes)
+        elif status is not None:
+            mask &= columns["status_codes"] == self.store.statuses.code(status)
+        if region is not None:
+            mask &= columns["region_codes"] == self.store.regions.code(region)
+        if rep is not None:
+            mask &= columns["rep_index"] == rep
+        return mask
+
+    @staticmethod
+    def _describe(query: ParsedQuery, rep_name: Optional[str] = None, qualify_all: bool = True) -> str:
+        if query.status == CLOSED:
+            words = ["closed (won or lost)"]
+        else:
+            words = [query.status] if query.status else (["all"] if qualify_all else [])
+        words.append("deals")
+        if rep_name:
+            words.append(f"owned by {rep_name}")
+        if query.region:
+            words.append(f"in {query.region}")
+        return " ".join(words)
+
+    def _closed_split(self, query: ParsedQuery, columns, measure) -> str:
+        """`` (Closed Won: ..., Closed Lost: ...)`` for a question about all closed deals."""
+        if query.status != CLOSED:
+            return ""
+        parts = [f"{status}: {measure(self._mask(columns, status, query.region, query.rep))}"
+                 for status in _CLOSED_STATUSES]
+        return f" ({', '.join(parts)})"
+
+    def execute(self, query: ParsedQuery) -> str:
+        store = self.store
+        columns = store.columns()
+
+        if query.intent == "rep_count":
+            reps = [rep for rep in store.reps if query.region is None or rep['region'] == query.region]
+            where = f" in {query.region}" if query.region else ""
+            verb = "is" if len(reps) == 1 else "are"
+            return f"There {verb} {_plural(len(reps), 'sales representative')}{where}."
+
+        mask = self._mask(columns, query.status, query.region, query.rep)
+        values = columns["values"][mask]
+
+        if query.intent == "aggregate":
+            rep_name = store.reps[query.rep]['name'] if query.rep is not None else None
+            scope = self._describe(query, rep_name)
+            if query.metric == "count":
+                count = int(mask.sum())
+                scope = self._describe(query, rep_name, qualify_all=False)
+                split = self._closed_split(query, columns, lambda part: str(int(part.sum())))
+                if count == 1:
+                    return f"There is 1 {scope.replace('deals', 'deal', 1)}{split}."
+                return f"There are {count} {scope}{split}."
+            if query.metric == "sum":
+                split = self._closed_split(
+                    query, columns, lambda part: format_money(columns["values"][part].sum()))
+                return f"The total value of {scope} is {format_money(values.sum())}{split}."
+            if not values.size:
+                return f"There are no {scope}, so there is no average deal value."
+            return f"The average value of {scope} is {format_money(round(float(values.mean()), 2))} across {_plural(int(values.size), 'deal')}."
+
+        # Ranking by region or rep
+        if query.group_by == "region":
+            keys, labels = columns["region_codes"][mask], store.regions.values
+        else:
+            keys, labels = columns["rep_index"][mask], [rep['name'] for rep in store.reps]
+        weights = values.astype(np.float64) if query.metric == "sum" else None
+        totals = np.bincount(keys, weights=weights, minlength=len(labels))
+        if query.group_by == "rep" and query.region is not None:
+            candidates = np.flatnonzero(np.array([rep['region'] == query.region for rep in store.reps], dtype=bool))
+        else:
+            candidates = np.arange(len(labels))
+        if not candidates.size:
+            return f"No {query.group_by}s match {self._describe(query)}."
+        candidate_totals = totals[candidates]
+        best_total = candidate_totals.max() if query.descending else candidate_totals.min()
+        winners = [labels[i] for i in candidates[candidate_totals == best_total]]
+        amount = format_money(best_total) if query.metric == "sum" else _plural(int(best_total), "deal")
+        measure = "value of" if query.metric == "sum" else "number of"
+        extreme = "highest" if query.descending else "lowest"
+        if len(winners) == 1:
+            return f"{winners[0]} has the {extreme} {measure} {self._describe(query)}: {amount}."
+        if len(winners) > MAX_TIED_NAMES:
+            names = ", ".join(winners[:MAX_TIED_NAMES]) + f" and {len(winners) - MAX_TIED_NAMES} others"
+        else:
+            names = f"{', '.join(winners[:-1])} and {winners[-1]}"
+        return f"{names} are tied for the {extreme} {measure} {self._describe(query)}: {amount} each."
+
+    def answer(self, question: str) -> Optional[str]:
+        """Answer ``question`` locally, or return None to defer to the LLM."""
+        query = self.parse(question)
+        self.routing.record(query)
+        return self.execute(query) if query is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return self.routing.stats()
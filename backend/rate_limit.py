@@ -0,0 +1,224 @@
+"""
+Per-client rate limits and the global upstream token budget.
+
+Every budget is a token bucket: a client may spend up to ``burst`` requests
+at once, and the bucket refills at ``per_minute / 60`` tokens per second.
+A request over the limit is told how long to wait (``Retry-After``) until
+the bucket holds enough tokens again. Buckets are keyed by budget and client:
+``data`` and ``ai`` are per client (a configured API key, otherwise the
+client IP), ``upstream`` is a single bucket of Gemini tokens per minute
+shared by all clients, charged with an estimate of each prompt before the
+call.
+
+The bucket state lives in a pluggable store with one atomic operation,
+``take``:
+
+- ``MemoryBucketStore``: a dict under a lock, bounded to ``max_keys``
+  buckets; limits are per process.
+- ``SharedBucketStore``: a fixed-size hash table of buckets in a memory-mapped
+  file (like ``shared_snapshot.GenerationCounter``), updated under an
+  ``flock``, so the workers of ``server.py`` share one set of limits.
+
+``RateLimitMiddleware`` answers requests over their budget with 429 before
+they reach the endpoint; the AI endpoints check their own budgets, as they
+can still serve local and cached answers to a client over its limit.
+"""
+import fcntl
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+_MAGIC = b"RATELIM1"
+_HEADER = struct.Struct("<8sQ")
+# Key hash (0 marks a free slot), tokens, last refill (epoch seconds)
+_SLOT = struct.Struct("<Qdd")
+# Slots tried for a key before the stalest of them is reused
+_PROBES = 8
+
+
+def _refill(tokens: float, updated: float, capacity: float, rate: float, now: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """Token buckets of one process, least recently used first out."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float, now: float) -> float:
+        """Spend ``cost`` tokens; returns 0 if granted, else the seconds to wait."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = capacity if bucket is None else _refill(*bucket, capacity, rate, now)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                # A forgotten bucket starts full again, as for a new client
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SharedBucketStore:
+    """
+    Token buckets in a memory-mapped file shared by processes.
+
+    Keys are hashed with a stable hash (``hash()`` differs per process) into
+    ``slots`` buckets with linear probing. When the probed slots are all
+    taken by other keys, the one refilled longest ago is reused, which
+    forgets the bucket most likely to be full anyway.
+    """
+
+    def __init__(self, path: str, slots: int = 65536):
+        self.path = path
+        self.slots = slots
+        size = _HEADER.size + slots * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size or os.pread(self._fd, _HEADER.size, 0) != _HEADER.pack(_MAGIC, slots):
+                # New file, or one laid out for another slot count: start empty
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, slots), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    def take(self, key: str, capacity: float, rate: float, cost: float, now: float) -> float:
+        """Spend ``cost`` tokens; returns 0 if granted, else the seconds to wait."""
+        key_hash = self._hash(key)
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, tokens = None, capacity
+                stalest, stalest_updated = None, math.inf
+                for probe in range(_PROBES):
+                    slot_offset = _HEADER.size + (key_hash + probe) % self.slots * _SLOT.size
+                    slot_hash, slot_tokens, slot_updated = _SLOT.unpack_from(self._map, slot_offset)
+                    if slot_hash == key_hash:
+                        offset, tokens = slot_offset, _refill(slot_tokens, slot_updated, capacity, rate, now)
+                        break
+                    if slot_hash == 0:
+                        offset = slot_offset
+                        break
+                    if slot_updated < stalest_updated:
+                        stalest, stalest_updated = slot_offset, slot_updated
+                if offset is None:
+                    offset = stalest
+                if tokens >= cost:
+                    tokens -= cost
+                    wait = 0.0
+                else:
+                    wait = (cost - tokens) / rate
+                _SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+                return wait
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """Named budgets of ``(per_minute, burst)`` over one bucket store."""
+
+    def __init__(self, store, budgets: Dict[str, Tuple[float, float]], enabled: bool = True):
+        self.store = store
+        self.budgets = budgets
+        self.enabled = enabled
+
+    def check(self, budget: str, key: str, cost: float = 1.0) -> float:
+        """
+        Charge ``cost`` to ``key``'s bucket of ``budget``. Returns 0 if the
+        request may proceed, else the seconds until it would be allowed.
+        Budgets with a rate of 0 are unlimited
+        """
+        per_minute, burst = self.budgets[budget]
+        if not self.enabled or per_minute <= 0:
+            return 0.0
+        # A single request larger than the bucket could never be granted
+        return self.store.take(f"{budget}:{key}", burst, per_minute / 60, min(cost, burst), time.time())
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+def client_key(scope, api_keys: FrozenSet[str] = frozenset(), trust_forwarded: bool = False) -> str:
+    """
+    The rate limit key of a request: a configured API key sent as
+    ``X-API-Key``, otherwise the client address. Unknown API keys are
+    ignored, so rotating keys does not buy fresh buckets; the first
+    ``X-Forwarded-For`` address is only used behind a trusted proxy
+    """
+    forwarded = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-api-key":
+            api_key = value.decode("latin-1")
+            if api_key in api_keys:
+                return "key:" + api_key
+        elif name == b"x-forwarded-for" and trust_forwarded:
+            forwarded = value.decode("latin-1").split(",")[0].strip()
+    if forwarded:
+        return "ip:" + forwarded
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware charging each request to the budget ``budget_for``
+    returns for its scope (None: not limited) and answering 429 with
+    ``Retry-After`` when the client's bucket is empty.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, budget_for: Callable[[dict], Optional[str]],
+                 identify: Callable[[dict], str] = client_key,
+                 on_limited: Optional[Callable[[str], None]] = None):
+        self.app = app
+        self.limiter = limiter
+        self.budget_for = budget_for
+        self.identify = identify
+        self.on_limited = on_limited
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+        budget = self.budget_for(scope)
+        wait = self.limiter.check(budget, self.identify(scope)) if budget is not None else 0.0
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        if self.on_limited is not None:
+            self.on_limited(budget)
+        retry_after = retry_after_header(wait)
+        body = json.dumps({"detail": f"Rate limit exceeded, retry in {retry_after} seconds"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", retry_after.encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,158 @@
+"""
+Pre-serialized response cache for read endpoints.
+
+Read endpoints return the same bytes until the data changes, so instead of
+re-encoding the payload on every call the encoded body is stored per
+endpoint/query combination together with a strong ETag. Entries are tied to
+the dataset version they were built from: as soon as the version moves on,
+the whole cache is dropped and rebuilt lazily. Data versions only grow, so a
+request still serving an older version (one that started before a write or
+reload) bypasses the cache instead of clearing it and winding it back.
+
+Each representation negotiated from ``Accept`` and ``Accept-Encoding`` (see
+``content_negotiation``) is a separate entry with its own ETag: a compressed
+body is built from the cached uncompressed one of the same format, so the
+payload is encoded once per format and compressed once per coding for every
+data version.
+
+Clients that send ``If-None-Match`` with a current ETag get an empty 304.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from content_negotiation import (
+    FORMAT_NAMES, IDENTITY, JSON, compress, encode, negotiate_coding, negotiate_media_type,
+)
+
+# Representations differ by these request headers, which shared caches must key on
+VARY = "Accept, Accept-Encoding"
+
+
+class CachedResponse:
+    """An encoded response body, its representation and its strong ETag."""
+
+    __slots__ = ("body", "etag", "media_type", "coding")
+
+    def __init__(self, body: bytes, media_type: str = JSON, coding: str = IDENTITY):
+        self.body = body
+        self.media_type = media_type
+        self.coding = coding
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    @property
+    def representation(self) -> str:
+        """Short name such as ``json`` or ``msgpack+gzip``."""
+        name = FORMAT_NAMES[self.media_type]
+        return name if self.coding == IDENTITY else f"{name}+{self.coding}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """``If-None-Match`` uses weak comparison, so a ``W/`` prefix still matches."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """LRU cache of encoded responses keyed by path and query parameters."""
+
+    def __init__(self, max_entries: int = 256, enabled: bool = True,
+                 on_encode: Optional[Callable[[str, str, float, int], None]] = None,
+                 compression_min_size: int = 1024, compression_levels: Optional[Dict[str, int]] = None):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # Called with (path, representation, seconds, body size) whenever a body is encoded or compressed
+        self.on_encode = on_encode
+        # Smaller bodies are always sent uncompressed: the saving would not pay for the coding
+        self.compression_min_size = compression_min_size
+        self.compression_levels = {"gzip": 6, "br": 5, **(compression_levels or {})}
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(request: Request) -> Tuple:
+        return (request.url.path, tuple(sorted(request.query_params.multi_items())))
+
+    def _encode(self, key: Tuple, version: int, build: Callable[[], Any],
+                media_type: str, coding: str) -> CachedResponse:
+        if coding == IDENTITY:
+            start = time.perf_counter()
+            entry = CachedResponse(encode(build(), media_type), media_type)
+        else:
+            source = self.get(key, version, build, media_type)
+            start = time.perf_counter()
+            entry = CachedResponse(compress(source.body, coding, self.compression_levels[coding]),
+                                   media_type, coding)
+        if self.on_encode is not None:
+            self.on_encode(key[0], entry.representation, time.perf_counter() - start, len(entry.body))
+        return entry
+
+    def get(self, key: Tuple, version: int, build: Callable[[], Any],
+            media_type: str = JSON, coding: str = IDENTITY) -> CachedResponse:
+        """Return the cached entry for ``key`` in a representation, encoding ``build()`` on a miss."""
+        if not self.enabled:
+            return self._encode(key, version, build, media_type, coding)
+
+        entry_key = key + (media_type, coding)
+        with self._lock:
+            stale = self.version is not None and version < self.version
+            if not stale:
+                if version != self.version:
+                    self._entries.clear()
+                    self.version = version
+                entry = self._entries.get(entry_key)
+                if entry is not None:
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return entry
+            self.misses += 1
+
+        # Encode outside the lock; concurrent misses for one key just race.
+        # A stale build is served but never stored over the current version
+        entry = self._encode(key, version, build, media_type, coding)
+        with self._lock:
+            if version == self.version:
+                self._entries[entry_key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, version: int, build: Callable[[], Any]) -> Response:
+        """
+        Serve ``build()`` from the cache in the format and coding the request
+        accepts, answering 304 when the ETag matches.
+        """
+        key = self.key_for(request)
+        media_type = negotiate_media_type(request.headers.get("accept"))
+        entry = self.get(key, version, build, media_type)
+        coding = negotiate_coding(request.headers.get("accept-encoding"))
+        if coding != IDENTITY and len(entry.body) >= self.compression_min_size:
+            entry = self.get(key, version, build, media_type, coding)
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": VARY}
+        if entry.coding != IDENTITY:
+            headers["Content-Encoding"] = entry.coding
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,297 @@
+"""
+Question-scoped prompt context for ``/api/ai``.
+
+Pasting one summary per rep into every prompt makes prompt size, cost and
+latency grow with the team. Instead the data is split into small summary
+chunks (one per rep, region and client), indexed with BM25, and each prompt
+gets the global totals plus only the chunks most relevant to the question,
+within a token budget. Everything runs locally; there is no network
+dependency.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Set, Tuple
+
+from dataset import SalesDataset
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how i in is it me of on or our "
+    "show tell than that the their them there these this to was we were what when which who "
+    "why with you".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a list of text chunks. ``replace`` swaps the text of one
+    chunk, updating its postings and the length statistics in place.
+    """
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._lengths: List[int] = [0] * len(self.chunks)
+        self._total_length = 0
+        for position, chunk in enumerate(self.chunks):
+            self._add(position, chunk)
+
+    def _add(self, position: int, chunk: str):
+        terms = tokenize(chunk)
+        self._lengths[position] = len(terms)
+        self._total_length += len(terms)
+        for term, frequency in Counter(terms).items():
+            self._postings[term][position] = frequency
+
+    def _remove(self, position: int):
+        for term in set(tokenize(self.chunks[position])):
+            postings = self._postings[term]
+            del postings[position]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths[position]
+
+    def replace(self, position: int, chunk: str):
+        """Re-index the chunk at ``position`` with new text."""
+        if chunk == self.chunks[position]:
+            return
+        self._remove(position)
+        self.chunks[position] = chunk
+        self._add(position, chunk)
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to ``k`` ``(chunk position, score)`` pairs, best first."""
+        n_chunks = len(self.chunks)
+        average_length = self._total_length / n_chunks if n_chunks else 0.0
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[position] / average_length)
+                scores[position] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class SalesChunks:
+    """
+    Per-rep, per-region and per-client summaries of a ``SalesDataset``, in
+    that order.
+
+    Each rep's share of its region and client chunks is kept, so after deal
+    writes ``update`` recomputes only the changed reps and re-renders the
+    chunks they appear in, instead of summarizing the whole dataset again.
+    """
+
+    def __init__(self, dataset: SalesDataset):
+        self.dataset = dataset
+        reps = dataset.data.get('salesReps', [])
+        self._shares = [self._rep_share(rep) for rep in reps]
+        self._region_reps: Dict[str, List[int]] = defaultdict(list)
+        for position, rep in enumerate(reps):
+            self._region_reps[rep['region']].append(position)
+        # Client name -> rep position -> that rep's deal lines with the client
+        self._client_lines: Dict[str, Dict[int, List[str]]] = defaultdict(dict)
+        for position, share in enumerate(self._shares):
+            for name, lines in share['clients'].items():
+                self._client_lines[name][position] = lines
+
+        self._region_chunks = {region: len(reps) + i for i, region in enumerate(self._region_reps)}
+        self._client_chunks: Dict[str, List[int]] = defaultdict(list)
+        self._client_owners: List[Tuple[int, Dict[str, Any]]] = []
+        next_position = len(reps) + len(self._region_reps)
+        for position, rep in enumerate(reps):
+            for client in rep.get('clients', []):
+                self._client_chunks[client['name']].append(next_position + len(self._client_owners))
+                self._client_owners.append((position, client))
+
+        self._status_count = len(dataset.store.statuses.values)
+        self.chunks = [self._render_rep(position) for position in range(len(reps))]
+        self.chunks += [self._render_region(region) for region in self._region_reps]
+        self.chunks += [self._render_client(owner, client) for owner, client in self._client_owners]
+
+    @staticmethod
+    def _rep_share(rep: Dict[str, Any]) -> Dict[str, Any]:
+        deals = rep.get('deals', [])
+        won = [deal['value'] for deal in deals if deal['status'] == 'Closed Won']
+        clients: Dict[str, List[str]] = defaultdict(list)
+        for deal in deals:
+            clients[deal['client']].append(f"{deal['status']} ${deal['value']:,} with {rep['name']}")
+        return {
+            "deals": len(deals),
+            "value": sum(deal['value'] for deal in deals),
+            "won": len(won),
+            "wonValue": sum(won),
+            "statuses": Counter(deal['status'] for deal in deals),
+            "clients": dict(clients),
+        }
+
+    def _render_rep(self, position: int) -> str:
+        rep = self.dataset.data['salesReps'][position]
+        share = self._shares[position]
+        return (
+            f"{rep['name']} ({rep['role']} in {rep['region']}): "
+            f"skills {', '.join(rep['skills'])}; {share['deals']} deals worth ${share['value']:,}; "
+            f"{share['won']} Closed Won (${share['wonValue']:,}); "
+            f"clients {', '.join(client['name'] for client in rep.get('clients', []))}"
+        )
+
+    def _render_region(self, region: str) -> str:
+        reps = self.dataset.data['salesReps']
+        positions = self._region_reps[region]
+        statuses = Counter()
+        for position in positions:
+            statuses.update(self._shares[position]['statuses'])
+        value = sum(self._shares[position]['value'] for position in positions)
+        return (
+            f"Region {region}: {len(positions)} reps ({', '.join(reps[position]['name'] for position in positions)}); "
+            f"{sum(self._shares[position]['deals'] for position in positions)} deals worth ${value:,.0f}; "
+            + ", ".join(f"{status} {statuses[status]}" for status in self.dataset.store.statuses.values)
+        )
+
+    def _render_client(self, owner: int, client: Dict[str, Any]) -> str:
+        rep = self.dataset.data['salesReps'][owner]
+        lines_by_rep = self._client_lines.get(client['name'], {})
+        deals = [line for position in sorted(lines_by_rep) for line in lines_by_rep[position]]
+        return (
+            f"Client {client['name']} ({client['industry']} industry, contact {client['contact']}), "
+            f"managed by {rep['name']} in {rep['region']}: "
+            + ("; ".join(deals) if deals else "no deals")
+        )
+
+    def update(self, positions: Set[int]) -> List[int]:
+        """
+        Recompute the shares of the reps at ``positions`` from their deals
+        and re-render every chunk they contribute to; returns the positions
+        of the re-rendered chunks
+        """
+        reps = self.dataset.data['salesReps']
+        regions, clients = set(), set()
+        for position in positions:
+            old, new = self._shares[position], self._rep_share(reps[position])
+            self._shares[position] = new
+            regions.add(reps[position]['region'])
+            for name in old['clients']:
+                del self._client_lines[name][position]
+                if not self._client_lines[name]:
+                    del self._client_lines[name]
+            for name, lines in new['clients'].items():
+                self._client_lines[name][position] = lines
+            clients.update(old['clients'], new['clients'])
+
+        # A status seen for the first time is listed in every region chunk
+        if len(self.dataset.store.statuses.values) != self._status_count:
+            self._status_count = len(self.dataset.store.statuses.values)
+            regions = set(self._region_reps)
+
+        changed = list(positions)
+        for position in positions:
+            self.chunks[position] = self._render_rep(position)
+        for region in regions:
+            chunk_position = self._region_chunks[region]
+            self.chunks[chunk_position] = self._render_region(region)
+            changed.append(chunk_position)
+        for name in clients:
+            for chunk_position in self._client_chunks.get(name, ()):
+                owner, client = self._client_owners[chunk_position - len(reps) - len(self._region_reps)]
+                self.chunks[chunk_position] = self._render_client(owner, client)
+                changed.append(chunk_position)
+        return changed
+
+
+def build_chunks(dataset: SalesDataset) -> List[str]:
+    """Per-rep, per-region and per-client summaries of the dataset."""
+    return SalesChunks(dataset).chunks
+
+
+def global_summary(dataset) -> str:
+    analytics = dataset.analytics()
+    statuses = ", ".join(f"{status}: {count}" for status, count in analytics['dealStatusSummary'].items())
+    return (
+        f"Sales team totals: {dataset.rep_count} sales representatives in "
+        f"{', '.join(analytics['regionDistribution'])}. "
+        f"{analytics['totalDealCount']} deals worth ${analytics['totalDealValue']:,} "
+        f"(average ${analytics['averageDealValue']:,.0f}). Deal status breakdown: {statuses}."
+    )
+
+
+class ContextRetriever:
+    """
+    Keeps a BM25 index of the dataset current and assembles prompt context.
+
+    After deal writes only the chunks of the changed reps are re-indexed; the
+    index is rebuilt from scratch when the dataset's change log no longer
+    reaches back to the indexed version.
+
+    ``dataset`` is a ``SalesDataset``, or a read-only source with the same
+    ``version``, ``changed_reps``, ``analytics`` and ``rep_count`` whose
+    chunks were summarized ahead of time and are read with
+    ``context_chunks()`` (the mapped snapshot backend).
+    """
+
+    def __init__(self, dataset, top_k: int = 8, token_budget: int = 1500):
+        self.dataset = dataset
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.rebuilds = 0
+        self.updates = 0
+        self._chunks = None
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> BM25Index:
+        if self._index is not None:
+            version, positions = self.dataset.changed_reps(self._version)
+            if positions is not None:
+                if positions:
+                    for position in self._chunks.update(positions):
+                        self._index.replace(position, self._chunks.chunks[position])
+                    self.updates += 1
+                self._version = version
+                return self._index
+        version = self.dataset.version
+        if isinstance(self.dataset, SalesDataset):
+            self._chunks = SalesChunks(self.dataset)
+            self._index = BM25Index(self._chunks.chunks)
+        else:
+            self._index = BM25Index(self.dataset.context_chunks())
+        self._version = version
+        self.rebuilds += 1
+        return self._index
+
+    def index(self) -> BM25Index:
+        """Return the index for the current data version, updating it if stale."""
+        with self._lock:
+            return self._refresh()
+
+    def build_context(self, question: str) -> str:
+        """Global totals plus the most relevant chunks that fit in the token budget."""
+        parts = [global_summary(self.dataset)]
+        used = estimate_tokens(parts[0])
+        # Searched under the lock: a concurrent write's update edits the index in place
+        with self._lock:
+            index = self._refresh()
+            hits = [index.chunks[position] for position, _ in index.search(question, self.top_k)]
+        for chunk in hits:
+            cost = estimate_tokens(chunk)
+            if used + cost > self.token_budget:
+                continue
+            parts.append(f"- {chunk}")
+            used += cost
+        return "\n".join(parts)
@@ -0,0 +1,239 @@
+"""
+Grouped deal analytics served from precomputed rollup cubes.
+
+A cube holds, for one combination of dimensions (for example region x
+status), the count, sum, min and max of the deal values in every cell. The
+cubes in ``DEFAULT_CUBES`` are built at load time with a vectorized scan of
+the ``DealStore`` columns and then updated in O(1) per cube on every deal
+write.
+
+A query is answered from the smallest cube whose dimensions include the
+requested ones (rolling up the extra dimensions), or, when no cube covers it,
+by a vectorized scan over the columns.
+
+Sums and counts stay exact under deletes; a min or max can not be undone, so
+removing a cell's extreme value marks the cube stale and it is rebuilt by a
+scan on its next read.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from deal_store import DealStore, StringTable, _to_python
+
+# Dimensions a deal can be grouped by, in canonical order
+DIMENSIONS = ("region", "status", "rep", "role", "industry")
+# Label of a missing role, and the industry of clients no rep lists
+UNKNOWN = "Unknown"
+# Cubes built at load time; other combinations roll up from these or are scanned
+DEFAULT_CUBES = (
+    ("region", "status"),
+    ("rep", "status"),
+    ("role", "status"),
+    ("region", "industry", "status"),
+)
+
+Cell = List[Any]  # [count, sum, min, max]
+
+
+def canonical(dimensions: Iterable[str]) -> Tuple[str, ...]:
+    """Order ``dimensions`` like ``DIMENSIONS`` so equal sets share a cube."""
+    selected = set(dimensions)
+    return tuple(dimension for dimension in DIMENSIONS if dimension in selected)
+
+
+def client_industries(reps: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Client industries as listed by the reps (first listing wins)."""
+    industries: Dict[str, str] = {}
+    for rep in reps:
+        for client in rep.get('clients', []):
+            industries.setdefault(client['name'], client['industry'])
+    return industries
+
+
+class RollupCubes:
+    """Precomputed group-by cubes over a ``DealStore``, maintained per write."""
+
+    def __init__(self, store: DealStore, industries: Dict[str, str],
+                 cubes: Sequence[Sequence[str]] = DEFAULT_CUBES,
+                 cells: Optional[Dict[Tuple[str, ...], Dict[tuple, Cell]]] = None):
+        """
+        ``industries`` maps client names to industries (see
+        :func:`client_industries`). ``cells`` restores cubes saved with
+        :meth:`export` instead of scanning the deals again.
+        """
+        self.store = store
+        self.client_industries = industries
+        self.industries = StringTable([UNKNOWN])
+        self.roles = StringTable()
+        # Code arrays per rep / per client; both tables only ever grow
+        self._role_codes = np.zeros(0, dtype=np.int32)
+        self._industry_codes = np.zeros(0, dtype=np.int32)
+        self._cubes: Dict[Tuple[str, ...], Dict[tuple, Cell]] = {}
+        self._stale = set()
+        if cells is not None:
+            self._cubes.update((canonical(dimensions), dict(cube)) for dimensions, cube in cells.items())
+            return
+        for dimensions in cubes:
+            key = canonical(dimensions)
+            self._cubes[key] = self.scan(key)
+
+    @property
+    def cube_dimensions(self) -> List[Tuple[str, ...]]:
+        return list(self._cubes)
+
+    # ------------------------------------------------------------------
+    # Vectorized scan
+    # ------------------------------------------------------------------
+    def _codes(self, dimension: str, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, list]:
+        """Per-deal integer codes for ``dimension`` and the label of every code."""
+        store = self.store
+        if dimension == "region":
+            return columns["region_codes"], store.regions.values
+        if dimension == "status":
+            return columns["status_codes"], store.statuses.values
+        if dimension == "rep":
+            return columns["rep_index"], [rep['id'] for rep in store.reps]
+        if dimension == "role":
+            if len(self._role_codes) != len(store.reps):
+                self._role_codes = np.array(
+                    [self.roles.intern(rep['role'] or UNKNOWN) for rep in store.reps], dtype=np.int32
+                )
+            return self._role_codes[columns["rep_index"]], self.roles.values
+        known = len(self._industry_codes)
+        if known != len(store.clients):
+            added = [self.industries.intern(self.client_industries.get(client, UNKNOWN))
+                     for client in store.clients.values[known:]]
+            self._industry_codes = np.concatenate([self._industry_codes, np.array(added, dtype=np.int32)])
+        return self._industry_codes[columns["client_codes"]], self.industries.values
+
+    def scan(self, dimensions: Tuple[str, ...]) -> Dict[tuple, Cell]:
+        """Aggregate every deal into ``dimensions`` cells with one sort by cell."""
+        columns = self.store.columns()
+        values = columns["values"]
+        if not values.size:
+            return {}
+        if not dimensions:
+            return {(): [int(values.size), _to_python(values.sum()), _to_python(values.min()), _to_python(values.max())]}
+        codes, labels = zip(*(self._codes(dimension, columns) for dimension in dimensions))
+        shape = tuple(max(1, len(table)) for table in labels)
+        keys = np.ravel_multi_index(codes, shape)
+
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        sorted_values = values[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+
+        counts = np.diff(np.r_[starts, sorted_values.size]).tolist()
+        sums = np.add.reduceat(sorted_values, starts).tolist()
+        mins = np.minimum.reduceat(sorted_values, starts).tolist()
+        maxs = np.maximum.reduceat(sorted_values, starts).tolist()
+        cell_labels = [
+            [table[code] for code in dimension_codes.tolist()]
+            for table, dimension_codes in zip(labels, np.unravel_index(sorted_keys[starts], shape))
+        ]
+        return {
+            key: [counts[i], sums[i], mins[i], maxs[i]]
+            for i, key in enumerate(zip(*cell_labels))
+        }
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def _deal_labels(self, rep_position: int, client: str, status: str) -> Dict[str, Any]:
+        rep = self.store.reps[rep_position]
+        return {
+            "region": rep['region'],
+            "status": status,
+            "rep": rep['id'],
+            "role": rep['role'] or UNKNOWN,
+            "industry": self.client_industries.get(client, UNKNOWN),
+        }
+
+    def add_deal(self, rep_position: int, client: str, value, status: str):
+        value = _to_python(value)
+        labels = self._deal_labels(rep_position, client, status)
+        for dimensions, cells in self._cubes.items():
+            key = tuple(labels[dimension] for dimension in dimensions)
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [1, value, value, value]
+                continue
+            cell[0] += 1
+            cell[1] += value
+            cell[2] = min(cell[2], value)
+            cell[3] = max(cell[3], value)
+
+    def remove_deal(self, rep_position: int, client: str, value, status: str):
+        value = _to_python(value)
+        labels = self._deal_labels(rep_position, client, status)
+        for dimensions, cells in self._cubes.items():
+            key = tuple(labels[dimension] for dimension in dimensions)
+            cell = cells[key]
+            cell[0] -= 1
+            cell[1] -= value
+            if cell[0] == 0:
+                del cells[key]
+            elif value <= cell[2] or value >= cell[3]:
+                self._stale.add(dimensions)
+
+    def update_deal(self, rep_position: int, old_client: str, old_value, old_status: str,
+                    client: str, value, status: str):
+        self.remove_deal(rep_position, old_client, old_value, old_status)
+        self.add_deal(rep_position, client, value, status)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def export(self) -> Dict[Tuple[str, ...], Dict[tuple, Cell]]:
+        """Current cells of every cube, for :class:`RollupCubes` ``cells``."""
+        return {cube: self._cells(cube) for cube in list(self._cubes)}
+
+    def _cube_for(self, dimensions: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+        """Smallest cube whose dimensions include ``dimensions``."""
+        covering = [cube for cube in self._cubes if set(dimensions) <= set(cube)]
+        return min(covering, key=lambda cube: len(self._cubes[cube]), default=None)
+
+    def _cells(self, cube: Tuple[str, ...]) -> Dict[tuple, Cell]:
+        if cube in self._stale:
+            self._cubes[cube] = self.scan(cube)
+            self._stale.discard(cube)
+        return self._cubes[cube]
+
+    def group_by(self, dimensions: Sequence[str]) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Count, sum, average, min and max per group of ``dimensions``.
+
+        Returns the groups (sorted by their dimension values, in the requested
+        dimension order) and the source that answered: ``cube`` or ``scan``.
+        """
+        key = canonical(dimensions)
+        cube = self._cube_for(key)
+        if cube is None:
+            cells, source = self.scan(key), "scan"
+        else:
+            source = "cube"
+            cells = self._cells(cube)
+            if cube != key:
+                positions = [cube.index(dimension) for dimension in key]
+                rolled: Dict[tuple, Cell] = {}
+                for cell_key, (count, total, low, high) in cells.items():
+                    target = tuple(cell_key[p] for p in positions)
+                    cell = rolled.get(target)
+                    if cell is None:
+                        rolled[target] = [count, total, low, high]
+                    else:
+                        cell[0] += count
+                        cell[1] += total
+                        cell[2] = min(cell[2], low)
+                        cell[3] = max(cell[3], high)
+                cells = rolled
+
+        order = [key.index(dimension) for dimension in dimensions]
+        groups = []
+        for cell_key, (count, total, low, high) in cells.items():
+            group = {dimension: cell_key[i] for dimension, i in zip(dimensions, order)}
+            group.update(count=count, sum=total, avg=total / count, min=low, max=high)
+            groups.append(group)
+        groups.sort(key=lambda group: tuple(group[dimension] for dimension in dimensions))
+        return groups, source
@@ -0,0 +1,89 @@
+"""
+Production launcher: several uvicorn workers sharing one mapped data snapshot.
+
+``python main.py`` runs a single auto-reloading development server in which
+the process parses the data file itself. Here the supervisor parses the file
+once, writes the columnar snapshot file (``shared_snapshot``) and starts
+``SERVER_WORKERS`` worker processes with ``STORAGE_BACKEND=mmap``, so every
+worker maps the same file instead of holding its own copy of the data.
+
+The workers also share their rate limit buckets through a mapped file
+(``RATE_LIMIT_STATE_PATH``, next to the snapshot by default).
+
+The supervisor also watches the data file. When it changes (and has settled),
+a new snapshot file is written and the shared generation counter is bumped;
+each worker notices on its next poll and switches over.
+
+Run from the backend directory:
+
+    SERVER_WORKERS=4 python server.py
+"""
+import os
+import threading
+import time
+
+import uvicorn
+from dotenv import load_dotenv
+
+from shared_snapshot import SnapshotPublisher
+from snapshot import file_signature
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def watch_data_file(publisher: SnapshotPublisher, interval: float):
+    """Republish the snapshot whenever the data file changes and settles."""
+    loaded, pending = file_signature(publisher.data_path), None
+    while True:
+        time.sleep(interval)
+        signature = file_signature(publisher.data_path)
+        if signature is None or signature == loaded:
+            pending = None
+            continue
+        if signature != pending:
+            # Still being written (or just noticed); wait for one quiet poll
+            pending = signature
+            continue
+        loaded, pending = signature, None
+        try:
+            generation, size = publisher.publish()
+        except Exception as e:
+            print(f"Publishing {publisher.data_path} failed, workers keep the current snapshot: {e}")
+            continue
+        print(f"Published snapshot generation {generation} ({size / 2**20:.1f} MiB)")
+
+
+def serve():
+    load_dotenv()
+    data_path = os.getenv('DATA_PATH', os.path.join(BASE_DIR, "dummyData.json"))
+    snapshot_path = os.getenv('SHARED_SNAPSHOT_PATH', os.path.splitext(data_path)[0] + ".snapshot")
+    workers = int(os.getenv('SERVER_WORKERS', str(os.cpu_count() or 1)))
+
+    publisher = SnapshotPublisher(data_path, snapshot_path)
+    generation, size = publisher.publish()
+    print(f"Published snapshot generation {generation} of {data_path} ({size / 2**20:.1f} MiB) for {workers} workers")
+
+    # Inherited by the worker processes, which import main with these
+    os.environ.update(STORAGE_BACKEND="mmap", DATA_PATH=data_path, SHARED_SNAPSHOT_PATH=snapshot_path)
+    # Rate limit buckets shared by the workers, so limits apply per server, not per worker
+    os.environ.setdefault('RATE_LIMIT_STATE_PATH', os.path.splitext(snapshot_path)[0] + ".ratelimit")
+    if os.getenv('DATA_RELOAD_ENABLED', 'true').lower() != 'false':
+        threading.Thread(
+            target=watch_data_file,
+            args=(publisher, float(os.getenv('DATA_RELOAD_INTERVAL', '1'))),
+            name="snapshot-publisher",
+            daemon=True,
+        ).start()
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', '8000')),
+        workers=workers,
+        log_level=os.getenv('LOG_LEVEL', 'info'),
+        access_log=os.getenv('ACCESS_LOG', 'false').lower() != 'false',
+    )
+
+
+if __name__ == "__main__":
+    serve()
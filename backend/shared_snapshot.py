@@ -0,0 +1,350 @@
+"""
+Read-only columnar snapshot file shared by the server workers.
+
+With several worker processes, parsing the JSON file in every worker would
+hold one full copy of the data (plus its derived structures) per process.
+Instead the supervisor parses the file once and writes a snapshot file:
+
+- a JSON header with the rep metadata, the interned string tables, the
+  analytics totals and the rollup cubes, followed by
+- the deal columns of the ``DealStore``, the deal row orders by value and by
+  id, every rep's ``/api/data`` document pre-encoded as JSON and the
+  retrieval chunks of the AI context as text, each as a 64-byte aligned
+  array.
+
+Workers ``mmap`` the file read-only and wrap the arrays with
+``np.frombuffer``, so the columns are never copied: every worker reads the
+same pages of the OS page cache. A new version is written to a temporary
+file and renamed over the old one, so a worker that still has the old file
+mapped keeps reading it consistently until it switches.
+
+``GenerationCounter`` is an 8-byte file next to the snapshot, also mapped by
+every process. The supervisor bumps it after each rename; workers poll it and
+reopen the snapshot when it changes.
+"""
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from dataset import SalesDataset
+from deal_store import DealStore, StringTable
+from retrieval import build_chunks
+from rollups import RollupCubes
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAGIC = b"SALESNAP"
+FORMAT_VERSION = 2
+_ALIGN = 64
+_PREFIX = struct.Struct("<8sQ")
+_GENERATION = struct.Struct("<Q")
+
+# Deal columns stored in the file, in ``DealStore`` naming
+DEAL_COLUMNS = ("values", "status_codes", "rep_index", "region_codes", "client_codes", "deal_ids")
+
+
+def _dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGN
+
+
+def write_snapshot(path: str, dataset: SalesDataset, generation: int, source: Optional[str] = None) -> int:
+    """
+    Write ``dataset`` as a snapshot file at ``path``; returns its size.
+
+    The file is written next to ``path`` and renamed into place, so readers
+    only ever open a complete file.
+    """
+    store = dataset.store
+    columns = store.columns()
+    values = columns["values"]
+    deal_ids = columns["deal_ids"]
+    # Rows ordered by (value, id) and by id, for ranged and top-N queries
+    value_order = np.lexsort((deal_ids, values))
+    id_order = np.argsort(deal_ids, kind="stable")
+
+    documents = [_dumps(rep) for rep in dataset.data.get('salesReps', [])]
+    document_offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+    np.cumsum([len(document) for document in documents], out=document_offsets[1:])
+    # Summarized here once, so workers index them without materializing a dataset
+    chunks = [chunk.encode("utf-8") for chunk in build_chunks(dataset)]
+    chunk_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in chunks], out=chunk_offsets[1:])
+
+    arrays = {name: np.ascontiguousarray(column) for name, column in columns.items()}
+    arrays.update(
+        value_order=value_order.astype(np.int64),
+        sorted_values=values[value_order],
+        id_order=id_order.astype(np.int64),
+        sorted_ids=deal_ids[id_order],
+        document_offsets=document_offsets,
+        chunk_offsets=chunk_offsets,
+    )
+
+    cubes = dataset.rollups.export()
+    header = {
+        "format": FORMAT_VERSION,
+        "generation": generation,
+        "source": source,
+        "createdAt": time.time(),
+        "deals": store.deal_count,
+        "statuses": store.statuses.values,
+        "regions": store.regions.values,
+        "clients": store.clients.values,
+        "reps": store.reps,
+        "clientIndustries": dataset.rollups.client_industries,
+        "analytics": dataset.analytics(),
+        "cubes": [
+            [list(dimensions), [[*key, *cell] for key, cell in cells.items()]]
+            for dimensions, cells in cubes.items()
+        ],
+        "arrays": {},
+    }
+
+    # Offsets depend on the header size, which depends on the offsets: the
+    # header region is sized from a measurement and grown until the header
+    # with the final offsets fits, then padded to that width
+    layout = {}
+    header_size = 0
+    while True:
+        header["arrays"] = layout
+        encoded = _dumps(header)
+        if layout and len(encoded) <= header_size:
+            break
+        header_size = max(header_size, len(encoded) + 64)
+        offset = _PREFIX.size + header_size
+        offset += _padding(offset)
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = [array.dtype.str, offset, int(array.shape[0])]
+            offset += array.nbytes + _padding(array.nbytes)
+        layout["documents"] = ["|u1", offset, int(document_offsets[-1])]
+        offset += int(document_offsets[-1])
+        layout["chunks"] = ["|u1", offset, int(chunk_offsets[-1])]
+
+    encoded = encoded.ljust(header_size)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(layout[name][1])
+            f.write(array.tobytes())
+        f.seek(layout["documents"][1])
+        for document in documents:
+            f.write(document)
+        for chunk in chunks:
+            f.write(chunk)
+        size = f.tell()
+    os.replace(temporary, path)
+    return size
+
+
+class GenerationCounter:
+    """The generation of the published snapshot, in an 8-byte shared file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(_GENERATION.pack(0))
+        with open(path, "r+b") as f:
+            self._map = mmap.mmap(f.fileno(), _GENERATION.size)
+
+    @classmethod
+    def for_snapshot(cls, path: str) -> "GenerationCounter":
+        """The counter announcing new versions of the snapshot file at ``path``."""
+        return cls(path + ".gen")
+
+    def read(self) -> int:
+        return _GENERATION.unpack_from(self._map)[0]
+
+    def set(self, generation: int):
+        _GENERATION.pack_into(self._map, 0, generation)
+
+
+class MappedDealStore(DealStore):
+    """
+    ``DealStore`` over the mapped columns: aggregates and the query engine
+    work unchanged, deal lookups binary search the sorted ids instead of
+    building a per-process dict, and mutations are not supported.
+    """
+
+    def __init__(self, reps, columns: Dict[str, np.ndarray], id_order: np.ndarray, sorted_ids: np.ndarray,
+                 statuses: StringTable, regions: StringTable, clients: StringTable):
+        self.reps = reps
+        self._size = int(columns["values"].shape[0])
+        for name in DEAL_COLUMNS:
+            setattr(self, "_" + name, columns[name])
+        self._id_order = id_order
+        self._sorted_ids = sorted_ids
+        self.statuses = statuses
+        self.regions = regions
+        self.clients = clients
+
+    def row(self, deal_id: int) -> int:
+        """Row of ``deal_id``; raises ``KeyError`` if unknown."""
+        position = int(np.searchsorted(self._sorted_ids, deal_id))
+        if position >= self._size or self._sorted_ids[position] != deal_id:
+            raise KeyError(deal_id)
+        return int(self._id_order[position])
+
+    def has_deal(self, deal_id: int) -> bool:
+        try:
+            self.row(deal_id)
+        except KeyError:
+            return False
+        return True
+
+    def rep_position(self, deal_id: int) -> int:
+        return int(self._rep_index[self.row(deal_id)])
+
+    def get_deal(self, deal_id: int) -> Dict[str, Any]:
+        return self.deal_at(self.row(deal_id))
+
+    def deal_at(self, row: int) -> Dict[str, Any]:
+        return {
+            "id": int(self._deal_ids[row]),
+            "repIndex": int(self._rep_index[row]),
+            "client": self.clients[int(self._client_codes[row])],
+            "value": self._values[row].item(),
+            "status": self.statuses[int(self._status_codes[row])],
+        }
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("A mapped deal store is read-only")
+
+    add_deal = update_deal = remove_deal = _read_only
+
+
+class MappedSnapshot:
+    """A snapshot file mapped read-only, with zero-copy views of its arrays."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_size = _PREFIX.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a sales snapshot file")
+        self.header: Dict[str, Any] = _loads(self._map[_PREFIX.size:_PREFIX.size + header_size])
+        if self.header["format"] != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {self.header['format']}, expected {FORMAT_VERSION}")
+        self.generation: int = self.header["generation"]
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.frombuffer(self._map, dtype=np.dtype(dtype), count=length, offset=offset)
+            for name, (dtype, offset, length) in self.header["arrays"].items()
+        }
+
+        self.reps: List[Dict[str, Any]] = self.header["reps"]
+        self.store = MappedDealStore(
+            self.reps,
+            {name: self.arrays[name] for name in DEAL_COLUMNS},
+            self.arrays["id_order"],
+            self.arrays["sorted_ids"],
+            StringTable(self.header["statuses"]),
+            StringTable(self.header["regions"]),
+            StringTable(self.header["clients"]),
+        )
+        self._rollups: Optional[RollupCubes] = None
+        self._lock = threading.Lock()
+
+    def close(self):
+        """
+        Unmap the file. The array views are dropped first, since a mapping
+        cannot be closed while they export it; a view still held elsewhere
+        keeps the pages mapped until it is collected.
+        """
+        if self._map.closed:
+            return
+        self.arrays = {}
+        self.store = self._rollups = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def document(self, position: int) -> Dict[str, Any]:
+        """The ``/api/data`` entry of the rep at ``position``, decoded from the file."""
+        offsets = self.arrays["document_offsets"]
+        base = self.header["arrays"]["documents"][1]
+        return _loads(self._map[base + int(offsets[position]):base + int(offsets[position + 1])])
+
+    def chunks(self) -> List[str]:
+        """The retrieval chunks summarized when the file was written."""
+        offsets = self.arrays["chunk_offsets"].tolist()
+        base = self.header["arrays"]["chunks"][1]
+        return [self._map[base + start:base + end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    @property
+    def rollups(self) -> RollupCubes:
+        """The rollup cubes saved in the header, restored on first use."""
+        if self._rollups is None:
+            with self._lock:
+                if self._rollups is None:
+                    cells = {}
+                    for dimensions, rows in self.header["cubes"]:
+                        width = len(dimensions)
+                        cells[tuple(dimensions)] = {tuple(row[:width]): row[width:] for row in rows}
+                    self._rollups = RollupCubes(self.store, self.header["clientIndustries"], cells=cells)
+        return self._rollups
+
+
+def build_snapshot_file(data_path: str, path: str, generation: int) -> int:
+    """Parse the JSON data file and write it as a snapshot file; returns its size."""
+    with open(data_path, "r") as f:
+        data = json.load(f)
+    return write_snapshot(path, SalesDataset(data), generation, source=data_path)
+
+
+class SnapshotPublisher:
+    """Writes snapshot files of ``data_path`` and announces them through the counter."""
+
+    def __init__(self, data_path: str, path: str):
+        self.data_path = data_path
+        self.path = path
+        self.counter = GenerationCounter.for_snapshot(path)
+
+    def publish(self) -> Tuple[int, int]:
+        """
+        Parse the data file and publish it as the next generation; returns
+        ``(generation, file size)``.
+
+        The file is built by a short-lived child process (this module run as a
+        script), so the memory of the parsed JSON goes back to the OS instead
+        of staying in the long-running supervisor.
+        """
+        generation = self.counter.read() + 1
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), self.data_path, self.path, str(generation)],
+            check=True,
+        )
+        self.counter.set(generation)
+        return generation, os.path.getsize(self.path)
+
+
+if __name__ == "__main__":
+    # python shared_snapshot.py DATA_PATH SNAPSHOT_PATH GENERATION
+    build_snapshot_file(sys.argv[1], sys.argv[2], int(sys.argv[3]))
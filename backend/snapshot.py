@@ -0,0 +1,201 @@
+"""
+Hot reload of the sales data through published snapshots.
+
+A ``DataSnapshot`` bundles the storage backend with the structures derived
+from it (query engine, retrieval index, sales context). Request handlers read
+the current snapshot once and use it for the rest of the request, so a reload
+never swaps the data out from under a request that is already running.
+
+``DataReloader`` polls the data file. Once a change has settled (the file's
+mtime and size are unchanged across two polls), the file is parsed and a new
+snapshot is built and warmed in a worker thread, then published with a
+single reference assignment. A file that fails to parse keeps the current
+snapshot. Data versions come from a process-wide counter
+(``dataset.next_version``), so the version-keyed caches can never mistake the
+new data for the old.
+
+Server workers that share a mapped snapshot file watch the generation counter
+the supervisor bumps instead (``signature``), and reload as soon as it moves
+(``settle=False``); the file is complete before the counter changes. The
+mapping of a replaced file is closed by the reload after the one that
+replaced it, instead of whenever the garbage collector gets to it.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from storage import StorageBackend
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """``(mtime_ns, size)`` of ``path``, or None when it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DataSnapshot:
+    """One published version of the data plus the structures derived from it."""
+
+    def __init__(self, storage: StorageBackend, generation: int = 0, load_seconds: float = 0.0):
+        self.storage = storage
+        self.generation = generation
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self._derived: Dict[str, Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+
+    def derived(self, name: str, factory: Callable[[], Any], key: Any = None) -> Any:
+        """
+        ``factory()`` built once per snapshot and reused while ``key`` stays
+        the same (pass the data version for structures that deal writes make stale).
+        """
+        entry = self._derived.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        with self._lock:
+            entry = self._derived.get(name)
+            if entry is None or entry[0] != key:
+                entry = (key, factory())
+                self._derived[name] = entry
+            return entry[1]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "generation": self.generation,
+            "dataVersion": self.storage.version,
+            "backend": self.storage.name,
+            "source": self.storage.path,
+            "loadedAt": self.loaded_at,
+            "loadSeconds": round(self.load_seconds, 4),
+        }
+
+
+class DataReloader:
+    """Watches the data file and publishes a new snapshot when it changes."""
+
+    def __init__(self, path: str,
+                 current: Callable[[], DataSnapshot],
+                 publish: Callable[[DataSnapshot], None],
+                 load: Callable[[StorageBackend], StorageBackend],
+                 warm: Optional[Callable[[DataSnapshot], None]] = None,
+                 interval: float = 1.0,
+                 on_reload: Optional[Callable[[str, float], None]] = None,
+                 signature: Callable[[str], Any] = file_signature,
+                 settle: bool = True):
+        self.path = path
+        self.current = current
+        self.publish = publish
+        self.load = load
+        self.warm = warm
+        self.interval = interval
+        self.on_reload = on_reload
+        self.signature = signature
+        self.settle = settle
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        # Signature of the file the current snapshot was built from
+        self._loaded = signature(path)
+        self._pending: Optional[Tuple[int, int]] = None
+        # Storage replaced by the last reload, closed by the next one so
+        # requests that started on it have finished with it
+        self._retired: Optional[StorageBackend] = None
+        self._reload_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def build(self) -> DataSnapshot:
+        """Parse the file and warm a new snapshot; blocking, run it off the event loop."""
+        started = time.perf_counter()
+        previous = self.current()
+        storage = self.load(previous.storage)
+        generation = storage.generation if storage.generation is not None else previous.generation + 1
+        snapshot = DataSnapshot(storage, generation=generation)
+        if self.warm is not None:
+            self.warm(snapshot)
+        snapshot.load_seconds = time.perf_counter() - started
+        return snapshot
+
+    def reload(self) -> DataSnapshot:
+        """Build and publish a snapshot of the file as it is now."""
+        with self._reload_lock:
+            signature = self.signature(self.path)
+            try:
+                snapshot = self.build()
+            except Exception as e:
+                # Remember the broken file so it is only retried once it changes again
+                self._loaded = signature
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self.on_reload is not None:
+                    self.on_reload("error", 0.0)
+                raise
+            self._loaded = signature
+            previous = self.current().storage
+            self.publish(snapshot)
+            self._retire(previous, snapshot.storage)
+            self.reloads += 1
+            self.last_error = None
+            if self.on_reload is not None:
+                self.on_reload("success", snapshot.load_seconds)
+            return snapshot
+
+    def _retire(self, previous: StorageBackend, current: StorageBackend):
+        """Close the storage retired by the reload before; ``previous`` is next."""
+        if self._retired is not None and self._retired is not current:
+            self._retired.close()
+        # SQLite reloads in place and keeps serving from the same storage
+        self._retired = previous if previous is not current else None
+
+    async def check(self) -> bool:
+        """Reload if the file changed and has settled since the previous poll."""
+        signature = self.signature(self.path)
+        if signature is None or signature == self._loaded:
+            self._pending = None
+            return False
+        if self.settle and signature != self._pending:
+            # Still being written (or just noticed); wait for one quiet poll
+            self._pending = signature
+            return False
+        self._pending = None
+        try:
+            snapshot = await asyncio.to_thread(self.reload)
+        except Exception as e:
+            print(f"Reloading {self.path} failed, keeping the current data: {e}")
+            return False
+        print(f"Reloaded {self.path} as snapshot {snapshot.generation} in {snapshot.load_seconds:.2f}s")
+        return True
+
+    async def run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Data file watch failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watching": self._task is not None,
+            "intervalSeconds": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "lastError": self.last_error,
+        }
@@ -0,0 +1,885 @@
+"""
+Pluggable storage backends for the sales data.
+
+``JsonStorage`` is the original behaviour: the whole JSON file is parsed into
+a ``SalesDataset`` at startup and every read is served from memory.
+
+``MappedStorage`` serves a read-only columnar snapshot file (see
+``shared_snapshot``) that several server workers map at once. The AI
+features read its deal columns and the retrieval chunks stored in the file,
+so no per-process ``SalesDataset`` is built.
+
+``SqliteStorage`` keeps the data in a normalized SQLite database (reps,
+skills, clients and deals tables, indexed on region, status and rep id) that
+is imported once from the JSON file. Startup only opens connections, reads
+push filtering, paging and aggregation (including grouped analytics) down
+into SQL (analytics totals are seeded by one GROUP BY and then maintained by
+the writes), and writes are durable.
+The in-memory ``SalesDataset`` needed by the AI features (local query engine,
+retrieval, sales context) is materialized on first use and kept in step with
+every write.
+
+Both backends expose the same read/write interface, so the endpoints do not
+care which one is configured.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from aggregates import SalesAggregates
+from dataset import REP_FIELDS, SalesDataset, next_version
+from deal_store import DealStore
+from indexes import SalesIndexes
+from rollups import UNKNOWN
+from shared_snapshot import MappedSnapshot, SnapshotPublisher
+
+# Reps read per round trip when iterating; bounds memory and connection hold time
+_REP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reps (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    region TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skills (
+    rep_id INTEGER NOT NULL REFERENCES reps(id),
+    position INTEGER NOT NULL,
+    skill TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY,
+    rep_id INTEGER NOT NULL REFERENCES reps(id),
+    name TEXT NOT NULL,
+    industry TEXT NOT NULL,
+    contact TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    rep_id INTEGER NOT NULL REFERENCES reps(id),
+    client TEXT NOT NULL,
+    value NUMERIC NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# SQL expression of every group-by dimension over ``deals d JOIN reps r``; the
+# industry comes from the first client row with the deal's client name
+_GROUP_COLUMNS = {
+    "region": "r.region",
+    "status": "d.status",
+    "rep": "r.id",
+    "role": "r.role",
+    "industry": f"COALESCE(ci.industry, '{UNKNOWN}')",
+}
+_CLIENT_INDUSTRY_JOIN = (
+    " LEFT JOIN (SELECT name, industry FROM clients WHERE id IN (SELECT MIN(id) FROM clients GROUP BY name)) ci"
+    " ON ci.name = d.client"
+)
+
+# Dropped during a bulk import and rebuilt afterwards, so the inserts do not
+# maintain them row by row. (status, value) covers the analytics aggregation.
+_INDEXES = {
+    "idx_reps_region": "reps(region)",
+    "idx_skills_rep_id": "skills(rep_id)",
+    "idx_skills_skill": "skills(skill COLLATE NOCASE, rep_id)",
+    "idx_clients_rep_id": "clients(rep_id)",
+    "idx_deals_rep_id": "deals(rep_id)",
+    "idx_deals_status": "deals(status, value)",
+    "idx_deals_value": "deals(value)",
+}
+
+
+def _create_indexes(connection: sqlite3.Connection):
+    for name, target in _INDEXES.items():
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+class ReadOnlyStorageError(RuntimeError):
+    """Raised by the write methods of a backend that serves a read-only snapshot."""
+
+
+class StorageBackend:
+    """Read/write interface shared by the storage backends."""
+
+    name = ""
+    # Path of the file backing the data, reported by the health checks
+    path: Optional[str] = None
+    # Generation the data was published as, for backends that read a shared snapshot
+    generation: Optional[int] = None
+
+    @property
+    def version(self) -> int:
+        """Counter bumped by every write; derived caches key on it."""
+        raise NotImplementedError
+
+    @property
+    def rep_count(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def dataset(self) -> SalesDataset:
+        """In-memory dataset used by the AI features."""
+        raise NotImplementedError
+
+    @property
+    def dataset_loaded(self) -> bool:
+        """Whether ``dataset`` can be read without loading anything."""
+        return True
+
+    @property
+    def context_source(self):
+        """What the AI retrieval context is indexed from (see ``ContextRetriever``)."""
+        return self.dataset
+
+    @property
+    def deal_store(self) -> DealStore:
+        """Columnar deals used by the local query engine and the sales context."""
+        return self.dataset.store
+
+    def analytics(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def iter_reps(self, start: int = 0, limit: Optional[int] = None,
+                  fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def load_data(self) -> Dict[str, Any]:
+        """The complete ``{"salesReps": [...]}`` document."""
+        raise NotImplementedError
+
+    def query_reps(self, region: Optional[str] = None, skill: Optional[str] = None,
+                   sort: str = "id", limit: int = 100,
+                   fields: Optional[Sequence[str]] = None, start: int = 0) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def query_deals(self, status: Optional[str] = None, region: Optional[str] = None,
+                    skill: Optional[str] = None, rep_id=None, min_value=None, max_value=None,
+                    sort: str = "-value", limit: int = 100) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def group_by(self, dimensions: Sequence[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def get_deal(self, deal_id: int) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def create_deal(self, rep_id, client: str, value, status: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def update_deal(self, deal_id: int, client: str, value, status: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def delete_deal(self, deal_id: int):
+        raise NotImplementedError
+
+    def check_consistency(self) -> List[str]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JsonStorage(StorageBackend):
+    """The whole dataset parsed into memory from a JSON file."""
+
+    name = "json"
+
+    def __init__(self, dataset: SalesDataset, path: Optional[str] = None):
+        self._dataset = dataset
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> "JsonStorage":
+        with open(path, "r") as f:
+            return cls(SalesDataset(json.load(f)), path)
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "JsonStorage":
+        return cls(SalesDataset(data))
+
+    @property
+    def version(self) -> int:
+        return self._dataset.version
+
+    @property
+    def rep_count(self) -> int:
+        return self._dataset.rep_count
+
+    @property
+    def dataset(self) -> SalesDataset:
+        return self._dataset
+
+    def analytics(self):
+        return self._dataset.analytics()
+
+    def iter_reps(self, start=0, limit=None, fields=None):
+        return self._dataset.iter_reps(start, limit, fields)
+
+    def load_data(self):
+        return self._dataset.data
+
+    def query_reps(self, region=None, skill=None, sort="id", limit=100, fields=None, start=0):
+        return self._dataset.query_reps(region, skill, sort, limit, fields, start)
+
+    def query_deals(self, status=None, region=None, skill=None, rep_id=None, min_value=None,
+                    max_value=None, sort="-value", limit=100):
+        return self._dataset.query_deals(status, region, skill, rep_id, min_value, max_value, sort, limit)
+
+    def group_by(self, dimensions):
+        return self._dataset.group_by(dimensions)
+
+    def get_deal(self, deal_id):
+        return self._dataset.get_deal(deal_id)
+
+    def create_deal(self, rep_id, client, value, status):
+        return self._dataset.create_deal(rep_id, client, value, status)
+
+    def update_deal(self, deal_id, client, value, status):
+        return self._dataset.update_deal(deal_id, client, value, status)
+
+    def delete_deal(self, deal_id):
+        self._dataset.delete_deal(deal_id)
+
+    def check_consistency(self):
+        return self._dataset.check_consistency()
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by request threads."""
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 30.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._connections: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(size):
+            self._connections.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; blocks while all of them are in use."""
+        connection = self._connections.get(timeout=self.timeout)
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SqliteStorage(StorageBackend):
+    """Sales data in a normalized, indexed SQLite database."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        with sqlite3.connect(path) as connection:
+            # WAL lets readers run while a deal is being written
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(_SCHEMA)
+            _create_indexes(connection)
+        self.pool = ConnectionPool(path, pool_size)
+        self._version = next_version()
+        self._lock = threading.Lock()
+        self._dataset: Optional[SalesDataset] = None
+        # Seeded by one GROUP BY on first read, then adjusted by every write
+        self._totals: Optional[SalesAggregates] = None
+
+    # ------------------------------------------------------------------
+    # Import
+    # ------------------------------------------------------------------
+    def import_json(self, data: Dict[str, Any], source: Optional[str] = None):
+        """Replace the database contents with ``data`` (the ``dummyData.json`` format)."""
+        reps, skills, clients, deals = [], [], [], []
+        next_deal_id = 0
+        for position, rep in enumerate(data.get('salesReps', [])):
+            reps.append((rep['id'], position, rep['name'], rep['role'], rep['region']))
+            skills.extend((rep['id'], index, skill) for index, skill in enumerate(rep.get('skills', [])))
+            clients.extend(
+                (rep['id'], client['name'], client['industry'], client['contact'])
+                for client in rep.get('clients', [])
+            )
+            # Same id assignment as SalesDataset, so both backends agree on deal ids
+            for deal in rep.get('deals', []):
+                deal_id = deal.get('id', next_deal_id)
+                next_deal_id = max(next_deal_id, deal_id) + 1
+                deals.append((deal_id, rep['id'], deal['client'], deal['value'], deal['status']))
+
+        with self._lock, self.pool.connection() as connection:
+            with connection:
+                for name in _INDEXES:
+                    connection.execute(f"DROP INDEX IF EXISTS {name}")
+                for table in ("deals", "clients", "skills", "reps", "meta"):
+                    connection.execute(f"DELETE FROM {table}")
+                connection.executemany("INSERT INTO reps VALUES (?, ?, ?, ?, ?)", reps)
+                connection.executemany("INSERT INTO skills VALUES (?, ?, ?)", skills)
+                connection.executemany(
+                    "INSERT INTO clients (rep_id, name, industry, contact) VALUES (?, ?, ?, ?)", clients)
+                connection.executemany("INSERT INTO deals VALUES (?, ?, ?, ?, ?)", deals)
+                connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                    ("source", source),
+                    ("source_mtime", str(os.stat(source).st_mtime_ns) if source else None),
+                    ("imported_at", str(time.time())),
+                ])
+                _create_indexes(connection)
+            connection.execute("ANALYZE")
+            self._dataset = None
+            self._totals = None
+            self._version = next_version()
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self.pool.connection() as connection:
+            row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_current(self, source: str) -> bool:
+        """Whether the database was imported from the current version of ``source``."""
+        return self._meta("source_mtime") == str(os.stat(source).st_mtime_ns)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def rep_count(self) -> int:
+        with self.pool.connection() as connection:
+            return connection.execute("SELECT COUNT(*) FROM reps").fetchone()[0]
+
+    @property
+    def dataset(self) -> SalesDataset:
+        with self._lock:
+            if self._dataset is None:
+                self._dataset = SalesDataset(self.load_data())
+            return self._dataset
+
+    @property
+    def dataset_loaded(self) -> bool:
+        return self._dataset is not None
+
+    def _aggregates(self) -> SalesAggregates:
+        """Analytics totals computed by SQLite from the status and region indexes."""
+        aggregates = SalesAggregates()
+        with self.pool.connection() as connection:
+            for status, count, total in connection.execute(
+                "SELECT status, COUNT(*), SUM(value) FROM deals GROUP BY status"
+            ):
+                aggregates.deal_count += count
+                aggregates.total_value += total
+                aggregates.status_counts[status] = count
+            # First-seen order, like the in-memory aggregates
+            for region, count in connection.execute(
+                "SELECT region, COUNT(*) FROM reps GROUP BY region ORDER BY MIN(position)"
+            ):
+                aggregates.region_refcounts[region] = count
+        return aggregates
+
+    def analytics(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._totals is None:
+                self._totals = self._aggregates()
+            return self._totals.analytics()
+
+    def _rep_children(self, connection, rep_ids: List[int], fields: Sequence[str]) -> Dict[str, Dict[int, list]]:
+        placeholders = ",".join("?" * len(rep_ids))
+        children: Dict[str, Dict[int, list]] = {}
+        if "skills" in fields:
+            skills = children["skills"] = {}
+            for rep_id, skill in connection.execute(
+                f"SELECT rep_id, skill FROM skills WHERE rep_id IN ({placeholders}) ORDER BY rep_id, position",
+                rep_ids,
+            ):
+                skills.setdefault(rep_id, []).append(skill)
+        if "deals" in fields:
+            deals = children["deals"] = {}
+            for deal_id, rep_id, client, value, status in connection.execute(
+                f"SELECT id, rep_id, client, value, status FROM deals WHERE rep_id IN ({placeholders}) ORDER BY rep_id, id",
+                rep_ids,
+            ):
+                deals.setdefault(rep_id, []).append(
+                    {"client": client, "value": value, "status": status, "id": deal_id})
+        if "clients" in fields:
+            clients = children["clients"] = {}
+            for rep_id, name, industry, contact in connection.execute(
+                f"SELECT rep_id, name, industry, contact FROM clients WHERE rep_id IN ({placeholders}) ORDER BY rep_id, id",
+                rep_ids,
+            ):
+                clients.setdefault(rep_id, []).append({"name": name, "industry": industry, "contact": contact})
+        return children
+
+    @staticmethod
+    def _build_reps(rows, children, fields: Optional[Sequence[str]]) -> Iterator[Dict[str, Any]]:
+        for rep_id, _, name, role, region in rows:
+            rep = {"id": rep_id, "name": name, "role": role, "region": region}
+            for field, by_rep in children.items():
+                rep[field] = by_rep.get(rep_id, [])
+            yield rep if fields is None else {field: rep[field] for field in fields}
+
+    def iter_reps(self, start: int = 0, limit: Optional[int] = None,
+                  fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield reps from position ``start`` in batches of ``_REP_BATCH``.
+
+        A connection is only held while a batch is read, and child rows are
+        only queried for the fields that were requested.
+        """
+        selected = REP_FIELDS if fields is None else fields
+        remaining = limit
+        position = start
+        while remaining is None or remaining > 0:
+            size = _REP_BATCH if remaining is None else min(_REP_BATCH, remaining)
+            with self.pool.connection() as connection:
+                rows = connection.execute(
+                    "SELECT id, position, name, role, region FROM reps WHERE position >= ? ORDER BY position LIMIT ?",
+                    (position, size),
+                ).fetchall()
+                if not rows:
+                    return
+                children = self._rep_children(connection, [row[0] for row in rows], selected)
+            yield from self._build_reps(rows, children, fields)
+            position = rows[-1][1] + 1
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < size:
+                return
+
+    def load_data(self) -> Dict[str, Any]:
+        return {"salesReps": list(self.iter_reps())}
+
+    def query_reps(self, region: Optional[str] = None, skill: Optional[str] = None,
+                   sort: str = "id", limit: int = 100,
+                   fields: Optional[Sequence[str]] = None, start: int = 0) -> List[Dict[str, Any]]:
+        """Reps filtered through the region and skill indexes, sorted and limited in SQL."""
+        where, params = [], []
+        if region is not None:
+            where.append("region = ?")
+            params.append(region)
+        if skill is not None:
+            where.append("id IN (SELECT rep_id FROM skills WHERE skill = ? COLLATE NOCASE)")
+            params.append(skill.strip())
+        # Ties keep file order, as in the in-memory indexes, so pages do not overlap
+        order = sort.lstrip("-") + (" DESC" if sort.startswith("-") else "") + ", position"
+        sql = "SELECT id, position, name, role, region FROM reps"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self.pool.connection() as connection:
+            rows = connection.execute(f"{sql} ORDER BY {order} LIMIT ? OFFSET ?", params + [limit, start]).fetchall()
+            if not rows:
+                return []
+            children = self._rep_children(connection, [row[0] for row in rows], REP_FIELDS if fields is None else fields)
+        return list(self._build_reps(rows, children, fields))
+
+    def query_deals(self, status: Optional[str] = None, region: Optional[str] = None,
+                    skill: Optional[str] = None, rep_id=None, min_value=None, max_value=None,
+                    sort: str = "-value", limit: int = 100) -> List[Dict[str, Any]]:
+        """Deals filtered, sorted and limited in SQL using the status, value and rep indexes."""
+        where, params = [], []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if region is not None:
+            where.append("rep_id IN (SELECT id FROM reps WHERE region = ?)")
+            params.append(region)
+        if skill is not None:
+            where.append("rep_id IN (SELECT rep_id FROM skills WHERE skill = ? COLLATE NOCASE)")
+            params.append(skill.strip())
+        if rep_id is not None:
+            where.append("rep_id = ?")
+            params.append(rep_id)
+        if min_value is not None:
+            where.append("value >= ?")
+            params.append(min_value)
+        if max_value is not None:
+            where.append("value <= ?")
+            params.append(max_value)
+        direction = " DESC" if sort.startswith("-") else ""
+        order = f"value{direction}, id{direction}" if sort.lstrip("-") == "value" else f"id{direction}"
+        sql = "SELECT id, client, value, status, rep_id FROM deals"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self.pool.connection() as connection:
+            rows = connection.execute(f"{sql} ORDER BY {order} LIMIT ?", params + [limit]).fetchall()
+        return [dict(zip(("id", "client", "value", "status", "repId"), row)) for row in rows]
+
+    def group_by(self, dimensions: Sequence[str]) -> Dict[str, Any]:
+        """Deal count/sum/avg/min/max per group, aggregated by one GROUP BY."""
+        columns = [_GROUP_COLUMNS[dimension] for dimension in dimensions]
+        sql = (f"SELECT {''.join(column + ', ' for column in columns)}"
+               "COUNT(*), SUM(d.value), MIN(d.value), MAX(d.value) FROM deals d JOIN reps r ON r.id = d.rep_id")
+        if "industry" in dimensions:
+            sql += _CLIENT_INDUSTRY_JOIN
+        if columns:
+            sql += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+        with self.pool.connection() as connection:
+            rows = connection.execute(sql).fetchall()
+        groups = []
+        for row in rows:
+            count, total, low, high = row[len(columns):]
+            if count:
+                group = dict(zip(dimensions, row))
+                group.update(count=count, sum=total, avg=total / count, min=low, max=high)
+                groups.append(group)
+        return {"dimensions": list(dimensions), "source": "sql", "groups": groups}
+
+    def get_deal(self, deal_id: int) -> Dict[str, Any]:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT id, client, value, status, rep_id FROM deals WHERE id = ?", (deal_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(deal_id)
+        return dict(zip(("id", "client", "value", "status", "repId"), row))
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+    def create_deal(self, rep_id, client: str, value, status: str) -> Dict[str, Any]:
+        """Insert a deal for the rep with ``rep_id``; raises ``KeyError`` if unknown."""
+        with self._lock, self.pool.connection() as connection:
+            with connection:
+                if connection.execute("SELECT 1 FROM reps WHERE id = ?", (rep_id,)).fetchone() is None:
+                    raise KeyError(rep_id)
+                # AUTOINCREMENT never hands out the id of a deleted deal again
+                deal_id = connection.execute(
+                    "INSERT INTO deals (rep_id, client, value, status) VALUES (?, ?, ?, ?)",
+                    (rep_id, client, value, status),
+                ).lastrowid
+            if self._totals is not None:
+                self._totals.add_deal(value, status)
+            if self._dataset is not None:
+                self._dataset.create_deal(rep_id, client, value, status, deal_id=deal_id)
+            self._version = next_version()
+        return self.get_deal(deal_id)
+
+    def update_deal(self, deal_id: int, client: str, value, status: str) -> Dict[str, Any]:
+        """Replace the client, value and status of a deal; raises ``KeyError`` if unknown."""
+        with self._lock, self.pool.connection() as connection:
+            with connection:
+                old = connection.execute("SELECT value, status FROM deals WHERE id = ?", (deal_id,)).fetchone()
+                if old is None:
+                    raise KeyError(deal_id)
+                connection.execute(
+                    "UPDATE deals SET client = ?, value = ?, status = ? WHERE id = ?",
+                    (client, value, status, deal_id),
+                )
+            if self._totals is not None:
+                self._totals.update_deal(old[0], old[1], value, status)
+            if self._dataset is not None:
+                self._dataset.update_deal(deal_id, client, value, status)
+            self._version = next_version()
+        return self.get_deal(deal_id)
+
+    def delete_deal(self, deal_id: int):
+        """Remove a deal; raises ``KeyError`` if unknown."""
+        with self._lock, self.pool.connection() as connection:
+            with connection:
+                old = connection.execute("SELECT value, status FROM deals WHERE id = ?", (deal_id,)).fetchone()
+                if old is None:
+                    raise KeyError(deal_id)
+                connection.execute("DELETE FROM deals WHERE id = ?", (deal_id,))
+            if self._totals is not None:
+                self._totals.remove_deal(old[0], old[1])
+            if self._dataset is not None:
+                self._dataset.delete_deal(deal_id)
+            self._version = next_version()
+
+    def check_consistency(self) -> List[str]:
+        """
+        Run SQLite's integrity check and compare the running totals and, when
+        it has been materialized, the in-memory dataset against a full
+        aggregation in SQL.
+        """
+        with self.pool.connection() as connection:
+            mismatches = [
+                f"sqlite: {row[0]}" for row in connection.execute("PRAGMA quick_check") if row[0] != "ok"
+            ]
+        with self._lock:
+            expected = self._aggregates()
+            if self._totals is not None:
+                mismatches += self._totals.diff(expected)
+            if self._dataset is not None:
+                mismatches += self._dataset.check_consistency()
+                mismatches += [f"dataset {line}" for line in self._dataset.aggregates.diff(expected)]
+        return mismatches
+
+    def close(self):
+        self.pool.close()
+
+
+class MappedStorage(StorageBackend):
+    """
+    Read-only view of a snapshot file mapped with ``mmap``.
+
+    The deal columns, the value and id orders and the rep documents are read
+    straight from the mapping, so every worker process serving the same file
+    shares one copy of the data in the page cache. Only the rep metadata and
+    the string tables from the file header are held per process. Writes raise
+    ``ReadOnlyStorageError``; the data changes when a new snapshot file is
+    published.
+    """
+
+    name = "mmap"
+    # Fields of a rep that are in the header; other projections decode the document
+    _METADATA_FIELDS = frozenset(("id", "name", "role", "region", "skills"))
+
+    def __init__(self, snapshot: MappedSnapshot):
+        self.snapshot = snapshot
+        self.path = snapshot.path
+        self.generation = snapshot.generation
+        self._version = next_version()
+        self._lock = threading.Lock()
+        self._dataset: Optional[SalesDataset] = None
+        self._rep_positions: Dict[Any, int] = {rep['id']: position for position, rep in enumerate(snapshot.reps)}
+        # Rep filters only; deals are filtered over the mapped columns
+        self._indexes = SalesIndexes(snapshot.reps, {}, snapshot.store.rep_position)
+
+    @classmethod
+    def open(cls, path: str) -> "MappedStorage":
+        return cls(MappedSnapshot(path))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def rep_count(self) -> int:
+        return len(self.snapshot.reps)
+
+    @property
+    def dataset(self) -> SalesDataset:
+        """
+        Materialized from the rep documents on first use, like the SQLite
+        backend. No endpoint needs it: the AI features read the mapped deal
+        columns and the retrieval chunks stored in the snapshot.
+        """
+        with self._lock:
+            if self._dataset is None:
+                self._dataset = SalesDataset(self.load_data())
+            return self._dataset
+
+    @property
+    def dataset_loaded(self) -> bool:
+        return self._dataset is not None
+
+    @property
+    def context_source(self) -> "MappedStorage":
+        return self
+
+    def context_chunks(self) -> List[str]:
+        """The retrieval chunks summarized when the snapshot was published."""
+        return self.snapshot.chunks()
+
+    def changed_reps(self, since_version: int) -> Tuple[int, Optional[Set[int]]]:
+        """The snapshot is read-only: nothing changes within one version."""
+        return self._version, set() if since_version == self._version else None
+
+    @property
+    def deal_store(self) -> DealStore:
+        return self.snapshot.store
+
+    def analytics(self) -> Dict[str, Any]:
+        return dict(self.snapshot.header["analytics"])
+
+    def iter_reps(self, start: int = 0, limit: Optional[int] = None,
+                  fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield reps from position ``start``. Projections onto header fields
+        (e.g. ``id,name,region``) are served without decoding the documents.
+        """
+        reps = self.snapshot.reps
+        stop = len(reps) if limit is None else min(len(reps), start + limit)
+        from_header = fields is not None and self._METADATA_FIELDS.issuperset(fields)
+        for position in range(start, stop):
+            rep = reps[position] if from_header else self.snapshot.document(position)
+            yield rep if fields is None else {field: rep[field] for field in fields if field in rep}
+
+    def load_data(self) -> Dict[str, Any]:
+        return {"salesReps": list(self.iter_reps())}
+
+    def query_reps(self, region: Optional[str] = None, skill: Optional[str] = None,
+                   sort: str = "id", limit: int = 100,
+                   fields: Optional[Sequence[str]] = None, start: int = 0) -> List[Dict[str, Any]]:
+        """Reps in ``region`` with ``skill`` (case-insensitive), via the rep indexes."""
+        positions = self._indexes.query_reps(region, skill, sort, limit, start)
+        reps = self.snapshot.reps
+        from_header = fields is not None and self._METADATA_FIELDS.issuperset(fields)
+        result = []
+        for position in positions:
+            rep = reps[position] if from_header else self.snapshot.document(position)
+            result.append(rep if fields is None else {field: rep[field] for field in fields if field in rep})
+        return result
+
+    def query_deals(self, status: Optional[str] = None, region: Optional[str] = None,
+                    skill: Optional[str] = None, rep_id=None, min_value=None, max_value=None,
+                    sort: str = "-value", limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Deals matching every filter, walking the stored value or id order in
+        growing blocks until ``limit`` matches are found. A value range is
+        cut out of the value order with a binary search.
+        """
+        store = self.snapshot.store
+        arrays = self.snapshot.arrays
+        rep = None
+        if rep_id is not None:
+            rep = self._rep_positions.get(rep_id)
+            if rep is None:
+                return []
+        reps = self._indexes.rep_positions(region, skill, rep)
+        allowed = None
+        if reps is not None:
+            allowed = np.zeros(store.rep_count, dtype=bool)
+            allowed[list(reps)] = True
+        status_code = None
+        if status is not None:
+            status_code = store.statuses.code(status)
+            if status_code < 0:
+                return []
+
+        columns = store.columns()
+        ranged = min_value is not None or max_value is not None
+        if sort.lstrip("-") == "value":
+            sorted_values = arrays["sorted_values"]
+            lo = 0 if min_value is None else int(np.searchsorted(sorted_values, min_value, "left"))
+            hi = len(sorted_values) if max_value is None else int(np.searchsorted(sorted_values, max_value, "right"))
+            rows = arrays["value_order"][lo:max(lo, hi)]
+            ranged = False
+        else:
+            rows = arrays["id_order"]
+        if sort.startswith("-"):
+            rows = rows[::-1]
+
+        matched: List[int] = []
+        start, block_size = 0, max(limit, 256)
+        while start < len(rows) and len(matched) < limit:
+            block = rows[start:start + block_size]
+            start += block_size
+            block_size *= 2
+            mask = np.ones(len(block), dtype=bool)
+            if status_code is not None:
+                mask &= columns["status_codes"][block] == status_code
+            if allowed is not None:
+                mask &= allowed[columns["rep_index"][block]]
+            if ranged:
+                values = columns["values"][block]
+                if min_value is not None:
+                    mask &= values >= min_value
+                if max_value is not None:
+                    mask &= values <= max_value
+            matched.extend(block[mask][:limit - len(matched)].tolist())
+        return [self._deal(store.deal_at(row)) for row in matched]
+
+    def _deal(self, deal: Dict[str, Any]) -> Dict[str, Any]:
+        deal['repId'] = self.snapshot.reps[deal.pop('repIndex')]['id']
+        return deal
+
+    def group_by(self, dimensions: Sequence[str]) -> Dict[str, Any]:
+        """Deal count/sum/avg/min/max per group, from the cubes saved in the file or a scan."""
+        with self._lock:
+            groups, source = self.snapshot.rollups.group_by(dimensions)
+        return {"dimensions": list(dimensions), "source": source, "groups": groups}
+
+    def get_deal(self, deal_id: int) -> Dict[str, Any]:
+        return self._deal(self.snapshot.store.get_deal(deal_id))
+
+    def check_consistency(self) -> List[str]:
+        """Compare the mapped columns against a recompute from the rep documents."""
+        expected = SalesAggregates.from_store(DealStore.from_data(self.load_data()))
+        return [f"columns {line}" for line in SalesAggregates.from_store(self.snapshot.store).diff(expected)]
+
+    def close(self):
+        # The rep index holds the deal store, whose columns are views of the mapping
+        self._indexes = None
+        self.snapshot.close()
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+    def _read_only(self, *args, **kwargs):
+        raise ReadOnlyStorageError(
+            "The data is served from a read-only shared snapshot; update the data file instead"
+        )
+
+    create_deal = update_deal = delete_deal = _read_only
+
+
+def open_storage(backend: str, data_path: str, sqlite_path: Optional[str] = None,
+                 pool_size: int = 4, snapshot_path: Optional[str] = None) -> StorageBackend:
+    """
+    Open the configured backend.
+
+    The SQLite database is (re)imported from ``data_path`` when it is missing
+    or was imported from an older version of the JSON file; otherwise it is
+    used as-is, including deals written through the API. The mapped snapshot
+    is normally published by the supervisor (``server.py``) and only written
+    here when it does not exist yet.
+    """
+    if backend == "json":
+        return JsonStorage.load(data_path)
+    if backend == "mmap":
+        snapshot_path = snapshot_path or os.path.splitext(data_path)[0] + ".snapshot"
+        if not os.path.exists(snapshot_path):
+            print(f"Writing a snapshot of {data_path} to {snapshot_path}")
+            SnapshotPublisher(data_path, snapshot_path).publish()
+        return MappedStorage.open(snapshot_path)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    storage = SqliteStorage(sqlite_path or os.path.splitext(data_path)[0] + ".db", pool_size)
+    if os.path.exists(data_path) and not storage.is_current(data_path):
+        print(f"Importing {data_path} into {storage.path}")
+        with open(data_path, "r") as f:
+            storage.import_json(json.load(f), source=data_path)
+    return storage
+
+
+def reload_storage(previous: StorageBackend, data_path: str) -> StorageBackend:
+    """
+    Storage for the current contents of ``data_path``, replacing ``previous``.
+
+    The file is parsed before anything is touched, so a broken file leaves
+    ``previous`` intact. The JSON backend gets a fresh ``JsonStorage`` and the
+    previous one keeps serving in-flight requests. The SQLite backend
+    re-imports in place; the import is one transaction, so SQL readers see
+    either the old or the new rows, never a mix. The mapped backend reopens
+    its snapshot file, which the supervisor has replaced; the reloader closes
+    the previous mapping one generation later.
+    """
+    if isinstance(previous, MappedStorage):
+        return MappedStorage.open(previous.path)
+    with open(data_path, "r") as f:
+        data = json.load(f)
+    if isinstance(previous, SqliteStorage):
+        previous.import_json(data, source=data_path)
+        return previous
+    return JsonStorage(SalesDataset(data), data_path)
@@ -0,0 +1,59 @@
+"""
+Timed out upstream calls running in the thread pool keep their concurrency
+slot until the thread returns, so a run of timeouts never has more calls in
+flight than ``max_concurrency``.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_client import GeminiClient
+
+SLOW = 0.3
+
+
+class SlowModel:
+    """Blocking model that records how many calls run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(SLOW)
+        with self._lock:
+            self.running -= 1
+        if stream:
+            return iter([type("Chunk", (), {"text": prompt})()])
+        return type("Response", (), {"text": prompt})()
+
+
+@pytest.mark.parametrize("streaming", [False, True], ids=["generate", "stream"])
+def test_timeouts_do_not_exceed_the_concurrency_cap(streaming):
+    model = SlowModel()
+    client = GeminiClient(lambda: model, max_concurrency=2, timeout=SLOW / 6, use_async_api=False)
+    # A wider pool than the cap, so only the semaphore keeps calls from piling up
+    client._executor = ThreadPoolExecutor(max_workers=8)
+
+    async def ask(i):
+        with pytest.raises(asyncio.TimeoutError):
+            if streaming:
+                async for _ in client.stream(f"question {i}"):
+                    pass
+            else:
+                await client.generate(f"question {i}")
+
+    async def run():
+        await asyncio.gather(*(ask(i) for i in range(6)))
+        # Let the abandoned threads finish before the loop closes
+        await asyncio.sleep(SLOW * 1.5)
+
+    asyncio.run(run())
+    assert model.peak <= 2
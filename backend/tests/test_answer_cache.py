@@ -0,0 +1,33 @@
+"""
+An answer computed for an older data version (an AI request that started
+before a write or reload) is dropped instead of clearing the answers cached
+for the current version and winding the version back.
+"""
+from answer_cache import AnswerCache
+
+QUESTION = "Who is the top performer?"
+
+
+def test_stale_put_is_dropped():
+    cache = AnswerCache()
+    cache.put(QUESTION, 2, "answer for version 2")
+    cache.put("Other question", 1, "answer for version 1")
+    assert cache.version == 2
+    assert cache.get(QUESTION, 2) == "answer for version 2"
+    assert cache.get("Other question", 2) is None
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_stale_get_misses_without_clearing():
+    cache = AnswerCache()
+    cache.put(QUESTION, 2, "answer for version 2")
+    assert cache.get(QUESTION, 1) is None
+    assert cache.get(QUESTION, 2) == "answer for version 2"
+
+
+def test_newer_version_invalidates():
+    cache = AnswerCache()
+    cache.put(QUESTION, 1, "answer for version 1")
+    assert cache.get(QUESTION, 2) is None
+    assert cache.version == 2
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,82 @@
+"""
+Hot reloads never expose a half-built snapshot: while the data file is
+rewritten and reloaded repeatedly, every analytics and group-by read matches
+one of the two datasets exactly, and the snapshot generation and data version
+seen by a client never go backwards. A small-scale run of the readers in
+``benchmarks/bench_hot_reload.py``.
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import main
+from bench_hot_reload import reader, snapshot_reader, totals, write_json
+from snapshot import DataReloader, DataSnapshot
+from storage import open_storage, reload_storage
+from synthetic import generate_dataset
+
+DEALS = 5_000
+RELOADS = 6
+CONCURRENCY = 4
+THREADS = 2
+
+
+@pytest.fixture
+def published():
+    """Restore the published snapshot and rate limiter after the test"""
+    previous, enabled = main.SNAPSHOT, main.RATE_LIMITER.enabled
+    # The simulated clients all share one address
+    main.RATE_LIMITER.enabled = False
+    yield
+    main.publish_snapshot(previous)
+    main.RATE_LIMITER.enabled = enabled
+
+
+async def reload_under_load(path, datasets, known):
+    reloader = DataReloader(
+        path,
+        current=lambda: main.SNAPSHOT,
+        publish=main.publish_snapshot,
+        load=lambda storage: reload_storage(storage, path),
+        warm=main.warm_snapshot,
+    )
+    thread_stop, thread_violations = threading.Event(), []
+    threads = [threading.Thread(target=snapshot_reader, args=(known, thread_stop, thread_violations))
+               for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            stop, latencies = asyncio.Event(), []
+            readers = [asyncio.create_task(reader(client, known, latencies, stop)) for _ in range(CONCURRENCY)]
+            for i in range(RELOADS):
+                await asyncio.to_thread(write_json, path, datasets[(i + 1) % 2])
+                await asyncio.to_thread(reloader.reload)
+            stop.set()
+            violations = sum(await asyncio.gather(*readers))
+    finally:
+        thread_stop.set()
+        for thread in threads:
+            thread.join()
+    return reloader.reloads, len(latencies), violations, thread_violations
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_no_inconsistent_reads_across_reloads(backend, tmp_path, published):
+    datasets = [generate_dataset(DEALS, seed=1), generate_dataset(DEALS + 1000, seed=2)]
+    known = {totals(data) for data in datasets}
+    path = str(tmp_path / "data.json")
+    write_json(path, datasets[0])
+    main.publish_snapshot(DataSnapshot(open_storage(backend, path)))
+
+    reloads, reads, violations, thread_violations = asyncio.run(reload_under_load(path, datasets, known))
+
+    assert reloads == RELOADS
+    assert reads > 0
+    assert violations == 0
+    assert thread_violations == []
+    analytics = main.SNAPSHOT.storage.analytics()
+    assert (analytics["totalDealCount"], analytics["totalDealValue"]) == totals(datasets[RELOADS % 2])
@@ -0,0 +1,22 @@
+"""
+Cold start stays within budget: ``import main`` in a fresh interpreter takes
+at most ``BUDGET_MS`` (median of a few runs) and leaves the deferred modules
+unimported, with and without a Gemini API key. The same measurement as
+``benchmarks/bench_import_time.py``.
+"""
+import statistics
+
+import pytest
+
+from bench_import_time import BUDGET_MS, DEFERRED, profile
+
+RUNS = 3
+
+
+@pytest.mark.parametrize("api_key", [None, "fake-key"], ids=["no API key", "with API key"])
+def test_import_main_within_budget(api_key):
+    runs = [profile(api_key) for _ in range(RUNS)]
+    total = statistics.median(run[0] for run in runs)
+    assert total <= BUDGET_MS, f"import main took {total:.0f} ms, budget is {BUDGET_MS} ms"
+    imported = sorted(module for module in DEFERRED if any(module in run[2] for run in runs))
+    assert not imported, f"imported at startup: {', '.join(imported)}"
@@ -0,0 +1,44 @@
+"""
+Pages sliced from the presorted rep orders and id walks return the same
+reps and deals as filtering and sorting everything, ties in file order.
+"""
+import pytest
+
+from dataset import SalesDataset
+from synthetic import generate_dataset
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    data = generate_dataset(400, deals_per_rep=3, clients_per_rep=1, seed=5)
+    # Names sort apart from ids and tie often ("Rep 7" and "Rep 70" -> "Rep 7")
+    for rep in data["salesReps"]:
+        rep["name"] = rep["name"][:5]
+    return SalesDataset(data)
+
+
+def sorted_reps(dataset, region, sort):
+    reps = [rep for rep in dataset.data["salesReps"] if region is None or rep["region"] == region]
+    field = sort.lstrip("-")
+    return [rep["id"] for rep in sorted(reps, key=lambda rep: rep[field], reverse=sort.startswith("-"))]
+
+
+@pytest.mark.parametrize("region", [None, "Europe"])
+@pytest.mark.parametrize("sort", ["id", "-id", "name", "-name"])
+@pytest.mark.parametrize("start", [0, 13, 90])
+def test_rep_pages_match_a_full_sort(dataset, region, sort, start):
+    page = dataset.query_reps(region=region, sort=sort, limit=10, start=start, fields=["id"])
+    assert [rep["id"] for rep in page] == sorted_reps(dataset, region, sort)[start:start + 10]
+
+
+@pytest.mark.parametrize("filters", [{}, {"status": "Closed Won"}, {"region": "Europe", "min_value": 100_000}])
+@pytest.mark.parametrize("sort", ["id", "-id"])
+def test_deals_by_id_match_a_full_sort(dataset, filters, sort):
+    deals = [
+        deal for rep in dataset.data["salesReps"] for deal in rep["deals"]
+        if deal["status"] == filters.get("status", deal["status"])
+        and rep["region"] == filters.get("region", rep["region"])
+        and deal["value"] >= filters.get("min_value", deal["value"])
+    ]
+    expected = sorted((deal["id"] for deal in deals), reverse=sort == "-id")[:20]
+    assert [deal["id"] for deal in dataset.query_deals(sort=sort, limit=20, **filters)] == expected
@@ -0,0 +1,70 @@
+"""
+The mapped snapshot backend answers the AI features from the file: the
+retrieval chunks are precomputed at publish time, and no request path
+materializes a per-process ``SalesDataset``. Reloads close the mapping of
+the file they replaced one generation later.
+"""
+import json
+
+import pytest
+
+import main
+from dataset import SalesDataset
+from retrieval import ContextRetriever, build_chunks
+from snapshot import DataReloader, DataSnapshot
+from storage import MappedStorage, reload_storage
+from shared_snapshot import write_snapshot
+from synthetic import generate_dataset
+
+QUESTIONS = ("Who are the top reps in Europe?", "Client 7 in the Finance industry", "Closed Lost deals")
+
+
+@pytest.fixture
+def data():
+    return generate_dataset(2_000, deals_per_rep=20, clients_per_rep=4, seed=5)
+
+
+@pytest.fixture
+def storage(data, tmp_path):
+    path = str(tmp_path / "data.snapshot")
+    write_snapshot(path, SalesDataset(json.loads(json.dumps(data))), generation=1)
+    storage = MappedStorage.open(path)
+    yield storage
+    storage.close()
+
+
+def test_snapshot_carries_the_retrieval_chunks(data, storage):
+    assert storage.context_chunks() == build_chunks(SalesDataset(data))
+
+
+def test_context_matches_the_in_memory_dataset(data, storage):
+    mapped = ContextRetriever(storage.context_source)
+    in_memory = ContextRetriever(SalesDataset(data))
+    for question in QUESTIONS:
+        assert mapped.build_context(question) == in_memory.build_context(question)
+
+
+def test_ai_paths_do_not_materialize_the_dataset(storage):
+    snapshot = DataSnapshot(storage)
+    main.warm_snapshot(snapshot)
+    assert "Sales team totals" in main.build_ai_prompt("Who are the top reps in Europe?", snapshot)
+    assert main.get_query_engine(snapshot).answer("How many deals are there?") is not None
+    assert not storage.dataset_loaded
+
+
+def test_reloads_close_the_mapping_one_generation_later(data, storage, tmp_path):
+    published = [DataSnapshot(storage)]
+    reloader = DataReloader(
+        str(tmp_path / "data.snapshot"), current=lambda: published[-1], publish=published.append,
+        load=lambda previous: reload_storage(previous, ""), signature=lambda path: None,
+    )
+    first = reloader.reload().storage
+    assert storage.query_reps(limit=5)
+    assert not storage.snapshot._map.closed
+    reloader.reload()
+    assert storage.snapshot._map.closed
+    assert not first.snapshot._map.closed
+    assert first.query_reps(limit=5)
+    first.close()
+    published[-1].storage.close()
+
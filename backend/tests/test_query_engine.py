@@ -0,0 +1,86 @@
+"""
+Routing of the local query engine: structured questions are answered from
+the data, anything with a qualifier the engine cannot apply goes to the LLM.
+"""
+import json
+import os
+
+import pytest
+
+from dataset import SalesDataset
+from query_engine import QueryEngine, RoutingStats
+
+DUMMY_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dummyData.json")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    with open(DUMMY_DATA_PATH) as f:
+        return QueryEngine(SalesDataset(json.load(f)).store)
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("How many deals are in progress?", "There are 5 In Progress deals."),
+    ("What is the total deal value in Asia Pacific?", "The total value of all deals in Asia-Pacific is $240,000."),
+    ("How many deals were lost in the Middle East?", "There is 1 Closed Lost deal in Middle East."),
+    ("Average value of won deals in South America",
+     "The average value of Closed Won deals in South America is $80,000 across 1 deal."),
+    ("How many deals does Bob have?", "There are 3 deals owned by Bob."),
+    ("Who is the top performer in North America?",
+     "Alice has the highest value of Closed Won deals in North America: $120,000."),
+    ("Which region has the lowest total value of won deals?",
+     "Asia-Pacific has the lowest value of Closed Won deals: $60,000."),
+    ("How many sales reps are there in Europe?", "There is 1 sales representative in Europe."),
+    ("How many sales reps are there?", "There are 5 sales representatives."),
+    # "Closed" alone is every closed deal, won or lost
+    ("What's the total value of closed deals?",
+     "The total value of closed (won or lost) deals is $835,000 (Closed Won: $445,000, Closed Lost: $390,000)."),
+    ("How many closed deals does Bob have?",
+     "There are 2 closed (won or lost) deals owned by Bob (Closed Won: 1, Closed Lost: 1)."),
+    ("Which region has the most closed deals in Europe?",
+     "Europe has the highest number of closed (won or lost) deals in Europe: 2 deals."),
+])
+def test_structured_questions_are_answered_locally(engine, question, answer):
+    assert engine.answer(question) == answer
+
+
+@pytest.mark.parametrize("question", [
+    # Negations
+    "How many deals are not closed won?",
+    "What is the total value of deals outside North America?",
+    "How many deals are there excluding Europe?",
+    "Total value of deals except the ones in Europe",
+    "How many deals aren't lost?",
+    # Clients and other unknown names
+    "What is the total value of deals for Acme Corp?",
+    "Total value of deals with Beta Ltd",
+    "How many deals does Zoe have?",
+    # Numbers, thresholds and time ranges
+    "How many deals did Bob close in 2023?",
+    "What was the total value of deals last quarter?",
+    "How many deals above $100k?",
+    "How many deals are worth more than 50000?",
+    # Several values for one slot
+    "How many won and lost deals are there?",
+    "Total value of deals in Europe and North America",
+    # Metrics the engine does not compute
+    "What is the highest deal value?",
+    "Who is the top performer by number of deals?",
+    "Which region has the highest average deal value?",
+    # Open-ended
+    "Why are deals being lost in Europe?",
+])
+def test_questions_with_unsupported_qualifiers_go_to_the_llm(engine, question):
+    assert engine.parse(question) is None
+    assert engine.answer(question) is None
+
+
+def test_routing_counts_are_shared_across_engines():
+    with open(DUMMY_DATA_PATH) as f:
+        data = json.load(f)
+    routing = RoutingStats()
+    QueryEngine(SalesDataset(data).store, routing).answer("How many deals are in progress?")
+    # A reload or write builds a new engine over the new data
+    QueryEngine(SalesDataset(data).store, routing).answer("Why did Europe underperform?")
+    assert routing.stats() == {"localAnswers": 1, "llmFallbacks": 1, "routingRate": 0.5,
+                               "intents": {"aggregate": 1}}
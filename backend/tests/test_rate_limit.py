@@ -0,0 +1,61 @@
+"""
+Continuation pages of a paged read (a ``cursor`` past the first page) are
+charged to the larger "pages" budget instead of the data budget, so loading
+a large dataset does not run into 429s but is still bounded. First pages,
+``cursor=0`` and other reads are charged to the data budget and rejected
+over it, with a ``Retry-After`` that browsers may read.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from rate_limit import MemoryBucketStore
+
+BURST = 3
+PAGES_BURST = 20
+
+
+@pytest.fixture
+def client():
+    limiter = main.RATE_LIMITER
+    saved = (limiter.store, limiter.enabled, dict(limiter.budgets))
+    limiter.store, limiter.enabled = MemoryBucketStore(), True
+    limiter.budgets["data"] = (1, BURST)
+    limiter.budgets["pages"] = (1, PAGES_BURST)
+    yield TestClient(main.app)
+    limiter.store, limiter.enabled = saved[0], saved[1]
+    limiter.budgets.update(saved[2])
+
+
+def test_continuation_pages_use_the_pages_budget(client):
+    first = client.get("/api/data", params={"limit": 1})
+    assert first.status_code == 200
+    cursor = first.json()["nextCursor"]
+    for _ in range(PAGES_BURST // 2):
+        assert client.get("/api/data", params={"limit": 1, "cursor": cursor}).status_code == 200
+        assert client.get("/api/sales-reps", params={"limit": 1, "cursor": "1"}).status_code == 200
+    assert client.get("/api/data", params={"limit": 1, "cursor": cursor}).status_code == 429
+    for _ in range(BURST - 1):
+        assert client.get("/api/sales-analytics").status_code == 200
+    assert client.get("/api/data", params={"limit": 1}).status_code == 429
+
+
+@pytest.mark.parametrize("params", [{"cursor": "0"}, {"cursor": "0", "limit": 1}])
+def test_first_page_cursor_is_charged(client, params):
+    for _ in range(BURST):
+        assert client.get("/api/data", params=params).status_code in (200, 400)
+    assert client.get("/api/data", params=params).status_code == 429
+
+
+def test_cursor_requires_limit(client):
+    assert client.get("/api/data", params={"cursor": "1"}).status_code == 400
+
+
+def test_retry_after_is_exposed_to_browsers(client):
+    origin = {"Origin": "http://localhost:3000"}
+    for _ in range(BURST):
+        client.get("/api/sales-analytics", headers=origin)
+    response = client.get("/api/sales-analytics", headers=origin)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "retry-after" in response.headers["Access-Control-Expose-Headers"].lower()
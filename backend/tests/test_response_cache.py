@@ -0,0 +1,28 @@
+"""
+A response built for an older data version (a request that started before a
+write or reload) is served but neither stored nor allowed to clear the cache
+of the current version.
+"""
+from response_cache import ResponseCache
+
+KEY = ("/api/sales-analytics", ())
+
+
+def test_stale_version_does_not_clear_or_rewind_the_cache():
+    cache = ResponseCache()
+    current = cache.get(KEY, 2, lambda: {"version": 2})
+
+    stale = cache.get(KEY, 1, lambda: {"version": 1})
+    assert stale.body != current.body
+    assert cache.version == 2
+
+    assert cache.get(KEY, 2, lambda: {"version": "rebuilt"}) is current
+    assert cache.hits == 1
+
+
+def test_newer_version_replaces_the_cache():
+    cache = ResponseCache()
+    cache.get(KEY, 1, lambda: {"version": 1})
+    newer = cache.get(KEY, 2, lambda: {"version": 2})
+    assert cache.version == 2
+    assert cache.get(KEY, 2, lambda: {"version": "rebuilt"}) is newer
@@ -0,0 +1,56 @@
+"""
+The retrieval index is updated in place after deal writes and must match an
+index built from scratch over the same data.
+"""
+import copy
+
+import pytest
+
+import dataset as dataset_module
+from dataset import SalesDataset
+from retrieval import BM25Index, ContextRetriever, build_chunks
+from synthetic import generate_dataset
+
+QUESTIONS = ("Who are the top reps in Europe?", "Client 7 in the Finance industry", "Closed Lost deals")
+
+
+def assert_matches_rebuild(retriever: ContextRetriever):
+    index = retriever.index()
+    fresh = BM25Index(build_chunks(retriever.dataset))
+    assert index.chunks == fresh.chunks
+    for question in QUESTIONS:
+        assert index.search(question, 10) == pytest.approx(fresh.search(question, 10))
+
+
+@pytest.fixture
+def retriever():
+    data = generate_dataset(2_000, deals_per_rep=20, clients_per_rep=4, skew=1.0)
+    retriever = ContextRetriever(SalesDataset(copy.deepcopy(data)))
+    retriever.index()
+    return retriever
+
+
+def test_deal_writes_update_the_index_in_place(retriever):
+    dataset = retriever.dataset
+    rep = dataset.data['salesReps'][3]
+    client = rep['clients'][0]['name']
+    created = dataset.create_deal(rep['id'], client, 12_345, "Closed Won")
+    assert_matches_rebuild(retriever)
+
+    other = dataset.data['salesReps'][10]['deals'][0]
+    dataset.update_deal(other['id'], client, 99_000, "Closed Lost")
+    dataset.delete_deal(created['id'])
+    # A status never seen before is listed in every region chunk
+    dataset.update_deal(dataset.data['salesReps'][0]['deals'][0]['id'], "New Client", 1, "On Hold")
+    assert_matches_rebuild(retriever)
+    assert retriever.rebuilds == 1
+    assert retriever.updates == 2
+
+
+def test_index_is_rebuilt_when_the_change_log_is_exceeded(retriever):
+    dataset = retriever.dataset
+    deal = dataset.data['salesReps'][5]['deals'][0]
+    for value in range(dataset_module.CHANGE_LOG_SIZE + 1):
+        dataset.update_deal(deal['id'], deal['client'], value, deal['status'])
+    assert_matches_rebuild(retriever)
+    assert retriever.rebuilds == 2
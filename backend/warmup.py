@@ -0,0 +1,71 @@
+"""
+Background warmup of what the first requests would otherwise build.
+
+The app accepts requests as soon as the data is loaded. Everything else the
+AI features need (the Gemini SDK import, the query engine, the retrieval
+index or the full sales context) is built on first use, which would make the
+first questions after a cold start slow. ``Warmup`` builds those in a worker
+thread right after startup instead, one named step after the other, and
+reports its progress to the health checks: the ``warmup`` component is
+``pending`` until every step has run, so readiness probes only route traffic
+to warm instances.
+
+A failing step is reported but does not block readiness: whatever it was
+meant to build is still built on first use.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+class Warmup:
+    """Runs named warmup steps in a background thread and records their timings."""
+
+    def __init__(self, steps: Sequence[Tuple[str, Callable[[], Any]]], enabled: bool = True):
+        self.steps = list(steps)
+        self.enabled = enabled
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._timings: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        self.started_at = time.time()
+        for name, step in self.steps:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(step)
+            except Exception as e:
+                print(f"Warmup step {name} failed, it will run on first use instead: {e}")
+                self._errors[name] = str(e) or type(e).__name__
+            self._timings[name] = round(time.perf_counter() - start, 3)
+        self.finished_at = time.time()
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """The ``warmup`` health component; ``pending`` until every step has run."""
+        if not self.enabled:
+            return {"status": "disabled"}
+        if self.finished_at is None:
+            return {"status": "pending", "completed": list(self._timings)}
+        component = {
+            "status": "failed" if self._errors else "up",
+            "seconds": round(self.finished_at - self.started_at, 3),
+            "steps": dict(self._timings),
+        }
+        if self._errors:
+            component["errors"] = dict(self._errors)
+        return component
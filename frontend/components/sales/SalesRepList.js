@@ -2,14 +2,8 @@ import React from 'react';
 import SalesRepCard from './SalesRepCard';
 import RegionFilter from './RegionFilter';
 
-const SalesRepsList = ({ salesReps, loading, selectedRegion, setSelectedRegion, darkMode }) => {
-  // Get unique regions
-  const regions = [...new Set(salesReps.map((rep) => rep.region))];
-
-  // Filter sales reps by region
-  const filteredSalesReps = selectedRegion
-    ? salesReps.filter((rep) => rep.region === selectedRegion)
-    : salesReps;
+// salesReps arrive already filtered to selectedRegion by the backend
+const SalesRepsList = ({ salesReps, regions, loading, selectedRegion, setSelectedRegion, darkMode }) => {
 
   return (
     <section className="mb-8">
@@ -33,7 +27,7 @@ const SalesRepsList = ({ salesReps, loading, selectedRegion, setSelectedRegion,
         </div>
       ) : (
         <div className="grid sm:grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-          {filteredSalesReps.map((rep) => (
+          {salesReps.map((rep) => (
             <SalesRepCard key={rep.id} rep={rep} darkMode={darkMode} />
           ))}
         </div>
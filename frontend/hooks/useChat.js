@@ -1,4 +1,45 @@
 import { useState } from 'react';
+import { retryAfterSeconds } from '../utils/rateLimit';
+
+// Thrown for a 429, so the chat can say when to ask again instead of failing
+class RateLimitError extends Error {
+  constructor(response) {
+    const seconds = retryAfterSeconds(response);
+    super(`Too many questions right now. Please try again in ${seconds} second${seconds === 1 ? '' : 's'}.`);
+    this.retryAfter = seconds;
+  }
+}
+
+const askWithoutStreaming = async (question) => {
+  const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/api/ai`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ question }),
+  });
+
+  if (response.status === 429) {
+    throw new RateLimitError(response);
+  }
+  if (!response.ok) {
+    throw new Error(`API error: ${response.status}`);
+  }
+
+  const data = await response.json();
+  return data.answer;
+};
+
+// Parse one Server-Sent Event block into its event name and JSON payload
+const parseEvent = (block) => {
+  let event = 'message';
+  let data = '';
+  for (const line of block.split('\n')) {
+    if (line.startsWith('event: ')) event = line.slice(7);
+    else if (line.startsWith('data: ')) data += line.slice(6);
+  }
+  return { event, data: data ? JSON.parse(data) : {} };
+};
 
 const useChat = () => {
   const [question, setQuestion] = useState('');
@@ -23,40 +64,67 @@ const useChat = () => {
     setIsLoading(true);
     setError(null);
     
+    // Placeholder for the answer, filled in as tokens arrive
+    setChatMessages(prev => [...prev, { type: 'assistant', text: '' }]);
+    const setAnswer = (update) => setChatMessages(prev => {
+      const last = prev[prev.length - 1];
+      return [...prev.slice(0, -1), { ...last, text: update(last.text) }];
+    });
+
     try {
-      // Make API request to backend
-      const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/api/ai`, {
+      // Stream the answer as Server-Sent Events so the first words show up right away
+      const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/api/ai/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Accept': 'text/event-stream',
         },
         body: JSON.stringify({ question: userMessage.text }),
       });
-      
-      if (!response.ok) {
-        throw new Error(`API error: ${response.status}`);
+
+      if (response.status === 429) {
+        // Asking /api/ai instead would be charged to the same exhausted budget
+        throw new RateLimitError(response);
+      }
+      if (!response.ok || !response.body) {
+        // Older backends only have the JSON endpoint
+        const answer = await askWithoutStreaming(userMessage.text);
+        setAnswer(() => answer);
+        return;
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const { event, data } = parseEvent(buffer.slice(0, boundary));
+          buffer = buffer.slice(boundary + 2);
+          if (event === 'token') {
+            setAnswer(text => text + data.text);
+          } else if (event === 'done') {
+            setAnswer(() => data.answer);
+          } else if (event === 'error') {
+            setAnswer(() => data.message);
+          }
+        }
       }
-      
-      const data = await response.json();
-      
-      // Add AI response to chat
-      const aiMessage = {
-        type: 'assistant',
-        text: data.answer
-      };
-      
-      setChatMessages(prev => [...prev, aiMessage]);
     } catch (err) {
       console.error('Error asking question:', err);
       setError(err.message);
       
-      // Add error message to chat
-      const errorMessage = {
-        type: 'assistant',
-        text: `Sorry, I encountered an error: ${err.message}. Please try again later.`
-      };
-      
-      setChatMessages(prev => [...prev, errorMessage]);
+      // Replace the placeholder with an error message
+      if (err instanceof RateLimitError) {
+        setAnswer(() => err.message);
+      } else {
+        setAnswer(() => `Sorry, I encountered an error: ${err.message}. Please try again later.`);
+      }
     } finally {
       setIsLoading(false);
     }
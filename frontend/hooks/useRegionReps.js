@@ -0,0 +1,71 @@
+import { useState, useEffect } from 'react';
+import { fetchWithRetry } from '../utils/rateLimit';
+
+// Largest page /api/sales-reps returns
+const REGION_PAGE_SIZE = 1000;
+
+// Sales reps of one region, filtered by the backend instead of in the browser
+const useRegionReps = (region) => {
+  const [reps, setReps] = useState([]);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (!region) {
+      setReps([]);
+      return;
+    }
+
+    let cancelled = false;
+
+    const fetchPage = async (cursor) => {
+      const params = new URLSearchParams({ region, limit: String(REGION_PAGE_SIZE) });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+      const response = await fetchWithRetry(`${process.env.NEXT_PUBLIC_BACKEND_URL}/api/sales-reps?${params}`);
+      if (!response.ok) {
+        throw new Error(`HTTP error! Status: ${response.status}`);
+      }
+      return response.json();
+    };
+
+    const fetchReps = async () => {
+      try {
+        setLoading(true);
+        const firstPage = await fetchPage(null);
+        if (cancelled) return;
+        setReps(firstPage.salesReps || []);
+        setError(null);
+        // Show the first page right away; larger regions keep filling in below
+        setLoading(false);
+
+        let cursor = firstPage.nextCursor;
+        while (cursor && !cancelled) {
+          const page = await fetchPage(cursor);
+          if (cancelled) return;
+          setReps(prev => [...prev, ...(page.salesReps || [])]);
+          cursor = page.nextCursor;
+        }
+      } catch (error) {
+        console.error('Error fetching sales reps:', error);
+        if (!cancelled) {
+          setError('Failed to load sales reps for this region.');
+        }
+      } finally {
+        if (!cancelled) {
+          setLoading(false);
+        }
+      }
+    };
+
+    fetchReps();
+    return () => {
+      cancelled = true;
+    };
+  }, [region]);
+
+  return { reps, loading, error };
+};
+
+export default useRegionReps;
@@ -1,4 +1,8 @@
 import { useState, useEffect } from 'react';
+import { fetchWithRetry } from '../utils/rateLimit';
+
+// Number of sales reps requested per /api/data page
+const PAGE_SIZE = 100;
 
 const useSalesData = () => {
   const [salesReps, setSalesReps] = useState([]);
@@ -17,39 +21,67 @@ const useSalesData = () => {
   const [error, setError] = useState(null);
 
   useEffect(() => {
+    let cancelled = false;
+    const baseUrl = process.env.NEXT_PUBLIC_BACKEND_URL;
+
+    const fetchPage = async (cursor) => {
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+      const response = await fetchWithRetry(`${baseUrl}/api/data?${params}`);
+      if (!response.ok) {
+        throw new Error(`HTTP error! Status: ${response.status}`);
+      }
+      return response.json();
+    };
+
     const fetchData = async () => {
       try {
         setLoading(true);
         
-        // Fetch both sales reps data and analytics in parallel
-        const [salesResponse, analyticsResponse] = await Promise.all([
-          fetch(process.env.NEXT_PUBLIC_BACKEND_URL + '/api/data'),
-          fetch(process.env.NEXT_PUBLIC_BACKEND_URL + '/api/sales-analytics')
+        // Fetch the first page of sales reps and the analytics in parallel
+        const [firstPage, analyticsResponse] = await Promise.all([
+          fetchPage(null),
+          fetchWithRetry(baseUrl + '/api/sales-analytics')
         ]);
         
-        if (!salesResponse.ok) {
-          throw new Error(`HTTP error! Status: ${salesResponse.status}`);
-        }
-        
         if (!analyticsResponse.ok) {
           throw new Error(`HTTP error! Status: ${analyticsResponse.status}`);
         }
         
-        const salesData = await salesResponse.json();
         const analyticsData = await analyticsResponse.json();
+        if (cancelled) return;
         
-        setSalesReps(salesData.salesReps || []);
+        setSalesReps(firstPage.salesReps || []);
         setAnalytics(analyticsData);
         setError(null);
+        // Render as soon as the first page arrives; the rest streams in below
+        setLoading(false);
+
+        let cursor = firstPage.nextCursor;
+        while (cursor && !cancelled) {
+          const page = await fetchPage(cursor);
+          if (cancelled) return;
+          setSalesReps(prev => [...prev, ...(page.salesReps || [])]);
+          cursor = page.nextCursor;
+        }
       } catch (error) {
         console.error('Error fetching data:', error);
-        setError('Failed to load sales data. Please try again later.');
+        if (!cancelled) {
+          setError('Failed to load sales data. Please try again later.');
+        }
       } finally {
-        setLoading(false);
+        if (!cancelled) {
+          setLoading(false);
+        }
       }
     };
 
     fetchData();
+    return () => {
+      cancelled = true;
+    };
   }, []);
 
   // Prepare dealStats in the format expected by the components
@@ -18,17 +18,19 @@ import HealthStatusIndicator from "../components/system/HealthStatusIndicator";
 
 // Custom hooks
 import useSalesData from "../hooks/useSalesData";
+import useRegionReps from "../hooks/useRegionReps";
 import useChat from "../hooks/useChat";
 
 export default function Home() {
   // Fetch sales data and analytics
-  const { salesReps, loading, dealStats } = useSalesData();
+  const { salesReps, analytics, loading, dealStats } = useSalesData();
   
   // Chat functionality
   const { question, setQuestion, chatMessages, handleAskQuestion } = useChat();
   
-  // Region filter state
+  // Region filter state; the selected region is filtered by the backend
   const [selectedRegion, setSelectedRegion] = useState("");
+  const { reps: regionReps, loading: regionLoading } = useRegionReps(selectedRegion);
   
   // Theme state
   const [darkMode, setDarkMode] = useState(true);
@@ -131,8 +133,9 @@ export default function Home() {
 
         {/* Sales Representatives Section */}
         <SalesRepsList 
-          salesReps={salesReps} 
-          loading={loading} 
+          salesReps={selectedRegion ? regionReps : salesReps} 
+          regions={analytics.regionDistribution}
+          loading={selectedRegion ? regionLoading : loading} 
           selectedRegion={selectedRegion}
           setSelectedRegion={setSelectedRegion}
           darkMode={darkMode}
@@ -0,0 +1,21 @@
+// Times a request rejected with 429 is retried before giving up
+const MAX_RETRIES = 3;
+
+// Seconds the backend asked to wait before retrying, from the Retry-After header
+export const retryAfterSeconds = (response) => {
+  const seconds = Number(response.headers.get('Retry-After'));
+  return Number.isFinite(seconds) && seconds > 0 ? seconds : 1;
+};
+
+const sleep = (seconds) => new Promise(resolve => setTimeout(resolve, seconds * 1000));
+
+// fetch that waits out rate limit rejections (429) as told by Retry-After
+export const fetchWithRetry = async (url, options) => {
+  for (let attempt = 0; ; attempt++) {
+    const response = await fetch(url, options);
+    if (response.status !== 429 || attempt >= MAX_RETRIES) {
+      return response;
+    }
+    await sleep(retryAfterSeconds(response));
+  }
+};